@@ -1,18 +1,144 @@
-from fastapi import APIRouter
+import json
+import structlog
+from fastapi import APIRouter, Depends, Header, Query, Request
 from fastapi.exceptions import HTTPException
-from typing import List
-from app.utils.model import search_address_single_levenshtein
-from app.schema.address import SearchResponse
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from app.core.config import configs
+from app.core.exceptions import ValidationError
+from app.core.profiling import require_profiling
+from app.core.responses import INDEX_VERSION_HEADER, FastJSONResponse, cached_json, dumps, not_modified
+from app.schema.address import SearchResponse, BatchSearchResponse
+from app.services.search_service import SearchService, get_search_service
+from app.utils.geo import GeoBias
 
 
+logger = structlog.get_logger()
+
 router = APIRouter(prefix="/search", tags=["search"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def parse_batch_body(body: bytes, content_type: str) -> List[str]:
+    """Список адресов из JSON-массива или NDJSON (строка или {"address": ...} на строку)"""
+    try:
+        if content_type.startswith(NDJSON_MEDIA_TYPE):
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body or b"[]")
+            if isinstance(items, dict):
+                if "addresses" not in items:
+                    raise ValidationError(detail='Batch body object must have an "addresses" list')
+                items = items["addresses"]
+    except ValueError as e:
+        raise ValidationError(detail=f"Invalid batch body: {e}")
+
+    if not isinstance(items, list):
+        raise ValidationError(detail="Batch body must be a list of addresses")
+
+    addresses = []
+    for item in items:
+        if isinstance(item, dict):
+            item = item.get("address")
+        if not isinstance(item, str):
+            raise ValidationError(detail="Every batch item must be an address string")
+        addresses.append(item)
+
+    if len(addresses) > configs.BATCH_MAX_SIZE:
+        raise ValidationError(detail=f"Batch size exceeds {configs.BATCH_MAX_SIZE}")
+    return addresses
+
+
+def parse_geo_bias(lat: Optional[float], lon: Optional[float], radius: Optional[float],
+                   bbox: Optional[str]) -> Optional[GeoBias]:
+    """GeoBias из параметров запроса: lat+lon (+radius) и/или bbox=min_lon,min_lat,max_lon,max_lat"""
+    if (lat is None) != (lon is None):
+        raise ValidationError(detail="lat and lon must be passed together")
+
+    box = None
+    if bbox:
+        try:
+            box = tuple(float(v) for v in bbox.split(","))
+        except ValueError:
+            box = ()
+        if len(box) != 4 or box[0] > box[2] or box[1] > box[3]:
+            raise ValidationError(detail="bbox must be min_lon,min_lat,max_lon,max_lat")
+
+    if lat is None and box is None:
+        return None
+    if lat is not None and radius is None:
+        radius = configs.GEO_BIAS_RADIUS
+    return GeoBias(lat=lat, lon=lon, radius=radius if lat is not None else None, bbox=box)
+
+
 @router.get("", response_model=SearchResponse)
-async def search(address: str):
+async def search(
+        request: Request,
+        address: str,
+        locality: Optional[str] = None,
+        lat: Optional[float] = Query(None, ge=-90, le=90),
+        lon: Optional[float] = Query(None, ge=-180, le=180),
+        radius: Optional[float] = Query(None, gt=0, description="Радиус области вокруг lat/lon, м"),
+        bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+        debug: bool = Query(False, description="Профиль поиска: этапы и число кандидатов (SEARCH_PROFILING или X-Admin-Token)"),
+        x_admin_token: Optional[str] = Header(None),
+        search_service: SearchService = Depends(get_search_service)):
+    bias = parse_geo_bias(lat, lon, radius, bbox)
+    if debug:
+        require_profiling(x_admin_token)
     try:
-        res = search_address_single_levenshtein("buildings_cleaned.csv", address, top_n=3)
-        return res
+        if debug:
+            # Профиль — про этот запрос: мимо кэша результатов и HTTP-кэша
+            res = await search_service.search(address, top_n=3, locality=locality, bias=bias, debug=True)
+            return FastJSONResponse(res, headers={INDEX_VERSION_HEADER: search_service.index_version,
+                                                  "Cache-Control": "no-store"})
 
+        # Повторный запрос с ETag текущей версии индекса до поиска не доходит
+        unchanged = not_modified(request, search_service.get_index().version)
+        if unchanged is not None:
+            return unchanged
+        res = await search_service.search(address, top_n=3, locality=locality, bias=bias)
+        return cached_json(res, search_service.index_version)
+
+    except HTTPException:
+        raise
     except Exception as e:
-        print("❌ Ошибка при сохранении:", e)
+        logger.exception("search_failed", address=address, locality=locality)
         raise HTTPException(status_code=500, detail=f"Error calculating route: {str(e)}")
+
+
+@router.post(
+    "/batch",
+    response_model=BatchSearchResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": {"type": "string"}}},
+                NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}},
+            },
+            "required": True,
+        }
+    },
+)
+async def search_batch(
+        request: Request,
+        top_n: int = Query(3, ge=1, le=50),
+        locality: Optional[str] = None,
+        search_service: SearchService = Depends(get_search_service)):
+    content_type = request.headers.get("content-type", "application/json")
+    addresses = parse_batch_body(await request.body(), content_type)
+
+    try:
+        results = await search_service.search_batch(addresses, top_n=top_n, locality=locality)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("batch_search_failed", size=len(addresses), locality=locality)
+        raise HTTPException(status_code=500, detail=f"Error in batch search: {str(e)}")
+
+    headers = {INDEX_VERSION_HEADER: search_service.index_version}
+    if content_type.startswith(NDJSON_MEDIA_TYPE):
+        lines = (dumps(item) + b"\n" for item in results)
+        return StreamingResponse(lines, media_type=NDJSON_MEDIA_TYPE, headers=headers)
+    return FastJSONResponse({"results": results}, headers=headers)
@@ -0,0 +1,73 @@
+import hmac
+import os
+import tempfile
+import structlog
+from fastapi import APIRouter, Depends, Header, Request
+from fastapi.exceptions import HTTPException
+from typing import Optional
+from app.core.config import configs
+from app.core.exceptions import AuthError, ConflictError
+from app.core.executor import SearchExecutor, get_search_executor
+from app.services.index_service import IndexService, get_index_service
+
+
+logger = structlog.get_logger()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not configs.ADMIN_TOKEN:
+        raise AuthError(detail="Admin API is disabled: set ADMIN_TOKEN")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, configs.ADMIN_TOKEN):
+        raise AuthError(detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/index")
+async def index_status(index_service: IndexService = Depends(get_index_service)):
+    return index_service.status()
+
+
+@router.post("/reload")
+async def reload_index(
+        index_service: IndexService = Depends(get_index_service),
+        executor: SearchExecutor = Depends(get_search_executor)):
+    """Пересобирает индекс из файлов датасета/снапшотов и подменяет его без остановки сервиса"""
+    try:
+        await index_service.reload()
+        executor.restart()
+        return index_service.status()
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("index_reload_failed")
+        raise HTTPException(status_code=500, detail=f"Error reloading index: {str(e)}")
+
+
+@router.post("/delta")
+async def apply_delta(
+        request: Request,
+        locality: str = configs.DEFAULT_LOCALITY,
+        index_service: IndexService = Depends(get_index_service),
+        executor: SearchExecutor = Depends(get_search_executor)):
+    """Изменения шарда из тела запроса: CSV датасета (sep=';') с колонкой op — add или remove"""
+    if executor.backend == "process":
+        raise ConflictError(detail="Deltas are not supported with SEARCH_EXECUTOR=process: rebuild the snapshot")
+
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for data in request.stream():
+                f.write(data)
+        await index_service.apply_delta(locality, path)
+        return index_service.status()
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("index_delta_request_failed", locality=locality)
+        raise HTTPException(status_code=500, detail=f"Error applying delta: {str(e)}")
+    finally:
+        os.remove(path)
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from app.core.cache import get_search_cache
+from app.core.profiling import SlowQueryLog, get_slow_query_log
+from app.services.index_service import IndexService, get_index_service
+
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+async def live():
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def ready(index_service: IndexService = Depends(get_index_service), cache=Depends(get_search_cache),
+                slow_log: SlowQueryLog = Depends(get_slow_query_log)):
+    if not index_service.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "failed" if index_service.error else "loading", "error": index_service.error},
+        )
+
+    return {
+        "status": "ready",
+        "load_seconds": index_service.load_seconds,
+        "streets": index_service.index.n_streets,
+        "houses": len(index_service.index),
+        "version": index_service.index.version,
+        "shards": {
+            locality: {"streets": shard.n_streets, "houses": len(shard), "version": shard.version}
+            for locality, shard in index_service.index.shards.items()
+        },
+        "cache": cache.stats(),
+        "slow_query_log": slow_log.stats(),
+    }
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import structlog
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.exceptions import HTTPException
+from fastapi.responses import StreamingResponse
+from app.api.endpoints.admin import require_admin
+from app.core.config import configs
+from app.core.exceptions import ConflictError
+from app.core.executor import SearchExecutor, get_search_executor
+from app.repository.address_repository import AddressRepository, get_address_repo
+from app.services.index_service import IndexService, get_index_service
+from app.services.ingest_service import IngestService, get_ingest_service
+
+
+logger = structlog.get_logger()
+
+router = APIRouter(prefix="/addresses", tags=["addresses"], dependencies=[Depends(require_admin)])
+
+@router.post("/bulk")
+async def bulk_load(
+        request: Request,
+        format: str = Query("csv", pattern="^(csv|ndjson)$"),
+        locality: str = configs.DEFAULT_LOCALITY,
+        chunk_size: int = Query(configs.INGEST_CHUNK_SIZE, ge=1, le=100000),
+        ingest_service: IngestService = Depends(get_ingest_service),
+        index_service: IndexService = Depends(get_index_service),
+        executor: SearchExecutor = Depends(get_search_executor)):
+    """Массовая загрузка адресов из тела запроса (CSV через ';' или NDJSON).
+
+    Тело потоково пишется во временный файл, затем грузится кусками по chunk_size.
+    Без checkpoint: при ошибке (битая строка — 422 с её номером) куски до неё уже
+    загружены, повторная загрузка того же тела вставит их снова — для возобновляемой
+    загрузки больших файлов есть ingest.py --checkpoint.
+    При SQLITE_INDEX_SOURCE=db дисковый индекс пересобирается из таблицы и подменяется.
+    """
+    fd, path = tempfile.mkstemp(suffix=f".{format}")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for data in request.stream():
+                f.write(data)
+        result = await ingest_service.ingest(path, fmt=format, locality=locality, chunk_size=chunk_size)
+        # Путь временного файла наружу не отдаём
+        result.pop("source", None)
+        if configs.disk_index_from_db and result["inserted"]:
+            result["index"] = await ingest_service.build_disk_index()
+            try:
+                await index_service.reload()
+                executor.restart()
+            except ConflictError:
+                # Адреса уже загружены: новый файл подхватит следующая перезагрузка
+                logger.warning("bulk_load_reload_skipped", locality=locality)
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("bulk_load_failed", format=format, locality=locality)
+        raise HTTPException(status_code=500, detail=f"Error in bulk load: {str(e)}")
+    finally:
+        os.remove(path)
+
+
+@router.get("/export")
+async def export(
+        chunk_size: int = Query(configs.DB_FETCH_SIZE, ge=1, le=100000),
+        address_repo: AddressRepository = Depends(get_address_repo)):
+    """Выгрузка всех адресов в NDJSON (формат /bulk?format=ndjson), по возрастанию id.
+
+    Таблица читается страницами по chunk_size и отдаётся по мере чтения.
+    """
+    async def lines():
+        async for chunk in address_repo.iter_chunks(chunk_size):
+            yield "".join(address.model_dump_json() + "\n" for address in chunk)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+
+from app.core.exceptions import ServiceUnavailableError
+from app.core.metrics import REGISTRY, render_metrics
+
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    if REGISTRY is None:
+        raise ServiceUnavailableError(detail="Metrics require the 'prometheus_client' package")
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,60 @@
+import structlog
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.exceptions import HTTPException
+from typing import List, Optional
+from app.core.config import configs
+from app.core.exceptions import ValidationError
+from app.core.responses import INDEX_VERSION_HEADER, FastJSONResponse, cached_json, not_modified
+from app.schema.address import BatchReverseResponse, Point, ReverseResponse
+from app.services.search_service import SearchService, get_search_service
+
+
+logger = structlog.get_logger()
+
+router = APIRouter(prefix="/reverse", tags=["reverse"])
+
+
+@router.get("", response_model=ReverseResponse)
+async def reverse(
+        request: Request,
+        lat: float = Query(..., ge=-90, le=90),
+        lon: float = Query(..., ge=-180, le=180),
+        k: int = Query(5, ge=1, le=50),
+        radius: Optional[float] = Query(None, gt=0, description="Максимальное расстояние, м"),
+        locality: Optional[str] = None,
+        search_service: SearchService = Depends(get_search_service)):
+    try:
+        unchanged = not_modified(request, search_service.get_index().version)
+        if unchanged is not None:
+            return unchanged
+        res = await search_service.reverse(lat, lon, k=k, max_distance=radius, locality=locality)
+        return cached_json(res, search_service.index_version)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("reverse_failed", lat=lat, lon=lon, locality=locality)
+        raise HTTPException(status_code=500, detail=f"Error in reverse geocoding: {str(e)}")
+
+
+@router.post("/batch", response_model=BatchReverseResponse)
+async def reverse_batch(
+        points: List[Point],
+        k: int = Query(5, ge=1, le=50),
+        radius: Optional[float] = Query(None, gt=0, description="Максимальное расстояние, м"),
+        locality: Optional[str] = None,
+        search_service: SearchService = Depends(get_search_service)):
+    if len(points) > configs.BATCH_MAX_SIZE:
+        raise ValidationError(detail=f"Batch size exceeds {configs.BATCH_MAX_SIZE}")
+
+    try:
+        results = await search_service.reverse_batch(
+            [(p.lat, p.lon) for p in points], k=k, max_distance=radius, locality=locality
+        )
+        return FastJSONResponse({"results": results}, headers={INDEX_VERSION_HEADER: search_service.index_version})
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("reverse_batch_failed", size=len(points), locality=locality)
+        raise HTTPException(status_code=500, detail=f"Error in reverse geocoding: {str(e)}")
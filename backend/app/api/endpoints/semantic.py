@@ -0,0 +1,25 @@
+import structlog
+from typing import Optional
+from fastapi import APIRouter, Depends
+from fastapi.exceptions import HTTPException
+from app.schema.address import SearchResponse
+from app.services.address_service import AddressService, get_address_service
+
+
+logger = structlog.get_logger()
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+@router.get("/hybrid", response_model=SearchResponse)
+async def search_hybrid(
+        address: str,
+        locality: Optional[str] = None,
+        address_service: AddressService = Depends(get_address_service)):
+    try:
+        return await address_service.search(address, n_results=3, locality=locality)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("hybrid_search_failed", address=address, locality=locality)
+        raise HTTPException(status_code=500, detail=f"Error in hybrid search: {str(e)}")
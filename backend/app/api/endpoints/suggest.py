@@ -0,0 +1,46 @@
+import structlog
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.exceptions import HTTPException
+from typing import Optional
+from app.core.config import configs
+from app.core.responses import FastJSONResponse, cached_json, not_modified
+from app.schema.address import SuggestResponse
+from app.services.search_service import SearchService, get_search_service
+
+
+logger = structlog.get_logger()
+
+router = APIRouter(prefix="/suggest", tags=["suggest"])
+
+
+@router.get("", response_model=SuggestResponse)
+async def suggest(
+        request: Request,
+        q: str,
+        limit: int = Query(8, ge=1, le=50),
+        locality: Optional[str] = None,
+        search_service: SearchService = Depends(get_search_service)):
+    """Подсказки по началу адреса.
+
+    Клиенту стоит ждать debounce_ms после последнего нажатия и отменять
+    предыдущий незавершённый запрос (AbortController).
+    """
+    if len(q.strip()) < configs.SUGGEST_MIN_LENGTH:
+        return FastJSONResponse({"query": q, "suggestions": [], "debounce_ms": configs.SUGGEST_DEBOUNCE_MS},
+                                headers={"Cache-Control": f"public, max-age={configs.SUGGEST_CACHE_MAX_AGE}"})
+
+    # Подсказки для префикса меняются только вместе с индексом
+    try:
+        unchanged = not_modified(request, search_service.get_index().version, configs.SUGGEST_CACHE_MAX_AGE)
+        if unchanged is not None:
+            return unchanged
+        suggestions = await search_service.suggest(q, limit=limit, locality=locality)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("suggest_failed", q=q, locality=locality)
+        raise HTTPException(status_code=500, detail=f"Error in suggest: {str(e)}")
+
+    return cached_json({"query": q, "suggestions": suggestions, "debounce_ms": configs.SUGGEST_DEBOUNCE_MS},
+                       search_service.index_version, configs.SUGGEST_CACHE_MAX_AGE)
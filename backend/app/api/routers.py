@@ -1,5 +1,19 @@
 from app.api.endpoints.address import router as address
+from app.api.endpoints.admin import router as admin
+from app.api.endpoints.ingest import router as ingest
+from app.api.endpoints.reverse import router as reverse
+from app.api.endpoints.suggest import router as suggest
+from app.core.config import configs
 from fastapi import APIRouter
 
 main_router = APIRouter(prefix='/api')
 main_router.include_router(address)
+main_router.include_router(admin)
+main_router.include_router(ingest)
+main_router.include_router(reverse)
+main_router.include_router(suggest)
+
+# Семантический поиск требует chromadb и sentence-transformers, подключается явно
+if configs.SEMANTIC_ENABLED:
+    from app.api.endpoints.semantic import router as semantic
+    main_router.include_router(semantic)
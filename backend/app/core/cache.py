@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.core.config import configs
+
+
+class LocalCache:
+    """LRU-кэш процесса с TTL и счётчиками попаданий"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.version = ""
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def set_version(self, version: str):
+        # Кэш не очищается: версия индекса входит в ключ, поэтому записи прежней версии
+        # не читаются и вытесняются по LRU и TTL. Запросы, дорабатывающие на старом
+        # индексе во время перезагрузки, не сбрасывают записи новой версии
+        self.version = version
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    async def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    async def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": "local",
+            "version": self.version,
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+class RedisCache:
+    """Общий для реплик кэш в Redis; ключи с версией индекса, устаревание — по TTL"""
+
+    def __init__(self, url: str, ttl: float, prefix: str = "search:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.version = ""
+        self.hits = 0
+        self.misses = 0
+
+    async def set_version(self, version: str):
+        # Записи старой версии индекса не читаются (версия в ключе) и истекают по TTL
+        self.version = version
+
+    def _key(self, key: Hashable) -> str:
+        return self.prefix + json.dumps(key, ensure_ascii=False)
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        raw = await self.client.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key: Hashable, value: Any):
+        await self.client.set(self._key(key), json.dumps(value, ensure_ascii=False), ex=int(self.ttl))
+
+    async def clear(self):
+        async for key in self.client.scan_iter(match=self.prefix + "*"):
+            await self.client.delete(key)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+def create_cache():
+    if configs.CACHE_BACKEND == "redis":
+        return RedisCache(configs.CACHE_REDIS_URL, configs.CACHE_TTL)
+    return LocalCache(configs.CACHE_MAX_SIZE, configs.CACHE_TTL)
+
+
+search_cache = create_cache()
+
+
+def get_search_cache():
+    return search_cache
@@ -23,11 +23,66 @@ class Configs(BaseSettings):
 
     # auth
     SECRET_KEY: str = os.getenv("SECRET_KEY", "")
+    # токен заголовка X-Admin-Token для /api/admin; пустой — admin API выключен
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 30  # 60 minutes * 24 hours * 30 days = 30 days
 
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = ["*"]
 
+    # search
+    DATASET_PATH: str = os.getenv("DATASET_PATH", "buildings_cleaned.csv")
+    # каталог снапшота из build_index.py; если он есть, CSV при старте не читается
+    INDEX_SNAPSHOT_PATH: str = os.getenv("INDEX_SNAPSHOT_PATH", "index_snapshot")
+    DEFAULT_LOCALITY: str = os.getenv("DEFAULT_LOCALITY", "Москва")
+    # несколько регионов: "Москва=buildings_cleaned.csv,Казань=kazan_snapshot" (CSV, каталог снапшота или .sqlite)
+    DATASETS: str = os.getenv("DATASETS", "")
+    # период (с) проверки файлов датасета/снапшота для перезагрузки индекса; 0 — только через /api/admin/reload
+    INDEX_WATCH_INTERVAL: float = float(os.getenv("INDEX_WATCH_INTERVAL", "0"))
+    # memory — индекс в памяти воркера; sqlite — дисковый индекс SQLITE_INDEX_PATH (build_index.py --sqlite)
+    SEARCH_ENGINE: str = os.getenv("SEARCH_ENGINE", "memory")
+    SQLITE_INDEX_PATH: str = os.getenv("SQLITE_INDEX_PATH", "index.sqlite")
+    # db — дисковый индекс собирается из таблицы address и пересобирается после /api/addresses/bulk;
+    # csv — только build_index.py --sqlite из CSV
+    SQLITE_INDEX_SOURCE: str = os.getenv("SQLITE_INDEX_SOURCE", "db")
+    # улиц-кандидатов из триграммного индекса перед rapidfuzz; 0 — полный перебор
+    CANDIDATE_LIMIT: int = int(os.getenv("CANDIDATE_LIMIT", "300"))
+    BATCH_MAX_SIZE: int = int(os.getenv("BATCH_MAX_SIZE", "50000"))
+    # подсказки: минимальная длина ввода и рекомендуемая клиенту задержка перед запросом
+    SUGGEST_MIN_LENGTH: int = int(os.getenv("SUGGEST_MIN_LENGTH", "2"))
+    SUGGEST_DEBOUNCE_MS: int = int(os.getenv("SUGGEST_DEBOUNCE_MS", "150"))
+    SUGGEST_CACHE_MAX_AGE: int = int(os.getenv("SUGGEST_CACHE_MAX_AGE", "60"))
+    # радиус (м) вокруг lat/lon, в котором дома поднимаются в выдаче, если он не передан в запросе
+    GEO_BIAS_RADIUS: float = float(os.getenv("GEO_BIAS_RADIUS", "3000"))
+    # thread | process
+    SEARCH_EXECUTOR: str = os.getenv("SEARCH_EXECUTOR", "thread")
+    SEARCH_WORKERS: int = int(os.getenv("SEARCH_WORKERS", str(os.cpu_count() or 1)))
+    # сколько запросов поиска может одновременно выполняться и ждать в очереди
+    SEARCH_MAX_PENDING: int = int(os.getenv("SEARCH_MAX_PENDING", "64"))
+    SEARCH_RETRY_AFTER: int = int(os.getenv("SEARCH_RETRY_AFTER", "1"))
+
+    # HTTP: Cache-Control max-age (с) GET-ответов поиска (ETag — версия индекса, 0 — без Cache-Control);
+    # ответы больше GZIP_MIN_SIZE байт сжимаются с уровнем GZIP_LEVEL: 1 почти втрое быстрее 6
+    # при ответе на треть больше. 0 — без сжатия (по умолчанию: GZipMiddleware жмёт в event loop,
+    # сжатие лучше отдать прокси)
+    HTTP_CACHE_MAX_AGE: int = int(os.getenv("HTTP_CACHE_MAX_AGE", "300"))
+    GZIP_MIN_SIZE: int = int(os.getenv("GZIP_MIN_SIZE", "0"))
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", "1"))
+
+    # cache: local | redis
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "local")
+    CACHE_MAX_SIZE: int = int(os.getenv("CACHE_MAX_SIZE", "100000"))
+    CACHE_TTL: int = int(os.getenv("CACHE_TTL", "3600"))
+    CACHE_REDIS_URL: str = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+    # semantic / hybrid search (нужны chromadb и sentence-transformers)
+    SEMANTIC_ENABLED: bool = os.getenv("SEMANTIC_ENABLED", "0") == "1"
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+    CHROMA_PATH: str = os.getenv("CHROMA_PATH", "chroma_data")
+    # вес rapidfuzz-оценки при слиянии с семантической близостью
+    HYBRID_ALPHA: float = float(os.getenv("HYBRID_ALPHA", "0.7"))
+
     # database
     DB: str = os.getenv("DB", "postgresql")
     DB_USER: str = os.getenv("DB_USER", "admin")
@@ -36,7 +91,54 @@ class Configs(BaseSettings):
     DB_PORT: str = os.getenv("DB_PORT", "5432")
     DB_ENGINE: str = DB_ENGINE_MAPPER.get("postgresql", "postgresql")
 
-    DATABASE_URI: str = f"{DB_ENGINE}://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB}"
+    DATABASE_URI: str = os.getenv("DATABASE_URI", f"{DB_ENGINE}://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB}")
+    # пул соединений на процесс: постоянные + временные сверх них, ожидание свободного (с), пересоздание (с)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+    # строк на страницу при потоковом чтении таблицы (выгрузка, переиндексация)
+    DB_FETCH_SIZE: int = int(os.getenv("DB_FETCH_SIZE", "5000"))
+
+    # logging: журнал доступа пишется через очередь, успешные запросы — с долей ACCESS_LOG_SAMPLE_RATE
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    ACCESS_LOG_ENABLED: bool = os.getenv("ACCESS_LOG_ENABLED", "1") == "1"
+    ACCESS_LOG_SAMPLE_RATE: float = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+    ACCESS_LOG_BODIES: bool = os.getenv("ACCESS_LOG_BODIES", "0") == "1"
+    ACCESS_LOG_BODY_LIMIT: int = int(os.getenv("ACCESS_LOG_BODY_LIMIT", "2048"))
+
+    # профилирование поиска: /api/search?debug=1 отдаёт этапы и число кандидатов — всем при
+    # SEARCH_PROFILING=1, иначе только с X-Admin-Token
+    SEARCH_PROFILING: bool = os.getenv("SEARCH_PROFILING", "0") == "1"
+    # журнал медленных запросов (JSON-строки с профилем, ротация по размеру); "" — выключен
+    SLOW_QUERY_LOG_PATH: str = os.getenv("SLOW_QUERY_LOG_PATH", "")
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "100"))
+    SLOW_QUERY_SAMPLE_RATE: float = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", "1.0"))
+    SLOW_QUERY_LOG_MAX_BYTES: int = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    SLOW_QUERY_LOG_BACKUPS: int = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+
+    # bulk ingestion
+    INGEST_CHUNK_SIZE: int = int(os.getenv("INGEST_CHUNK_SIZE", "5000"))
+
+    @property
+    def disk_index_from_db(self) -> bool:
+        """Единственный шард — дисковый индекс по таблице address"""
+        return self.SEARCH_ENGINE == "sqlite" and self.SQLITE_INDEX_SOURCE == "db" and not self.DATASETS
+
+    def dataset_shards(self) -> List[tuple]:
+        """[(locality, dataset_path, snapshot_path)] для всех шардов индекса"""
+        if self.SEARCH_ENGINE not in ("memory", "sqlite"):
+            raise ValueError(f"Unknown search engine: {self.SEARCH_ENGINE}")
+        if not self.DATASETS:
+            index_path = self.SQLITE_INDEX_PATH if self.SEARCH_ENGINE == "sqlite" else self.INDEX_SNAPSHOT_PATH
+            return [(self.DEFAULT_LOCALITY, self.DATASET_PATH, index_path)]
+        shards = []
+        for item in self.DATASETS.split(","):
+            locality, path = item.split("=", 1)
+            shards.append((locality.strip(), path.strip(), path.strip()))
+        return shards
 
     class Config:
         case_sensitive = True
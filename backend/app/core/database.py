@@ -1,28 +1,47 @@
+import functools
 from typing import AsyncGenerator
-import chromadb
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker, AsyncSession
 from app.core.config import configs
 from app.model.base_model import Base
-from sentence_transformers import SentenceTransformer
 
-MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-engine = create_async_engine(configs.DATABASE_URI, echo=False, future=True)
+
+def create_engine(url: str = configs.DATABASE_URI) -> AsyncEngine:
+    """Движок с пулом соединений из DB_POOL_*; у SQLite (локальная проверка) — пул по умолчанию"""
+    options = {}
+    if not url.startswith("sqlite"):
+        options = {
+            "pool_size": configs.DB_POOL_SIZE,
+            "max_overflow": configs.DB_MAX_OVERFLOW,
+            "pool_timeout": configs.DB_POOL_TIMEOUT,
+            "pool_recycle": configs.DB_POOL_RECYCLE,
+            "pool_pre_ping": configs.DB_POOL_PRE_PING,
+        }
+    return create_async_engine(url, echo=False, **options)
+
+
+engine = create_engine()
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
-chroma = chroma_client = chromadb.Client()
-model = SentenceTransformer(MODEL_NAME)
+@functools.lru_cache(maxsize=1)
+def get_collection():
+    """Коллекция Chroma открывается при первом обращении: без векторного поиска chromadb не нужен.
 
-collection = chroma.create_collection(
-    name="addresses",
-)
+    Векторы хранятся на диске и переживают рестарт; модель эмбеддингов — в app.core.embeddings.
+    """
+    import chromadb
+    chroma = chromadb.PersistentClient(path=configs.CHROMA_PATH)
+    return chroma.get_or_create_collection(
+        name="addresses",
+        metadata={"hnsw:space": "cosine"},
+    )
 
 async def create_tables():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
-async def get_session() -> AsyncGenerator[AsyncSession]:
+async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         yield session
 
-async def get_chroma() -> chromadb.Collection:
-    return collection
+async def get_chroma():
+    return get_collection()
@@ -0,0 +1,37 @@
+import threading
+from typing import List
+
+from app.core.config import configs
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_embedding_model():
+    """Одна на процесс CPU-модель, загружается при первом обращении"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(configs.EMBEDDING_MODEL, device="cpu")
+    return _model
+
+
+def encode(texts: List[str], batch_size: int = configs.EMBEDDING_BATCH_SIZE) -> List[List[float]]:
+    """Нормированные эмбеддинги пачками: косинусная близость = скалярное произведение"""
+    if not texts:
+        return []
+    embeddings = get_embedding_model().encode(
+        texts,
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+    return embeddings.tolist()
+
+
+def address_text(locality: str, street: str, number: str) -> str:
+    """Текст адреса, который индексируется и сравнивается с запросом"""
+    return " ".join(part for part in (locality, street, number) if part)
@@ -18,6 +18,16 @@ class NotFoundError(HTTPException):
         super().__init__(status.HTTP_404_NOT_FOUND, detail, headers)
 
 
+class ConflictError(HTTPException):
+    def __init__(self, detail: Any = None, headers: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(status.HTTP_409_CONFLICT, detail, headers)
+
+
 class ValidationError(HTTPException):
     def __init__(self, detail: Any = None, headers: Optional[Dict[str, Any]] = None) -> None:
         super().__init__(status.HTTP_422_UNPROCESSABLE_ENTITY, detail, headers)
+
+
+class ServiceUnavailableError(HTTPException):
+    def __init__(self, detail: Any = None, headers: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(status.HTTP_503_SERVICE_UNAVAILABLE, detail, headers)
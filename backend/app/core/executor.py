@@ -0,0 +1,115 @@
+import asyncio
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+import structlog
+
+from app.core.config import configs
+from app.core.exceptions import ServiceUnavailableError
+from app.utils.disk_index import is_disk_index
+from app.utils.shards import open_shards
+from app.utils.snapshot import is_snapshot
+
+logger = structlog.get_logger()
+
+# Индекс процесса-воркера (только для backend="process")
+_worker_index = None
+
+
+def _init_process_worker(shard_specs, candidate_limit: int):
+    """Инициализатор процесса пула: снапшоты открываются через mmap и делят страницы с остальными"""
+    global _worker_index
+    _worker_index, _ = open_shards(shard_specs, candidate_limit)
+
+
+def _run_with_worker_index(fn: Callable, *args):
+    return fn(_worker_index, *args)
+
+
+class SearchExecutor:
+    """Выполняет CPU-тяжёлый поиск вне event loop.
+
+    backend="thread" — пул потоков (rapidfuzz отпускает GIL), индекс общий.
+    backend="process" — пул процессов, каждый открывает снапшот индекса через mmap.
+    Число одновременно принятых задач ограничено max_pending: при переполнении
+    запрос сразу получает 503 с Retry-After вместо ожидания в очереди.
+    """
+
+    def __init__(self, backend: str, workers: int, max_pending: int, retry_after: int):
+        if backend not in ("thread", "process"):
+            raise ValueError(f"Unknown search executor backend: {backend}")
+        self.backend = backend
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self.pending = 0
+        self._pool: Optional[Executor] = None
+
+    def start(self):
+        if self._pool is not None:
+            return
+        if self.backend == "process":
+            shard_specs = configs.dataset_shards()
+            for locality, dataset_path, snapshot_path in shard_specs:
+                if not is_snapshot(snapshot_path) and not is_disk_index(snapshot_path):
+                    logger.warning("process_executor_without_snapshot", locality=locality, dataset=dataset_path)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_process_worker,
+                initargs=(shard_specs, configs.CANDIDATE_LIMIT),
+            )
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="search")
+        logger.info("search_executor_started", backend=self.backend, workers=self.workers,
+                    max_pending=self.max_pending)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def restart(self):
+        """Новый пул после перезагрузки индекса: процессы заново открывают снапшоты.
+
+        Задачи старого пула дорабатывают на прежнем индексе. Пулу потоков
+        перезапуск не нужен — потоки получают индекс с каждым вызовом.
+        """
+        if self.backend != "process" or self._pool is None:
+            return
+        old_pool, self._pool = self._pool, None
+        self.start()
+        old_pool.shutdown(wait=False, cancel_futures=False)
+
+    async def run(self, fn: Callable, *args, index=None):
+        """Вызывает fn(index, *args) в пуле; в процессном пуле index берётся из воркера"""
+        if self.pending >= self.max_pending:
+            raise ServiceUnavailableError(
+                detail="Search queue is full, retry later",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        if self.backend == "process":
+            call = functools.partial(_run_with_worker_index, fn, *args)
+        else:
+            call = functools.partial(fn, index, *args)
+
+        self.pending += 1
+        try:
+            return await loop.run_in_executor(self._pool, call)
+        finally:
+            self.pending -= 1
+
+
+search_executor = SearchExecutor(
+    backend=configs.SEARCH_EXECUTOR,
+    workers=configs.SEARCH_WORKERS,
+    max_pending=configs.SEARCH_MAX_PENDING,
+    retry_after=configs.SEARCH_RETRY_AFTER,
+)
+
+
+def get_search_executor() -> SearchExecutor:
+    return search_executor
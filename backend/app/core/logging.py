@@ -1,14 +1,87 @@
+import logging
+import queue
+import sys
+import threading
+
 import structlog
 
-structlog.configure(
-    processors=[
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.contextvars.merge_contextvars,  # принимает logger, method_name, event_dict
-        structlog.processors.add_log_level,       # тоже принимает три аргумента
-        structlog.processors.StackInfoRenderer(), # для стеков
-        structlog.processors.format_exc_info,     # для exc_info
-        structlog.processors.JSONRenderer()       # финальный рендерер
-    ]
-)
-
-logger = structlog.get_logger()
+
+class QueuedWriter:
+    """Файл для structlog, который не блокирует event loop: строки уходят в очередь,
+    в поток вывода их пишет фоновый поток. При переполнении очереди строка
+    отбрасывается (счётчик dropped), а не ждёт освобождения места.
+    """
+
+    def __init__(self, stream, max_size: int):
+        self.stream = stream
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(max_size)
+        self._thread = threading.Thread(target=self._drain, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, line: str):
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        pass  # structlog вызывает flush после каждой строки; поток сбрасывает вывод сам после пачки
+
+    def _drain(self):
+        while True:
+            lines = [self._queue.get()]
+            # Пишем пачкой всё, что накопилось, одним вызовом write
+            while len(lines) < 1000:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.stream.write("".join(lines))
+                self.stream.flush()
+            except Exception:
+                self.dropped += len(lines)
+            finally:
+                for _ in lines:
+                    self._queue.task_done()
+
+    def drain(self):
+        """Ждёт, пока фоновый поток допишет очередь (при остановке приложения)"""
+        self._queue.join()
+
+
+_writer = None
+
+
+def configure_logging(level: str = "INFO", queue_size: int = 10000, stream=None) -> QueuedWriter:
+    """Единственная настройка structlog процесса: JSON-строки через QueuedWriter.
+
+    Повторный вызов меняет уровень и поток вывода, фоновый поток остаётся прежним.
+    """
+    global _writer
+    if _writer is None:
+        _writer = QueuedWriter(stream or sys.stdout, queue_size)
+    else:
+        _writer.drain()
+        _writer.stream = stream or sys.stdout
+
+    structlog.configure(
+        processors=[
+            structlog.contextvars.merge_contextvars,
+            structlog.processors.add_log_level,
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.processors.JSONRenderer(ensure_ascii=False),
+        ],
+        wrapper_class=structlog.make_filtering_bound_logger(logging.getLevelName(level.upper())),
+        logger_factory=structlog.WriteLoggerFactory(file=_writer),
+        cache_logger_on_first_use=True,
+    )
+    return _writer
+
+
+def flush_logs():
+    if _writer is not None:
+        _writer.drain()
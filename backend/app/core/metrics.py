@@ -0,0 +1,162 @@
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# prometheus_client — необязательная зависимость: без него таймеры ничего не делают, /metrics отвечает 503
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Histogram, generate_latest
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ImportError:
+    REGISTRY = None
+
+# От долей миллисекунды (подсказки, кэш) до секунд (большие пакеты)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+if REGISTRY is not None:
+    REQUEST_LATENCY = Histogram(
+        "http_request_duration_seconds", "Время обработки HTTP-запроса",
+        ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+    )
+    STAGE_LATENCY = Histogram(
+        "search_stage_duration_seconds", "Время этапа поискового конвейера",
+        ["stage", "mode"], buckets=LATENCY_BUCKETS,
+    )
+else:
+    REQUEST_LATENCY = STAGE_LATENCY = None
+
+
+@contextmanager
+def stage(name: str, mode: str = "single", profile: Optional[dict] = None):
+    """Таймер этапа поиска: normalize, candidates, scoring, serialize; mode — single или batch.
+
+    profile — профиль запроса (app/core/profiling.py): время этапа в мс пишется
+    в profile["stages_ms"] и без prometheus_client.
+    """
+    if STAGE_LATENCY is None and profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if STAGE_LATENCY is not None:
+            STAGE_LATENCY.labels(name, mode).observe(elapsed)
+        if profile is not None:
+            stages = profile.setdefault("stages_ms", {})
+            stages[name] = round(stages.get(name, 0.0) + elapsed * 1000, 3)
+
+
+def count(profile: Optional[dict], name: str, n: int = 1):
+    """Счётчик профиля запроса (кандидаты, дома); без профиля ничего не делает"""
+    if profile is not None:
+        profile[name] = profile.get(name, 0) + int(n)
+
+
+class StateCollector:
+    """Показатели, которые читаются в момент запроса /metrics: размер индекса, кэш, очередь поиска"""
+
+    def __init__(self, index_service, cache, executor):
+        self.index_service = index_service
+        self.cache = cache
+        self.executor = executor
+
+    def collect(self):
+        index = self.index_service.index
+        ready = GaugeMetricFamily("index_ready", "1, если индекс загружен")
+        ready.add_metric([], 1.0 if index is not None else 0.0)
+        yield ready
+
+        reloads = CounterMetricFamily("index_reloads", "Перезагрузки индекса", labels=["result"])
+        reloads.add_metric(["success"], self.index_service.reloads)
+        reloads.add_metric(["error"], self.index_service.reload_errors)
+        yield reloads
+
+        if index is not None:
+            # Версия — в метке: на графиках видно, когда реплика перешла на новый датасет
+            info = GaugeMetricFamily("index_version_info", "Активная версия индекса", labels=["version"])
+            info.add_metric([index.version], 1.0)
+            shard_info = GaugeMetricFamily("index_shard_version_info", "Версия шарда индекса",
+                                           labels=["locality", "version"])
+            load = GaugeMetricFamily("index_load_seconds", "Время загрузки индекса")
+            load.add_metric([], self.index_service.load_seconds or 0.0)
+            houses = GaugeMetricFamily("index_houses", "Число домов в шарде", labels=["locality"])
+            streets = GaugeMetricFamily("index_streets", "Число уникальных улиц в шарде", labels=["locality"])
+            size = GaugeMetricFamily("index_bytes", "Размер частей индекса", labels=["locality", "part"])
+            for locality, shard in index.shards.items():
+                shard_info.add_metric([locality, shard.version], 1.0)
+                houses.add_metric([locality], len(shard))
+                streets.add_metric([locality], shard.n_streets)
+                for part, nbytes in shard.memory_usage().items():
+                    size.add_metric([locality, part], nbytes)
+            yield from (info, shard_info, load, houses, streets, size)
+
+        stats = self.cache.stats()
+        hits = CounterMetricFamily("search_cache_hits", "Попадания в кэш поиска", labels=["backend"])
+        hits.add_metric([stats["backend"]], stats["hits"])
+        misses = CounterMetricFamily("search_cache_misses", "Промахи кэша поиска", labels=["backend"])
+        misses.add_metric([stats["backend"]], stats["misses"])
+        ratio = GaugeMetricFamily("search_cache_hit_ratio", "Доля попаданий в кэш поиска", labels=["backend"])
+        ratio.add_metric([stats["backend"]], stats["hit_ratio"])
+        yield from (hits, misses, ratio)
+        if "size" in stats:
+            cache_size = GaugeMetricFamily("search_cache_entries", "Записей в локальном кэше поиска")
+            cache_size.add_metric([], stats["size"])
+            yield cache_size
+
+        pending = GaugeMetricFamily("search_pending", "Запросов поиска в пуле (выполняются и ждут)")
+        pending.add_metric([], self.executor.pending)
+        capacity = GaugeMetricFamily("search_max_pending", "Предел очереди пула поиска")
+        capacity.add_metric([], self.executor.max_pending)
+        yield from (pending, capacity)
+
+
+def register_state(index_service, cache, executor):
+    if REGISTRY is not None:
+        REGISTRY.register(StateCollector(index_service, cache, executor))
+
+
+def render_metrics():
+    """(тело, content-type) в текстовом формате Prometheus"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def route_label(scope) -> str:
+    """Шаблон маршрута для метки: значения параметров пути заменяются именами («/items/{id}»).
+
+    Запросы к несуществующим путям получают одну метку «unmatched» и не размножают ряды.
+    """
+    if "route" not in scope:
+        return "unmatched"
+    path = scope["path"]
+    for name, value in scope.get("path_params", {}).items():
+        path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+    return path
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: гистограмма времени запросов по шаблону маршрута («/api/reverse», а не полный URL)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or REQUEST_LATENCY is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            path = route_label(scope)
+            if path != "/metrics":
+                REQUEST_LATENCY.labels(scope["method"], path, str(status)).observe(time.perf_counter() - started)
@@ -1,21 +1,15 @@
 import json
-import structlog
+import random
+import time
 from urllib.parse import parse_qs
-from fastapi import Request
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-
-structlog.configure(
-    processors=[
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.add_log_level,
-        structlog.processors.format_exc_info,
-        structlog.processors.JSONRenderer(),
-    ]
-)
+
+import structlog
 
 logger = structlog.get_logger()
 
+# Пробы и сбор метрик не пишутся в журнал доступа
+SKIP_PATHS = frozenset({"/metrics", "/health/live", "/health/ready"})
+
 
 def parse_body(body: bytes):
     if not body:
@@ -43,34 +37,70 @@ def parse_body(body: bytes):
     return {"raw": text}
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        raw = await request.body()
-        body_bytes = bytes(raw)
-        request_body = parse_body(body_bytes)
-        request.state._body = body_bytes
-
-        query_params = dict(request.query_params)
-        path_params = dict(request.path_params)
-
-        response = await call_next(request)
-
-        response_body = None
-        if isinstance(response, JSONResponse):
-            response_body = parse_body(bytes(response.body))
-
-        if request.url.path == "/metrics":
-            return response
-
-        logger.info(
-            "request_completed",
-            method=request.method,
-            path=request.url.path,
-            status=response.status_code,
-            path_params=path_params or None,
-            query_params=query_params or None,
-            request_body=request_body,
-            response_body=response_body,
-        )
-
-        return response
+def _truncate(body: bytearray, limit: int):
+    """Тело для журнала: разобранное, если поместилось в limit, иначе начало строкой"""
+    if len(body) <= limit:
+        return parse_body(bytes(body))
+    return {"raw": bytes(body[:limit]).decode("utf-8", errors="replace"), "truncated": True}
+
+
+class AccessLogMiddleware:
+    """ASGI-middleware журнала доступа: одна строка на запрос, без буферизации тела.
+
+    sample_rate — доля успешных запросов, попадающих в журнал; ответы с
+    кодом >= 400 пишутся всегда. При capture_bodies тела запроса и ответа
+    копируются по мере прохождения (не больше body_limit байт) и только для
+    запросов, выбранных в выборку. Сама запись не блокирует event loop —
+    строки уходят в очередь QueuedWriter (app/core/logging.py).
+    """
+
+    def __init__(self, app, sample_rate: float = 1.0, capture_bodies: bool = False, body_limit: int = 2048):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.capture_bodies = capture_bodies
+        self.body_limit = body_limit
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+        capture = sampled and self.capture_bodies
+        status = 500
+        request_body, response_body = bytearray(), bytearray()
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request" and len(request_body) <= self.body_limit:
+                request_body.extend(message.get("body", b"")[:self.body_limit + 1 - len(request_body)])
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif capture and message["type"] == "http.response.body" and len(response_body) <= self.body_limit:
+                response_body.extend(message.get("body", b"")[:self.body_limit + 1 - len(response_body)])
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper if capture else receive, send_wrapper)
+        finally:
+            if sampled or status >= 400:
+                event = {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                }
+                if scope.get("query_string"):
+                    event["query"] = scope["query_string"].decode("latin-1")
+                if capture:
+                    event["request_body"] = _truncate(request_body, self.body_limit)
+                    event["response_body"] = _truncate(response_body, self.body_limit)
+                if status >= 500:
+                    logger.error("request_completed", **event)
+                else:
+                    logger.info("request_completed", **event)
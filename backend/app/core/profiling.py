@@ -0,0 +1,122 @@
+import glob
+import hmac
+import json
+import os
+import random
+import time
+from typing import Optional
+
+from app.core.config import configs
+from app.core.exceptions import AuthError
+from app.core.logging import QueuedWriter
+
+
+def require_profiling(x_admin_token: Optional[str]):
+    """?debug=1 разрешён всем при SEARCH_PROFILING=1, иначе — только с X-Admin-Token"""
+    if configs.SEARCH_PROFILING:
+        return
+    if configs.ADMIN_TOKEN and x_admin_token and hmac.compare_digest(x_admin_token, configs.ADMIN_TOKEN):
+        return
+    raise AuthError(detail="Search profiling is disabled: set SEARCH_PROFILING=1 or pass X-Admin-Token")
+
+
+class RotatingFile:
+    """Файл для QueuedWriter с ротацией по размеру: path, path.1, ..., path.<backups>"""
+
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def write(self, text: str):
+        # QueuedWriter пишет пачку строк разом: размер проверяется по строкам, чтобы файл не вырос сверх max_bytes
+        for line in text.splitlines(keepends=True):
+            size = len(line.encode("utf-8"))
+            if self.max_bytes > 0 and self._file.tell() and self._file.tell() + size > self.max_bytes:
+                self._rotate()
+            self._file.write(line)
+
+    def flush(self):
+        self._file.flush()
+
+
+def log_files(path: str) -> list:
+    """Файлы журнала от старых к новым: path.<n>, ..., path.1, path"""
+    backups = [name for name in glob.glob(glob.escape(path) + ".*") if name.rsplit(".", 1)[1].isdigit()]
+    backups.sort(key=lambda name: int(name.rsplit(".", 1)[1]), reverse=True)
+    return backups + ([path] if os.path.exists(path) else [])
+
+
+class SlowQueryLog:
+    """Журнал медленных запросов: JSON-строка с профилем на запрос дольше threshold_ms.
+
+    В журнал попадает доля sample_rate медленных запросов. Запись идёт через
+    QueuedWriter и не блокирует event loop; файл ротируется по размеру.
+    Журнал проигрывается заново через benchmarks.slow_queries.
+    """
+
+    def __init__(self, path: str = "", threshold_ms: float = 100.0, sample_rate: float = 1.0,
+                 max_bytes: int = 10 * 1024 * 1024, backups: int = 5, queue_size: int = 10000):
+        self.path = path
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.queue_size = queue_size
+        self.written = 0
+        self._writer = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def should_log(self, duration_ms: float) -> bool:
+        if not self.enabled or duration_ms < self.threshold_ms:
+            return False
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def record(self, event: dict):
+        if self._writer is None:
+            self._writer = QueuedWriter(RotatingFile(self.path, self.max_bytes, self.backups), self.queue_size)
+        event = {"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), **event}
+        self._writer.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+        self.written += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold_ms,
+            "written": self.written,
+            "dropped": self._writer.dropped if self._writer is not None else 0,
+        }
+
+    def flush(self):
+        if self._writer is not None:
+            self._writer.drain()
+
+
+slow_query_log = SlowQueryLog(
+    path=configs.SLOW_QUERY_LOG_PATH,
+    threshold_ms=configs.SLOW_QUERY_MS,
+    sample_rate=configs.SLOW_QUERY_SAMPLE_RATE,
+    max_bytes=configs.SLOW_QUERY_LOG_MAX_BYTES,
+    backups=configs.SLOW_QUERY_LOG_BACKUPS,
+    queue_size=configs.LOG_QUEUE_SIZE,
+)
+
+
+def get_slow_query_log() -> SlowQueryLog:
+    return slow_query_log
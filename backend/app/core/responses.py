@@ -0,0 +1,69 @@
+import json
+from typing import Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from app.core.config import configs
+
+# orjson — необязательная зависимость: без него ответы кодируются стандартным json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Заголовок ответа с версией индекса, на которой он посчитан
+INDEX_VERSION_HEADER = "X-Index-Version"
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON-ответ без повторной валидации через response_model.
+
+    Результаты поиска уже собраны из индекса в нужном виде, поэтому endpoint
+    возвращает их готовым ответом: схема остаётся только для OpenAPI.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def index_etag(version: str) -> str:
+    """ETag ответа — версия индекса: пока она та же, ответ на тот же URL не меняется.
+
+    Слабый (W/), потому что тело может прийти сжатым.
+    """
+    return f'W/"{version}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match содержит etag (слабое сравнение) или *"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def cache_headers(version: str, max_age: int = configs.HTTP_CACHE_MAX_AGE) -> dict:
+    headers = {INDEX_VERSION_HEADER: version, "ETag": index_etag(version)}
+    if max_age > 0:
+        headers["Cache-Control"] = f"public, max-age={max_age}"
+    return headers
+
+
+def not_modified(request: Request, version: str, max_age: int = configs.HTTP_CACHE_MAX_AGE) -> Optional[Response]:
+    """Ответ 304, если у клиента (или CDN) ответ той же версии индекса; поиск тогда не запускается"""
+    if not etag_matches(request, index_etag(version)):
+        return None
+    return Response(status_code=304, headers=cache_headers(version, max_age))
+
+
+def cached_json(content, version: str, max_age: int = configs.HTTP_CACHE_MAX_AGE) -> FastJSONResponse:
+    """Готовый JSON-ответ GET-запроса с ETag и Cache-Control по версии индекса"""
+    return FastJSONResponse(content, headers=cache_headers(version, max_age))
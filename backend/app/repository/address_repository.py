@@ -1,12 +1,16 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import Optional, List
+from sqlalchemy import insert, select
+from typing import AsyncIterator, Iterable, Optional, List
 from fastapi import Depends
 
+from app.core.config import configs
 from app.core.database import get_session
 from app.model.address import AddressModel
 from app.schema.address import Address, AddressCreate
 
+# id в одном WHERE id IN (...): у asyncpg не больше 32767 параметров на запрос
+GET_MANY_CHUNK_SIZE = 10000
+
 class AddressRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -14,14 +18,57 @@ class AddressRepository:
     async def get_by_id(self, idx: int) -> Optional[Address]:
         result = await self.session.execute(select(AddressModel).where(AddressModel.id == idx))
         addressModel = result.scalar_one_or_none()
+        if addressModel is None:
+            return None
         address = Address.model_validate(addressModel)
         return address
 
+    async def get_many(self, ids: Iterable[int]) -> List[Address]:
+        """Адреса по списку id в порядке ids за один запрос на GET_MANY_CHUNK_SIZE id; отсутствующие пропускаются"""
+        ids = list(ids)
+        found = {}
+        unique = list(dict.fromkeys(ids))
+        for start in range(0, len(unique), GET_MANY_CHUNK_SIZE):
+            chunk = unique[start:start + GET_MANY_CHUNK_SIZE]
+            result = await self.session.execute(select(AddressModel).where(AddressModel.id.in_(chunk)))
+            for addressModel in result.scalars():
+                found[addressModel.id] = Address.model_validate(addressModel)
+        return [found[idx] for idx in ids if idx in found]
+
     async def get_all(self) -> List[Address]:
+        """Вся таблица одним списком; для выгрузки и переиндексации — iter_chunks/stream"""
         result = await self.session.execute(select(AddressModel))
         addresses = [Address.model_validate(i) for i in result.scalars().all()]
         return addresses
 
+    async def iter_chunks(self, chunk_size: int = configs.DB_FETCH_SIZE, after_id: int = 0,
+                          locality: Optional[str] = None) -> AsyncIterator[List[Address]]:
+        """Таблица по возрастанию id страницами по chunk_size (keyset: WHERE id > последний id).
+
+        Каждая страница — отдельный короткий запрос: память не растёт с размером
+        таблицы, соединение не держит открытый курсор между страницами, а
+        добавленные во время чтения строки попадают в выдачу, если их id больше текущего.
+        locality — только адреса этого населённого пункта.
+        """
+        # Строки таблицы, а не ORM-объекты: они не копятся в identity map сессии
+        table = AddressModel.__table__
+        while True:
+            query = select(table).where(table.c.id > after_id)
+            if locality is not None:
+                query = query.where(table.c.localy == locality)
+            result = await self.session.execute(query.order_by(table.c.id).limit(chunk_size))
+            chunk = [Address.model_validate(row) for row in result]
+            if not chunk:
+                return
+            yield chunk
+            after_id = chunk[-1].id
+
+    async def stream(self, chunk_size: int = configs.DB_FETCH_SIZE) -> AsyncIterator[Address]:
+        """Адреса по одному по возрастанию id, читаются страницами iter_chunks"""
+        async for chunk in self.iter_chunks(chunk_size):
+            for address in chunk:
+                yield address
+
     async def create(self, address_create: AddressCreate) -> Address:
         try:
             addressModel = AddressModel(
@@ -41,5 +88,19 @@ class AddressRepository:
             await self.session.rollback()
             raise e
 
+    async def bulk_create(self, addresses_create: List[AddressCreate]) -> List[Address]:
+        """Многострочный INSERT ... RETURNING и один commit на весь пакет"""
+        if not addresses_create:
+            return []
+        rows = [a.model_dump(exclude={"embedding"}) for a in addresses_create]
+        try:
+            result = await self.session.execute(insert(AddressModel).returning(AddressModel.id, sort_by_parameter_order=True), rows)
+            ids = result.scalars().all()
+            await self.session.commit()
+        except Exception as e:
+            await self.session.rollback()
+            raise e
+        return [Address(id=idx, **row) for idx, row in zip(ids, rows)]
+
 def get_address_repo(session: AsyncSession = Depends(get_session)) -> AddressRepository:
     return AddressRepository(session)
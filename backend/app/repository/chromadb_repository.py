@@ -1,31 +1,36 @@
-import chromadb
-from typing import List
+import asyncio
+from typing import List, Optional
 from fastapi import Depends
 from app.core.database import get_chroma
+from app.core.embeddings import encode
 
 class ChromaRepository:
-    def __init__(self, collection: chromadb.Collection):
+    def __init__(self, collection):
         self.collection = collection
 
-    async def add(self, ids: List[str], texts: List[str], embedding: List[float]):
-        self.collection.add(ids=ids, documents=texts, embeddings=embedding)
+    async def add(self, ids: List[str], texts: List[str], embedding: List[List[float]],
+                  metadatas: Optional[List[dict]] = None):
+        if not ids:
+            return
+        await asyncio.to_thread(
+            self.collection.upsert, ids=ids, documents=texts, embeddings=embedding, metadatas=metadatas
+        )
 
     async def query(self, search_address: str, n_results: int):
-        MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-        model = SentenceTransformer(MODEL_NAME)
-        emb = model.encode(
-               search_address,
-               convert_to_numpy=False,   # возвращает torch.Tensor
-           )
-        emb_list = emb.tolist()
+        emb_list = (await asyncio.to_thread(encode, [search_address]))[0]
+        return await self.query_embedding(emb_list, n_results)
 
-        result = self.collection.query(
-            query_embeddings=[emb_list],
+    async def query_embedding(self, embedding: List[float], n_results: int):
+        result = await asyncio.to_thread(
+            self.collection.query,
+            query_embeddings=[embedding],
             n_results=n_results,
+            include=["distances", "metadatas"],
         )
         ids = result["ids"][0]
         distances = result["distances"][0]
-        return (ids, distances)
+        metadatas = result["metadatas"][0]
+        return (ids, distances, metadatas)
 
-def get_chroma_repo(coll: chromadb.Collection = Depends(get_chroma)) -> ChromaRepository:
+def get_chroma_repo(coll=Depends(get_chroma)) -> ChromaRepository:
     return ChromaRepository(coll)
@@ -1,5 +1,21 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
+
+class AddressBase(BaseModel):
+    node_id: int
+    localy: str
+    street: str
+    number: str
+    lat: float
+    lon: float
+
+class AddressCreate(AddressBase):
+    embedding: Optional[List[float]] = None
+
+class Address(AddressBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
 
 class SearchObject(BaseModel):
     locality: str
@@ -12,3 +28,40 @@ class SearchObject(BaseModel):
 class SearchResponse(BaseModel):
     searched_address: str
     objects: List[SearchObject]
+    profile: Optional[dict] = None
+
+class BatchSearchResponse(BaseModel):
+    results: List[SearchResponse]
+
+class ReverseObject(BaseModel):
+    locality: str
+    street: str
+    number: str
+    lon: float
+    lat: float
+    distance: float
+
+class ReverseResponse(BaseModel):
+    lat: float
+    lon: float
+    objects: List[ReverseObject]
+
+class Point(BaseModel):
+    lat: float
+    lon: float
+
+class BatchReverseResponse(BaseModel):
+    results: List[ReverseResponse]
+
+class Suggestion(BaseModel):
+    text: str
+    locality: str
+    street: str
+    number: Optional[str] = None
+    lon: Optional[float] = None
+    lat: Optional[float] = None
+
+class SuggestResponse(BaseModel):
+    query: str
+    suggestions: List[Suggestion]
+    debounce_ms: int
@@ -1,87 +1,127 @@
-from typing import List
+import asyncio
+from typing import List, Optional
 from fastapi import Depends
 import Levenshtein
+import numpy as np
+from app.core.config import configs
+from app.core.embeddings import address_text, encode
 from app.repository.address_repository import AddressRepository, get_address_repo
 from app.repository.chromadb_repository import ChromaRepository, get_chroma_repo
 from app.schema.address import AddressCreate, Address, SearchResponse, SearchObject
-import re
-from app.utils.model import search_address_single
-
-street_types = {
-    "ул": "улица",
-    "ул.": "улица",
-    "пер": "переулок",
-    "пер.": "переулок",
-    "пр-т": "проспект",
-    "пр.": "проспект",
-    "ш": "шоссе",
-    "бул": "бульвар",
-    "пл": "площадь"
-}
-
-
-def normalize_address(raw_address: str, default_city="Москва") -> str:
-    # Нижний регистр и удаление лишних символов
-    addr = raw_address.lower()
-    addr = re.sub(r"[.,]", "", addr)
-    addr = re.sub(r"\s+", " ", addr).strip()
-
-    # Ищем номер дома, корпуса и строения
-    house_match = re.search(r"(\d+\s*[кс]?\d*)$", addr)
-    house_part = house_match.group(1).strip() if house_match else ""
-
-    # Убираем дом/корпус из основной строки
-    street_part = addr[:house_match.start()].strip() if house_match else addr
-
-    # Раскрываем сокращения улиц
-    for abbr, full in street_types.items():
-        street_part = re.sub(r"\b" + re.escape(abbr) + r"\b", full, street_part)
-
-    # Приведение порядка слов: тип улицы в конце
-    street_words = street_part.split()
-    # Если первый элемент — тип улицы, перемещаем в конец
-    if street_words and street_words[0] in street_types.values():
-        street_words = street_words[1:] + [street_words[0]]
-    street_part = " ".join(word.capitalize() for word in street_words)
-
-    # Собираем нормализованную строку
-    normalized = f"{default_city}, {street_part}"
-    if house_part:
-        normalized += f", {house_part}"
-
-    return normalized
+from app.services.search_service import SearchService, get_search_service
+from app.utils.model import calculate_levenshtein_score, parse_query
+from app.utils.normalize import normalize_address, normalize_street
+
 
 def compute_score(pred: str, true: str) -> float:
+    """Сходство найденного и эталонного адреса после нормализации: 1 - расстояние Левенштейна / длина"""
     pred_norm = normalize_address(pred)
     true_norm = normalize_address(true)
-    print(pred_norm)
-    print(true_norm)
     distance = Levenshtein.distance(pred_norm, true_norm)
     score = 1 - distance / max(len(pred_norm), len(true_norm))
     return max(0, score)
 
+def address_metadata(address: Address) -> dict:
+    """Метаданные вектора в Chroma: по ним гибридный поиск собирает ответ без запроса к БД"""
+    return {"locality": address.localy, "street": address.street, "number": address.number,
+            "lat": address.lat, "lon": address.lon}
+
+
+async def index_vectors(chroma_repo: ChromaRepository, addresses: List[Address],
+                        embedding: Optional[List[Optional[List[float]]]] = None):
+    """Добавляет адреса в векторный индекс одним вызовом; недостающие эмбеддинги — одним пакетом модели"""
+    ids = [str(a.id) for a in addresses]
+    texts = [address_text(a.localy, a.street, a.number) for a in addresses]
+    metadatas = [address_metadata(a) for a in addresses]
+    embedding = list(embedding) if embedding else [None] * len(addresses)
+
+    missing = [i for i, emb in enumerate(embedding) if emb is None]
+    if missing:
+        encoded = await asyncio.to_thread(encode, [texts[i] for i in missing])
+        for i, emb in zip(missing, encoded):
+            embedding[i] = emb
+    await chroma_repo.add(ids, texts, embedding, metadatas)
+
+
+def fuse_scores(fuzzy_score: float, semantic_score: float, alpha: float = configs.HYBRID_ALPHA) -> float:
+    """Слияние rapidfuzz-оценки адреса и косинусной близости эмбеддингов"""
+    return alpha * fuzzy_score + (1 - alpha) * semantic_score
+
+
 class AddressService:
 
-    def __init__(self, address_repo: AddressRepository, chroma_repo: ChromaRepository):
+    def __init__(self, address_repo: AddressRepository, chroma_repo: ChromaRepository, search_service: SearchService):
         self.address_repo = address_repo
         self.chroma_repo = chroma_repo
+        self.search_service = search_service
 
     async def save(self, addresses: List[AddressCreate]):
-        ids = []
-        texts = []
-        embedding = []
-        for address in addresses:
-            addressDB = await self.address_repo.create(address)
-            ids.append(str(addressDB.id))
-            texts.append(addressDB.localy+" "+addressDB.street+ " " + addressDB.number)
-            embedding.append(address.embedding)
-        await self.chroma_repo.add(ids, texts, embedding)
-
-    async def search(self, search: str, n_results=5):
-        res = search_address_single("addresses_full.csv", search, top_n=3)
-        return res
+        created = await self.address_repo.bulk_create(addresses)
+        await index_vectors(self.chroma_repo, created, [address.embedding for address in addresses])
+        return created
+
+    async def search(self, search: str, n_results=3, locality: Optional[str] = None):
+        """Гибридный поиск: кандидаты rapidfuzz и ближайшие соседи по эмбеддингам.
+
+        Для объединения кандидатов считаются обе оценки — calculate_levenshtein_score
+        по нормализованной улице и дому и косинусная близость к запросу, — и
+        итоговый score — их взвешенная сумма (HYBRID_ALPHA).
+        """
+        query_embedding = (await asyncio.to_thread(encode, [search]))[0]
+        fuzzy, (ids, distances, metadatas) = await asyncio.gather(
+            self.search_service.search(search, top_n=n_results * 5, locality=locality),
+            self.chroma_repo.query_embedding(query_embedding, n_results * 5),
+        )
+
+        candidates = {}
+        for obj in fuzzy["objects"]:
+            candidates[(obj["locality"], obj["street"], obj["number"])] = dict(obj)
+        # Векторы без метаданных (записанные не через index_vectors) — одним запросом к БД
+        bare = [int(idx) for idx, meta in zip(ids, metadatas) if not meta]
+        if bare:
+            resolved = {str(a.id): address_metadata(a) for a in await self.address_repo.get_many(bare)}
+            metadatas = [meta or resolved.get(idx) for idx, meta in zip(ids, metadatas)]
+
+        semantic = {}
+        for meta, distance in zip(metadatas, distances):
+            if meta is None:
+                continue
+            if locality and meta.get("locality") != locality:
+                continue
+            key = (meta["locality"], meta["street"], meta["number"])
+            semantic[key] = 1 - distance
+            candidates.setdefault(key, {
+                "locality": meta["locality"],
+                "street": meta["street"],
+                "number": meta["number"],
+                "lon": float(meta["lon"]),
+                "lat": float(meta["lat"]),
+            })
+
+        # Близость для кандидатов rapidfuzz, которых нет среди соседей, — одним пакетом
+        unscored = [key for key in candidates if key not in semantic]
+        if unscored:
+            vectors = await asyncio.to_thread(encode, [address_text(*key) for key in unscored])
+            query_vector = np.asarray(query_embedding)
+            for key, vector in zip(unscored, vectors):
+                semantic[key] = float(np.dot(query_vector, vector))
+
+        street_query_norm, query_house = parse_query(search)
+        results = []
+        for key, obj in candidates.items():
+            street_norm = normalize_street(obj["street"])
+            fuzzy_score = calculate_levenshtein_score(street_query_norm, street_norm, query_house, obj["number"])
+            obj["score"] = fuse_scores(fuzzy_score, semantic[key])
+            results.append(obj)
+
+        results.sort(key=lambda x: x["score"], reverse=True)
+        return {
+            "searched_address": search,
+            "objects": results[:n_results]
+        }
 
 def get_address_service(
         address_repo: AddressRepository = Depends(get_address_repo),
-        chroma_repo: ChromaRepository = Depends(get_chroma_repo)) -> AddressService:
-    return AddressService(address_repo, chroma_repo)
+        chroma_repo: ChromaRepository = Depends(get_chroma_repo),
+        search_service: SearchService = Depends(get_search_service)) -> AddressService:
+    return AddressService(address_repo, chroma_repo, search_service)
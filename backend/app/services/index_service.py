@@ -0,0 +1,201 @@
+import asyncio
+import os
+import time
+from typing import List, Optional
+
+import structlog
+
+from app.core.config import configs
+from app.core.exceptions import ConflictError, ServiceUnavailableError, ValidationError
+from app.utils.disk_index import DiskIndex, is_disk_index
+from app.utils.model import apply_delta, dataset_version, read_delta
+from app.utils.shards import ShardedIndex, close_retired, open_shards
+from app.utils.snapshot import is_snapshot, snapshot_mtime
+
+logger = structlog.get_logger()
+
+
+class IndexService:
+    """Держит поисковый индекс процесса (шарды по населённым пунктам) и состояние его загрузки.
+
+    Перезагрузка строит новый индекс в отдельном потоке и подменяет ссылку self.index
+    одним присваиванием: запросы, уже получившие индекс через get_index(), дорабатывают
+    на старой версии, новые получают новую.
+    """
+
+    def __init__(self, shard_specs: List[tuple]):
+        self.shard_specs = shard_specs
+        self.index: Optional[ShardedIndex] = None
+        self.load_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.reloads = 0
+        self.reload_errors = 0
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._fingerprint = None
+
+    @property
+    def ready(self) -> bool:
+        return self.index is not None
+
+    @property
+    def reloading(self) -> bool:
+        return self._lock.locked()
+
+    def fingerprint(self) -> tuple:
+        """Отпечаток источников индекса: файл дискового индекса, meta.json снапшота или файл датасета по каждому шарду"""
+        parts = []
+        for locality, dataset_path, snapshot_path in self.shard_specs:
+            if is_disk_index(snapshot_path):
+                parts.append((locality, os.stat(snapshot_path).st_mtime_ns if os.path.isfile(snapshot_path) else None))
+            elif is_snapshot(snapshot_path):
+                parts.append((locality, snapshot_mtime(snapshot_path)))
+            elif os.path.isfile(dataset_path):
+                parts.append((locality, dataset_version(dataset_path)))
+            else:
+                parts.append((locality, None))
+        return tuple(parts)
+
+    def load(self) -> ShardedIndex:
+        started = time.perf_counter()
+        fingerprint = self.fingerprint()
+        try:
+            index, sources = open_shards(self.shard_specs, configs.CANDIDATE_LIMIT)
+        except Exception as e:
+            self.error = str(e)
+            logger.exception("index_load_failed", shards=self.shard_specs)
+            raise
+
+        self.load_seconds = time.perf_counter() - started
+        self.loaded_at = time.time()
+        self._fingerprint = fingerprint
+        self.index = index
+        self.error = None
+        for locality, shard in index.shards.items():
+            logger.info("index_shard_loaded", locality=locality, dataset=sources[locality],
+                        streets=shard.n_streets, houses=len(shard), version=shard.version)
+        logger.info(
+            "index_loaded",
+            shards=len(index.shards),
+            load_seconds=round(self.load_seconds, 3),
+            streets=index.n_streets,
+            houses=len(index),
+            version=index.version,
+        )
+        return index
+
+    async def load_async(self) -> ShardedIndex:
+        """Загрузка в отдельном потоке, чтобы не блокировать event loop"""
+        return await asyncio.to_thread(self.load)
+
+    async def reload(self) -> ShardedIndex:
+        """Пересобирает индекс из текущих файлов и атомарно подменяет его.
+
+        При ошибке сборки продолжает работать прежний индекс.
+        """
+        if self._lock.locked():
+            raise ConflictError(detail="Index reload is already in progress")
+        async with self._lock:
+            previous = self.index
+            try:
+                index = await self.load_async()
+            except Exception:
+                self.reload_errors += 1
+                raise
+            self.reloads += 1
+            # Соединения старого дискового индекса закрываются, как только его дорабатывающие запросы завершатся
+            close_retired(previous, index)
+            logger.info("index_reloaded", previous_version=previous.version if previous else None,
+                        version=index.version)
+            return index
+
+    async def apply_delta(self, locality: str, path: str) -> ShardedIndex:
+        """Применяет файл изменений к шарду locality без чтения исходного CSV.
+
+        Изменения живут до следующей полной перезагрузки или рестарта — в датасет
+        и снапшот они не записываются.
+        """
+        current = self.get_index()
+        try:
+            [name] = current.select(locality)
+        except KeyError:
+            raise ValidationError(detail=f"Unknown locality: {locality}. Available: {', '.join(current.localities)}")
+        if isinstance(current.shards[name], DiskIndex):
+            raise ValidationError(detail=f"Deltas are not supported for disk index of {name}: rebuild it")
+        if self._lock.locked():
+            raise ConflictError(detail="Index reload is already in progress")
+
+        async with self._lock:
+            current = self.index
+            started = time.perf_counter()
+            try:
+                delta = await asyncio.to_thread(read_delta, path)
+            except ValueError as e:
+                raise ValidationError(detail=str(e))
+            try:
+                shard = await asyncio.to_thread(apply_delta, current.shards[name], delta)
+            except Exception:
+                self.reload_errors += 1
+                logger.exception("index_delta_failed", locality=name)
+                raise
+
+            index = ShardedIndex({**current.shards, name: shard})
+            self.index = index
+            self.reloads += 1
+            self.loaded_at = time.time()
+            logger.info("index_delta_applied", locality=name, rows=len(delta), houses=len(shard),
+                        previous_version=current.version, version=index.version,
+                        seconds=round(time.perf_counter() - started, 3))
+            return index
+
+    async def watch(self, interval: float, on_reload=None):
+        """Раз в interval секунд сверяет отпечаток источников и перезагружает индекс при изменении"""
+        while True:
+            await asyncio.sleep(interval)
+            if self._fingerprint is None or self._lock.locked():
+                continue
+            try:
+                fingerprint = await asyncio.to_thread(self.fingerprint)
+            except OSError:
+                continue  # файл переписывается прямо сейчас
+            if fingerprint == self._fingerprint:
+                continue
+
+            logger.info("index_source_changed", shards=[locality for locality, _ in fingerprint])
+            try:
+                await self.reload()
+            except Exception:
+                # Ошибка уже залогирована; следующая попытка — после следующего изменения файлов
+                self._fingerprint = fingerprint
+                continue
+            if on_reload is not None:
+                on_reload()
+
+    def status(self) -> dict:
+        index = self.index
+        return {
+            "ready": index is not None,
+            "reloading": self.reloading,
+            "version": index.version if index is not None else None,
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "error": self.error,
+            "shards": {
+                locality: {"streets": shard.n_streets, "houses": len(shard), "version": shard.version}
+                for locality, shard in index.shards.items()
+            } if index is not None else {},
+        }
+
+    def get_index(self) -> ShardedIndex:
+        if self.index is None:
+            raise ServiceUnavailableError(detail="Index is not loaded yet", headers={"Retry-After": "5"})
+        return self.index
+
+
+index_service = IndexService(configs.dataset_shards())
+
+
+def get_index_service() -> IndexService:
+    return index_service
@@ -0,0 +1,233 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Iterator, List, Optional, Tuple
+
+import pandas as pd
+import pydantic
+import structlog
+from fastapi import Depends
+
+from app.core.config import configs
+from app.core.database import async_session_maker, get_collection
+from app.core.exceptions import ValidationError
+from app.repository.address_repository import AddressRepository, get_address_repo
+from app.repository.chromadb_repository import ChromaRepository
+from app.schema.address import AddressCreate
+from app.services.address_service import index_vectors
+from app.utils.disk_index import DiskIndexWriter
+from app.utils.model import addresses_frame, preprocess_dataframe
+
+logger = structlog.get_logger()
+
+INGEST_FORMATS = ("csv", "ndjson")
+
+
+def csv_row_to_address(row: dict, locality: str) -> AddressCreate:
+    """Строка выгрузки OSM (как buildings_cleaned.csv) -> AddressCreate"""
+    node_id = row.get("@id")
+    city = row.get("addr:city")
+    return AddressCreate(
+        node_id=int(node_id) if not pd.isna(node_id) else 0,
+        localy=city if isinstance(city, str) and city else locality,
+        street=str(row["addr:street"]),
+        number=str(row["addr:housenumber"]),
+        lat=float(row["@lat"]),
+        lon=float(row["@lon"]),
+    )
+
+
+def row_error(line: int, error: Exception) -> ValidationError:
+    """422 с номером строки файла (с 1, у CSV строка 1 — заголовок)"""
+    if isinstance(error, pydantic.ValidationError):
+        reason = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+    else:
+        reason = str(error)
+    return ValidationError(detail=f"Line {line}: {reason}")
+
+
+def read_chunks(path: str, fmt: str, chunk_size: int, locality: str,
+                skip: int = 0) -> Iterator[Tuple[int, List[AddressCreate]]]:
+    """Читает файл кусками по chunk_size строк, пропуская первые skip.
+
+    Отдаёт (число прочитанных строк источника, адреса куска): строки без
+    улицы, номера или координат пропускаются, но учитываются в checkpoint.
+    Битая строка (не JSON, не проходит валидацию) — ValidationError с её номером;
+    куски до неё к этому моменту уже отданы.
+    """
+    if fmt == "csv":
+        reader = pd.read_csv(
+            path, sep=";", chunksize=chunk_size, skiprows=range(1, skip + 1), dtype={"addr:housenumber": str}
+        )
+        try:
+            for frame in reader:
+                valid = frame.dropna(subset=["addr:street", "addr:housenumber", "@lat", "@lon"])
+                chunk = []
+                # Индекс кадра — номер строки данных после пропущенных skip
+                for row_no, row in zip(valid.index, valid.to_dict("records")):
+                    try:
+                        chunk.append(csv_row_to_address(row, locality))
+                    except (pydantic.ValidationError, ValueError) as e:
+                        raise row_error(skip + row_no + 2, e)
+                yield len(frame), chunk
+        except pd.errors.ParserError as e:
+            raise ValidationError(detail=f"Malformed CSV: {e}")
+        return
+
+    chunk, lines = [], 0
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f):
+            if line_no < skip:
+                continue
+            lines += 1
+            if line.strip():
+                try:
+                    item = json.loads(line)
+                    if not isinstance(item, dict):
+                        raise ValueError("expected a JSON object")
+                    item.setdefault("localy", locality)
+                    chunk.append(AddressCreate.model_validate(item))
+                except (pydantic.ValidationError, ValueError) as e:
+                    raise row_error(line_no + 1, e)
+            if lines >= chunk_size:
+                yield lines, chunk
+                chunk, lines = [], 0
+    if lines:
+        yield lines, chunk
+
+
+class Checkpoint:
+    """Сколько строк источника уже загружено; файл перезаписывается атомарно"""
+
+    def __init__(self, path: Optional[str], source: str):
+        self.path = path
+        self.source = source
+        self.rows = 0
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("source") == source:
+                self.rows = int(state.get("rows", 0))
+
+    def save(self, rows: int):
+        self.rows = rows
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"source": self.source, "rows": rows}, f)
+        os.replace(tmp_path, self.path)
+
+
+_disk_index_lock = asyncio.Lock()
+
+
+class IngestService:
+    """Потоковая массовая загрузка адресов: пакетные INSERT и пакетная запись векторов.
+
+    Каждый кусок коммитится отдельно, после чего обновляется checkpoint, поэтому
+    прерванную загрузку можно продолжить с того же места (последний незафиксированный
+    в checkpoint кусок может быть вставлен повторно). Checkpoint — только для ingest.py:
+    /api/addresses/bulk грузит тело запроса из временного файла и без checkpoint.
+    """
+
+    def __init__(self, address_repo: AddressRepository, chroma_repo=None):
+        self.address_repo = address_repo
+        self.chroma_repo = chroma_repo
+
+    async def ingest(self, path: str, fmt: str = "csv", locality: str = configs.DEFAULT_LOCALITY,
+                     chunk_size: int = configs.INGEST_CHUNK_SIZE, checkpoint_path: Optional[str] = None,
+                     progress=None) -> dict:
+        if fmt not in INGEST_FORMATS:
+            raise ValidationError(detail=f"Unknown format: {fmt}. Expected one of {', '.join(INGEST_FORMATS)}")
+
+        checkpoint = Checkpoint(checkpoint_path, os.path.abspath(path))
+        started = time.perf_counter()
+        resumed_from = rows = checkpoint.rows
+        inserted = 0
+
+        chunks = read_chunks(path, fmt, chunk_size, locality, skip=checkpoint.rows)
+        while True:
+            # Разбор файла — синхронный, поэтому очередной кусок читается в потоке
+            item = await asyncio.to_thread(next, chunks, None)
+            if item is None:
+                break
+            source_rows, chunk = item
+
+            created = await self.address_repo.bulk_create(chunk)
+            if self.chroma_repo is not None:
+                await index_vectors(self.chroma_repo, created, [a.embedding for a in chunk])
+
+            rows += source_rows
+            inserted += len(created)
+            checkpoint.save(rows)
+
+            elapsed = time.perf_counter() - started
+            logger.info("ingest_progress", source=path, rows=rows, inserted=inserted,
+                        rows_per_second=round(inserted / elapsed, 1) if elapsed else None)
+            if progress is not None:
+                progress(rows, inserted)
+
+        return {
+            "source": path,
+            "resumed_from": resumed_from,
+            "rows": rows,
+            "inserted": inserted,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    async def reindex_vectors(self, chunk_size: int = configs.DB_FETCH_SIZE, progress=None) -> dict:
+        """Переписывает векторный индекс по таблице адресов.
+
+        Таблица читается страницами (iter_chunks), каждая сразу кодируется и пишется
+        в Chroma — память не зависит от числа адресов.
+        """
+        if self.chroma_repo is None:
+            raise ValidationError(detail="Vector index is disabled: set SEMANTIC_ENABLED=1")
+
+        started = time.perf_counter()
+        indexed = 0
+        async for chunk in self.address_repo.iter_chunks(chunk_size):
+            await index_vectors(self.chroma_repo, chunk)
+            indexed += len(chunk)
+            logger.info("reindex_progress", indexed=indexed, last_id=chunk[-1].id)
+            if progress is not None:
+                progress(indexed)
+
+        return {"indexed": indexed, "seconds": round(time.perf_counter() - started, 3)}
+
+    async def build_disk_index(self, path: str = configs.SQLITE_INDEX_PATH,
+                               locality: Optional[str] = configs.DEFAULT_LOCALITY,
+                               chunk_size: int = configs.DB_FETCH_SIZE) -> dict:
+        """Собирает дисковый индекс (SEARCH_ENGINE=sqlite) по таблице адресов.
+
+        Таблица читается страницами (iter_chunks) и пишется в DiskIndexWriter, версия
+        индекса — отпечаток прочитанных строк. Готовый файл подменяет path атомарно.
+        """
+        started = time.perf_counter()
+        # Сборки пишут в один и тот же path + ".tmp" — по одной за раз
+        async with _disk_index_lock:
+            writer = DiskIndexWriter(path)
+            fingerprint = hashlib.sha1()
+            async for chunk in self.address_repo.iter_chunks(chunk_size, locality=locality):
+                for address in chunk:
+                    fingerprint.update(f"{address.id};{address.street};{address.number};{address.lon};{address.lat}\n"
+                                       .encode("utf-8"))
+                await asyncio.to_thread(writer.add, preprocess_dataframe(addresses_frame(chunk))[0])
+            meta = await asyncio.to_thread(writer.finish, fingerprint.hexdigest()[:12], "db")
+        logger.info("disk_index_built", path=path, locality=locality, streets=meta["streets"], houses=meta["houses"],
+                    seconds=round(time.perf_counter() - started, 3))
+        return meta
+
+
+async def build_disk_index_from_db(session_maker=async_session_maker, path: str = configs.SQLITE_INDEX_PATH) -> dict:
+    """Дисковый индекс по таблице адресов в отдельной сессии — при старте сервиса и из build_index.py"""
+    async with session_maker() as session:
+        return await IngestService(AddressRepository(session)).build_disk_index(path)
+
+
+def get_ingest_service(address_repo: AddressRepository = Depends(get_address_repo)) -> IngestService:
+    chroma_repo = ChromaRepository(get_collection()) if configs.SEMANTIC_ENABLED else None
+    return IngestService(address_repo, chroma_repo)
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from typing import List, Optional, Tuple
+
+from fastapi import Depends
+
+from app.core.cache import get_search_cache
+from app.core.exceptions import ValidationError
+from app.core.executor import SearchExecutor, get_search_executor
+from app.core.profiling import SlowQueryLog, get_slow_query_log
+from app.services.index_service import IndexService, get_index_service
+from app.utils.disk_index import DiskIndex
+from app.utils.geo import GeoBias
+from app.utils.model import parse_query
+from app.utils.shards import (
+    ShardedIndex, merge_nearest, merge_objects, reverse_in_shard, search_batch_in_shard, search_in_shard,
+    suggest_in_shards,
+)
+
+
+def search_cache_key(version: str, shards: List[str], query: str, top_n: int) -> tuple:
+    """Ключ кэша — шарды и нормализованные улица и дом, а не сырая строка запроса"""
+    street_query_norm, query_house = parse_query(query)
+    return (version, tuple(shards), street_query_norm, query_house.lower().strip(), top_n)
+
+
+def route(index: ShardedIndex, address: str, locality: Optional[str]):
+    try:
+        return index.route(address, locality)
+    except KeyError:
+        raise ValidationError(detail=f"Unknown locality: {locality}. Available: {', '.join(index.localities)}")
+
+
+def select(index: ShardedIndex, locality: Optional[str]) -> List[str]:
+    try:
+        return index.select(locality)
+    except KeyError:
+        raise ValidationError(detail=f"Unknown locality: {locality}. Available: {', '.join(index.localities)}")
+
+
+class SearchService:
+
+    def __init__(self, index_service: IndexService, executor: SearchExecutor, cache,
+                 slow_log: Optional[SlowQueryLog] = None):
+        self.index_service = index_service
+        self.executor = executor
+        self.cache = cache
+        self.slow_log = slow_log
+        self.index_version: Optional[str] = None
+
+    def get_index(self) -> ShardedIndex:
+        """Индекс для этого запроса; его версия запоминается для заголовка X-Index-Version.
+
+        Сервис создаётся на каждый запрос, поэтому после перезагрузки индекса ответ
+        сообщает версию, на которой он посчитан, а не текущую.
+        """
+        index = self.index_service.get_index()
+        self.index_version = index.version
+        return index
+
+    async def search(self, address: str, top_n: int = 3, locality: Optional[str] = None,
+                     bias: Optional[GeoBias] = None, debug: bool = False) -> dict:
+        """bias — область карты: точка поднимает близкие дома, bbox ограничивает поиск;
+        без результатов в bbox — поиск по всему индексу.
+
+        debug — поиск мимо кэша результатов, в ответе "profile": время поиска и
+        этапы с числом кандидатов по шардам. Профиль медленных запросов пишется
+        в журнал slow_log.
+        """
+        index = self.get_index()
+        await self.cache.set_version(index.version)
+        shards, query = route(index, address, locality)
+        key = search_cache_key(index.version, shards, query, top_n)
+        if bias is not None:
+            key += (bias,)
+
+        objects = None if debug else await self.cache.get(key)
+        if objects is not None:
+            return {"searched_address": address, "objects": objects}
+
+        profile = debug or (self.slow_log is not None and self.slow_log.enabled)
+        started = time.perf_counter()
+        # Запрос без населённого пункта параллельно уходит во все шарды
+        results = await asyncio.gather(*[
+            self.executor.run(search_in_shard, name, query, top_n, bias, profile, index=index) for name in shards
+        ])
+        duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        objects = merge_objects([res["objects"] for res in results], top_n)
+        report = None
+        if profile:
+            report = {"duration_ms": duration_ms,
+                      "shards": {name: res["profile"] for name, res in zip(shards, results)}}
+            if self.slow_log is not None and self.slow_log.should_log(duration_ms):
+                self.slow_log.record({
+                    "query": address, "locality": locality, "top_n": top_n,
+                    "bias": bias._asdict() if bias is not None else None,
+                    "index_version": index.version, "profile": report,
+                })
+
+        if not objects and bias is not None:
+            fallback = await self.search(address, top_n, locality, debug=debug)
+            objects = fallback["objects"]
+            if debug:
+                report["fallback"] = fallback["profile"]
+        await self.cache.set(key, objects)
+
+        response = {"searched_address": address, "objects": objects}
+        if debug:
+            response["profile"] = report
+        return response
+
+    async def search_batch(self, addresses: List[str], top_n: int = 3, locality: Optional[str] = None) -> List[dict]:
+        """Из кэша берутся попадания, промахи уходят в пул одним пакетом на шард"""
+        index = self.get_index()
+        await self.cache.set_version(index.version)
+        routes = [route(index, address, locality) for address in addresses]
+        keys = [search_cache_key(index.version, shards, query, top_n) for shards, query in routes]
+
+        # Одинаковые после нормализации запросы считаются один раз
+        unique = {}
+        for i, key in enumerate(keys):
+            unique.setdefault(key, i)
+
+        cached = {key: await self.cache.get(key) for key in unique}
+        missing = [key for key, item in cached.items() if item is None]
+        if missing:
+            per_shard = {name: [] for name in index.localities}
+            for key in missing:
+                shards, _ = routes[unique[key]]
+                for name in shards:
+                    per_shard[name].append(key)
+
+            names = [name for name, shard_keys in per_shard.items() if shard_keys]
+            shard_results = await asyncio.gather(*[
+                self.executor.run(
+                    search_batch_in_shard, name, [routes[unique[key]][1] for key in per_shard[name]], top_n,
+                    index=index,
+                )
+                for name in names
+            ])
+
+            found = {key: {} for key in missing}
+            for name, results in zip(names, shard_results):
+                for key, res in zip(per_shard[name], results):
+                    found[key][name] = res["objects"]
+            for key in missing:
+                shards, _ = routes[unique[key]]
+                cached[key] = merge_objects([found[key][name] for name in shards], top_n)
+                await self.cache.set(key, cached[key])
+
+        return [
+            {"searched_address": address, "objects": cached[key]}
+            for address, key in zip(addresses, keys)
+        ]
+
+    async def reverse_batch(self, points: List[Tuple[float, float]], k: int = 5,
+                            max_distance: Optional[float] = None, locality: Optional[str] = None) -> List[dict]:
+        """Ближайшие дома для точек (lat, lon): по сетке каждого шарда, затем общий top-k"""
+        index = self.get_index()
+        shards = select(index, locality)
+        shard_results = await asyncio.gather(*[
+            self.executor.run(reverse_in_shard, name, points, k, max_distance, index=index) for name in shards
+        ])
+        return [
+            {"lat": lat, "lon": lon, "objects": merge_nearest([res[i] for res in shard_results], k)}
+            for i, (lat, lon) in enumerate(points)
+        ]
+
+    async def reverse(self, lat: float, lon: float, k: int = 5, max_distance: Optional[float] = None,
+                      locality: Optional[str] = None) -> dict:
+        results = await self.reverse_batch([(lat, lon)], k, max_distance, locality)
+        return results[0]
+
+    async def suggest(self, text: str, limit: int = 10, locality: Optional[str] = None) -> List[dict]:
+        """Подсказки по префиксу в памяти — доли миллисекунды, поэтому прямо в event loop, без пула.
+
+        Дисковый шард читает SQLite, и подсказки с ним уходят в пул, чтобы не блокировать loop.
+        """
+        index = self.get_index()
+        shards, query = route(index, text, locality)
+        if any(isinstance(index.shards[name], DiskIndex) for name in shards):
+            return await self.executor.run(suggest_in_shards, shards, query, limit, index=index)
+        return suggest_in_shards(index, shards, query, limit)
+
+
+def get_search_service(
+        index_service: IndexService = Depends(get_index_service),
+        executor: SearchExecutor = Depends(get_search_executor),
+        cache=Depends(get_search_cache),
+        slow_log: SlowQueryLog = Depends(get_slow_query_log)) -> SearchService:
+    return SearchService(index_service, executor, cache, slow_log)
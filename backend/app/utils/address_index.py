@@ -0,0 +1,388 @@
+import sys
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from app.core.metrics import count
+from app.utils.geo import GridIndex, pack_coords
+from app.utils.house import HOUSE_FIELDS, house_scores, parse_house_column
+from app.utils.ngram import TrigramIndex
+from app.utils.normalize import normalize_house_column
+from app.utils.phonetic import StreetKeys, has_latin, translit_key
+from app.utils.suggest import PrefixIndex
+
+DEFAULT_LOCALITY = "Москва"
+# Сколько улиц-кандидатов отбирает триграммный индекс перед rapidfuzz (0 — полный перебор)
+DEFAULT_CANDIDATE_LIMIT = 300
+
+
+class PackedStrings:
+    """Массив строк одним UTF-8 буфером и смещениями.
+
+    Оба массива — обычные numpy-массивы, поэтому их можно отобразить
+    в память (np.load(mmap_mode="r")) и делить между процессами.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data        # uint8[total_bytes]
+        self.offsets = offsets  # int64[n + 1]
+
+    @classmethod
+    def from_list(cls, values):
+        encoded = [("" if pd.isna(v) else str(v)).encode("utf-8") for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(data, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _decode(self, i):
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._decode(i) for i in range(*key.indices(len(self)))]
+        if isinstance(key, (int, np.integer)):
+            return self._decode(int(key))
+        return [self._decode(i) for i in np.asarray(key)]
+
+    def tolist(self):
+        return self[:]
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + self.offsets.nbytes
+
+
+class InternedStrings:
+    """Колонка строк с повторами: код строки на каждый элемент и уникальные значения.
+
+    Улица и номер дома повторяются у многих домов, поэтому каждая уникальная
+    строка хранится один раз (PackedStrings), а на дом приходится только код —
+    uint16, если уникальных значений не больше 65536, иначе int32.
+    Интерфейс — как у PackedStrings.
+    """
+
+    def __init__(self, codes, values):
+        self.codes = codes    # uint16 | int32 [n]
+        self.values = values  # PackedStrings уникальных значений
+
+    @classmethod
+    def from_list(cls, values):
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+        uniques = list(uniques)
+        # Пропуски (код -1) — пустая строка, как в PackedStrings.from_list
+        if (codes < 0).any():
+            codes = np.where(codes < 0, len(uniques), codes)
+            uniques.append("")
+        dtype = np.uint16 if len(uniques) <= np.iinfo(np.uint16).max + 1 else np.int32
+        return cls(codes.astype(dtype), PackedStrings.from_list(uniques))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self.values[self.codes[key]]
+        return [self.values[code] for code in self.codes[key].tolist()]
+
+    def tolist(self):
+        values = self.values.tolist()
+        return [values[code] for code in self.codes.tolist()]
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.values.nbytes
+
+
+def _nbytes(value, seen):
+    """Размер массива, PackedStrings или списка/словаря строк и массивов; общие объекты считаются один раз"""
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, InternedStrings):
+        # house_original и house_keys делят один массив кодов
+        return _nbytes(value.codes, seen) + _nbytes(value.values, seen)
+    if isinstance(value, (np.ndarray, PackedStrings)):
+        return value.nbytes
+    if isinstance(value, list):
+        return sys.getsizeof(value) + sum(_nbytes(item, seen) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_nbytes(k, seen) + _nbytes(v, seen) for k, v in value.items())
+    if isinstance(value, str):
+        return sys.getsizeof(value)
+    return 0
+
+
+class AddressIndex:
+    """Поисковый индекс: уникальные нормализованные улицы и компактные массивы домов.
+
+    Дома отсортированы по улице (а внутри улицы — по номеру), поэтому дома
+    улицы street_id лежат в срезе offsets[street_id]:offsets[street_id + 1].
+    """
+
+    def __init__(self, streets, offsets, street_original, house_original, house_keys, lon, lat, version="",
+                 candidate_limit=DEFAULT_CANDIDATE_LIMIT, locality=DEFAULT_LOCALITY, geo=None, house_parts=None,
+                 coord_scale=1):
+        self.streets = streets                  # list[str], нормализованные уникальные улицы
+        self.offsets = offsets                  # int64[n_streets + 1]
+        self.street_original = street_original  # InternedStrings[n_houses], addr:street
+        self.house_original = house_original    # InternedStrings[n_houses], addr:housenumber
+        self.house_keys = house_keys            # InternedStrings[n_houses], номер в нижнем регистре (коды — как у house_original)
+        self.lon = lon                          # int32 в 1/coord_scale градуса или float64 [n_houses]
+        self.lat = lat
+        self.coord_scale = coord_scale
+        self.version = version                  # отпечаток исходного датасета
+        self.candidate_limit = candidate_limit
+        self.locality = locality                # населённый пункт всех адресов индекса
+        # Части номеров (house_number, house_letter, ...) по коду номера house_keys.codes,
+        # а не по дому; house_number = -1 — номер не распознан
+        if house_parts is None:
+            house_parts = parse_house_column(house_keys.values.tolist())
+        for name in HOUSE_FIELDS:
+            setattr(self, name, house_parts[name])
+        self.trigrams = TrigramIndex(streets) if candidate_limit else None
+        self.keys = StreetKeys(streets, trigrams=bool(candidate_limit))
+        self.geo = geo if geo is not None else GridIndex.build(lon, lat, scale=coord_scale)
+        self.prefix = PrefixIndex(streets, np.diff(offsets))
+        self._memory = None
+
+    @classmethod
+    def from_dataframe(cls, df, candidate_limit=DEFAULT_CANDIDATE_LIMIT):
+        """Строит индекс из DataFrame после preprocess_dataframe.
+
+        Строки домов интернируются (InternedStrings), номера нормализуются и
+        разбираются один раз на уникальный номер, координаты хранятся целыми
+        микроградусами, если это не теряет точности (pack_coords).
+        """
+        street_ids, streets = pd.factorize(df["street_normalized"].fillna(""), sort=True)
+        house_original = InternedStrings.from_list(df["house_original"].to_numpy(dtype=object))
+        key_values = normalize_house_column(house_original.values.tolist())
+        # Ранг нормализованного номера: внутри улицы дома упорядочены по нему
+        key_ranks, _ = pd.factorize(key_values, sort=True)
+
+        order = np.lexsort((key_ranks[house_original.codes], street_ids))
+        counts = np.bincount(street_ids, minlength=len(streets))
+        offsets = np.zeros(len(streets) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        house_codes = house_original.codes[order]
+        lon, lat, coord_scale = pack_coords(df["@lon"].to_numpy(dtype=np.float64)[order],
+                                            df["@lat"].to_numpy(dtype=np.float64)[order])
+        return cls(
+            streets=list(streets),
+            offsets=offsets,
+            street_original=InternedStrings.from_list(df["street_original"].to_numpy(dtype=object)[order]),
+            house_original=InternedStrings(house_codes, house_original.values),
+            house_keys=InternedStrings(house_codes, PackedStrings.from_list(key_values)),
+            house_parts=parse_house_column(key_values),
+            lon=lon,
+            lat=lat,
+            coord_scale=coord_scale,
+            candidate_limit=candidate_limit,
+        )
+
+    def to_dataframe(self):
+        """Дома индекса в колонках preprocess_dataframe — для пересборки с изменениями без чтения CSV"""
+        return pd.DataFrame({
+            "street_original": self.street_original.tolist(),
+            "house_original": self.house_original.tolist(),
+            "street_normalized": np.repeat(np.array(self.streets, dtype=object), np.diff(self.offsets)),
+            "@lon": np.asarray(self.lon) / self.coord_scale,
+            "@lat": np.asarray(self.lat) / self.coord_scale,
+        })
+
+    def __len__(self):
+        return len(self.house_keys)
+
+    @property
+    def n_streets(self):
+        return len(self.streets)
+
+    def memory_usage(self):
+        """Байты по частям индекса: {"houses": ..., "streets": ..., "trigrams": ..., "prefix": ..., "geo": ..., "keys": ...}.
+
+        Для снапшота, открытого через mmap, это размер отображённых массивов, а не RSS.
+        Индекс не меняется после построения, поэтому результат считается один раз.
+        """
+        if self._memory is None:
+            seen = set()
+            parts = {"houses": 0, "streets": _nbytes(self.streets, seen) + _nbytes(self.offsets, seen)}
+            for name in ("street_original", "house_original", "house_keys", "lon", "lat") + HOUSE_FIELDS:
+                parts["houses"] += _nbytes(getattr(self, name), seen)
+            for name, part in (("trigrams", self.trigrams), ("prefix", self.prefix), ("geo", self.geo)):
+                parts[name] = sum(_nbytes(value, seen) for value in vars(part).values()) if part is not None else 0
+            # Ключи транслита и фонетики вместе с их триграммным индексом и таблицей
+            parts["keys"] = sum(_nbytes(value, seen) for part in (self.keys, self.keys.translit_trigrams, self.keys.names)
+                                if part is not None for value in vars(part).values())
+            self._memory = parts
+        return self._memory
+
+    def street_houses(self, street_id):
+        """Срез домов улицы"""
+        return slice(int(self.offsets[street_id]), int(self.offsets[street_id + 1]))
+
+    def street_candidates(self, street_query, allowed=None, translit=False):
+        """id улиц-кандидатов из триграммного индекса или None, если нужен полный перебор.
+
+        allowed — отсортированные id улиц, которыми ограничен поиск; translit —
+        street_query уже ключ транслита, кандидаты — по ключам транслита улиц.
+        """
+        trigrams = self.keys.translit_trigrams if translit else self.trigrams
+        if allowed is not None:
+            if trigrams is None or len(allowed) <= self.candidate_limit:
+                return allowed
+            return trigrams.candidates(street_query, self.candidate_limit, allowed)
+        if trigrams is None or self.n_streets <= self.candidate_limit:
+            return None
+        return trigrams.candidates(street_query, self.candidate_limit)
+
+    def phonetic_candidates(self, street_query, score_cutoff, allowed=None):
+        """(отсортированные id, оценки) улиц, звучащих как запрос, с оценкой не ниже score_cutoff"""
+        street_ids, scores = self.keys.phonetic_matches(street_query)
+        keep = scores >= score_cutoff
+        if allowed is not None:
+            keep &= np.isin(street_ids, allowed)
+        return street_ids[keep], scores[keep]
+
+    def area(self, bias):
+        """Отсортированные индексы домов в bbox смещения — жёсткое ограничение поиска; None без bbox"""
+        if bias.bbox is None:
+            return None
+        return self.geo.in_bbox(*bias.bbox)
+
+    def near(self, bias, area=None):
+        """Отсортированные индексы домов в радиусе вокруг точки смещения (внутри area); None без точки"""
+        if not bias.has_point or bias.radius is None:
+            return None
+        houses = self.geo.within(bias.lat, bias.lon, bias.radius)
+        return houses if area is None else np.intersect1d(houses, area, assume_unique=True)
+
+    def streets_of(self, houses):
+        """Отсортированные id улиц, которым принадлежат дома"""
+        return np.unique(np.searchsorted(self.offsets, houses, side="right") - 1)
+
+    def match_streets(self, street_query, limit, score_cutoff, allowed=None, profile=None):
+        """Fuzzy-поиск только по уникальным улицам: [(street, score, street_id)].
+
+        Запрос латиницей сравнивается с ключами транслита улиц. Улица, звучащая
+        как запрос, получает не меньше своей фонетической оценки (StreetKeys.phonetic_matches).
+        В profile — число сравнённых улиц и фонетических совпадений.
+        """
+        phonetic = self.phonetic_candidates(street_query, score_cutoff, allowed)
+        count(profile, "phonetic_matches", len(phonetic[0]))
+        if has_latin(street_query) or len(phonetic[0]):
+            return self._match_keys(street_query, limit, score_cutoff, allowed, phonetic, profile)
+        return self.match_names(street_query, limit, score_cutoff, allowed, profile)
+
+    def match_names(self, street_query, limit, score_cutoff, allowed=None, profile=None):
+        """match_streets только по названиям улиц, без ключей транслита и фонетики"""
+        candidates = self.street_candidates(street_query, allowed)
+        count(profile, "street_candidates", self.n_streets if candidates is None else len(candidates))
+        if candidates is None:
+            return process.extract(
+                street_query,
+                self.streets,
+                scorer=fuzz.ratio,
+                limit=limit,
+                score_cutoff=score_cutoff,
+            )
+
+        # id кандидатов отсортированы, поэтому порядок при равных оценках тот же, что у перебора
+        matches = process.extract(
+            street_query,
+            [self.streets[i] for i in candidates],
+            scorer=fuzz.ratio,
+            limit=limit,
+            score_cutoff=score_cutoff,
+        )
+        return [(street, score, int(candidates[i])) for street, score, i in matches]
+
+    def _match_keys(self, street_query, limit, score_cutoff, allowed, phonetic, profile=None):
+        """match_streets по ключам транслита (запрос латиницей) и/или с фонетическими совпадениями.
+
+        Из обычного сравнения достаточно limit лучших: остальные улицы поднять может
+        только фонетическая оценка, а их сравнение с запросом считается отдельно.
+        При равной оценке порядок — по street_id, как у перебора в match_names.
+        """
+        translit = has_latin(street_query)
+        names = self.keys.translit if translit else self.streets
+        query = translit_key(street_query) if translit else street_query
+        candidates = self.street_candidates(query, allowed, translit=translit)
+        count(profile, "street_candidates", self.n_streets if candidates is None else len(candidates))
+        if translit:
+            count(profile, "translit")
+
+        scores = {}
+        if candidates is None:
+            matches = process.extract(query, names, scorer=fuzz.ratio, limit=limit, score_cutoff=score_cutoff)
+        else:
+            matches = [(street, score, int(candidates[i])) for street, score, i in process.extract(
+                query, [names[i] for i in candidates], scorer=fuzz.ratio, limit=limit, score_cutoff=score_cutoff)]
+        for _, score, street_id in matches:
+            scores[street_id] = score
+        for street_id, score in zip(*(part.tolist() for part in phonetic)):
+            similarity = fuzz.ratio(query, names[street_id], score_cutoff=score_cutoff)
+            scores[street_id] = max(scores.get(street_id, 0), similarity, score)
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(self.streets[street_id], score, street_id) for street_id, score in best]
+
+    def resolve_houses(self, street_id, house_query, limit, allowed=None, profile=None):
+        """Дома улицы с оценкой номера: [(индекс дома, оценка или None без номера в запросе)].
+
+        Номер сравнивается по частям (house_scores) массивами всей улицы: точные
+        совпадения получают 1.0, затем тот же номер с другим корпусом/строением,
+        затем ближайшие номера. При равной оценке — порядок домов в улице.
+        allowed — отсортированные индексы домов, которыми ограничен выбор;
+        в profile — число сравнённых номеров.
+        """
+        block = self.street_houses(street_id)
+        if allowed is None:
+            houses = np.arange(block.start, block.stop)
+        else:
+            houses = allowed[np.searchsorted(allowed, block.start):np.searchsorted(allowed, block.stop)]
+        if not house_query:
+            return [(int(house_idx), None) for house_idx in houses[:limit]]
+
+        count(profile, "houses_compared", len(houses))
+        scores = house_scores(self, houses, np.zeros(len(houses), dtype=np.int64), [house_query])
+        best = np.argsort(-scores, kind="stable")[:limit]
+        return [(int(houses[i]), float(scores[i])) for i in best]
+
+    def point(self, house_idx):
+        """Координаты дома в градусах: (lon, lat)"""
+        return float(self.lon[house_idx] / self.coord_scale), float(self.lat[house_idx] / self.coord_scale)
+
+    def record(self, house_idx, score):
+        lon, lat = self.point(house_idx)
+        return {
+            "locality": self.locality,
+            "street": self.street_original[house_idx],   # ОРИГИНАЛ
+            "number": self.house_original[house_idx],    # ОРИГИНАЛ
+            "lon": lon,
+            "lat": lat,
+            "score": score,
+        }
+
+    def records(self, house_ids, scores):
+        """record для нескольких домов (у DiskIndex — одним запросом к базе)"""
+        return [self.record(house_idx, score) for house_idx, score in zip(house_ids, scores)]
+
+    def nearest(self, lat, lon, k, max_distance=None):
+        """k ближайших к точке домов с расстоянием в метрах"""
+        idx, dist = self.geo.nearest(lat, lon, k, max_distance)
+        results = []
+        for i, d in zip(idx, dist):
+            house_lon, house_lat = self.point(i)
+            results.append({
+                "locality": self.locality,
+                "street": self.street_original[i],
+                "number": self.house_original[i],
+                "lon": house_lon,
+                "lat": house_lat,
+                "distance": round(float(d), 1),
+            })
+        return results
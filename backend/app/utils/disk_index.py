@@ -0,0 +1,489 @@
+import json
+import math
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from app.core.metrics import count
+from app.utils.address_index import DEFAULT_CANDIDATE_LIMIT, DEFAULT_LOCALITY
+from app.utils.geo import EARTH_RADIUS
+from app.utils.house import house_similarity
+from app.utils.normalize import STREET_TYPE_NAMES, normalize_house_column
+from app.utils.phonetic import TRANSLIT_TYPE_NAMES, has_latin, phonetic_keys, phonetic_score, street_keys, translit_key
+from app.utils.suggest import _house_order, complete_street_keys, house_input, suggest_tokens
+
+DISK_INDEX_FORMAT = 2
+# Файлы с такими расширениями открываются как дисковый индекс (SQLite), а не как CSV или снапшот
+DISK_INDEX_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+# Страничный кэш SQLite на соединение (одно на поток), МБ
+DEFAULT_CACHE_MB = 64
+# Начальный радиус (м) поиска ближайших домов; удваивается, пока не найдено k домов
+NEAREST_START_RADIUS = 250.0
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE streets (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    house_count INTEGER NOT NULL DEFAULT 0,
+    translit TEXT NOT NULL,
+    phonetic_name TEXT NOT NULL,
+    phonetic TEXT NOT NULL
+);
+CREATE TABLE houses (
+    id INTEGER PRIMARY KEY,
+    street_id INTEGER NOT NULL,
+    street TEXT NOT NULL,
+    number TEXT NOT NULL,
+    house_key TEXT NOT NULL,
+    lon REAL,
+    lat REAL
+);
+"""
+
+# Индексы строятся после загрузки всех строк — так быстрее, чем обновлять их на каждой вставке
+INDEXES = """
+CREATE INDEX houses_street ON houses (street_id, house_key, id);
+CREATE VIRTUAL TABLE streets_fts USING fts5(name, content='streets', content_rowid='id', tokenize='trigram');
+INSERT INTO streets_fts (streets_fts) VALUES ('rebuild');
+CREATE VIRTUAL TABLE streets_translit_fts USING fts5(translit, content='streets', content_rowid='id', tokenize='trigram');
+INSERT INTO streets_translit_fts (streets_translit_fts) VALUES ('rebuild');
+CREATE INDEX streets_phonetic ON streets (phonetic_name);
+CREATE VIRTUAL TABLE houses_geo USING rtree(id, min_lon, max_lon, min_lat, max_lat);
+INSERT INTO houses_geo SELECT id, lon, lon, lat, lat FROM houses WHERE lon IS NOT NULL AND lat IS NOT NULL;
+UPDATE streets SET house_count = (SELECT COUNT(*) FROM houses WHERE houses.street_id = streets.id);
+ANALYZE;
+"""
+
+
+def is_disk_index(path: str) -> bool:
+    return bool(path) and path.lower().endswith(DISK_INDEX_SUFFIXES)
+
+
+def _text(values):
+    # Пропуски — пустая строка, как в PackedStrings/InternedStrings
+    return ["" if pd.isna(v) else str(v) for v in values]
+
+
+class DiskIndexWriter:
+    """Собирает дисковый индекс по частям DataFrame (после preprocess_dataframe).
+
+    Пишет во временный файл рядом с path и переименовывает его в finish(): открытый
+    сервисом индекс не видит недописанную базу, перезагрузка подхватывает готовую.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._tmp = path + ".tmp"
+        if os.path.exists(self._tmp):
+            os.remove(self._tmp)
+        # Части могут приходить из разных потоков (сборка из БД через asyncio.to_thread), но по очереди
+        self._conn = sqlite3.connect(self._tmp, check_same_thread=False)
+        self._conn.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;" + SCHEMA)
+        self._street_ids = {}
+
+    def _street_id(self, name):
+        street_id = self._street_ids.get(name)
+        if street_id is None:
+            street_id = len(self._street_ids) + 1
+            self._street_ids[name] = street_id
+            self._conn.execute("INSERT INTO streets (id, name, translit, phonetic_name, phonetic) VALUES (?, ?, ?, ?, ?)",
+                               (street_id, name, *street_keys(name)))
+        return street_id
+
+    def add(self, df):
+        house_keys = normalize_house_column(df["house_original"].astype("string"))
+        street_ids = [self._street_id(name) for name in _text(df["street_normalized"])]
+        lon = [None if math.isnan(v) else v for v in df["@lon"].to_numpy(dtype=np.float64).tolist()]
+        lat = [None if math.isnan(v) else v for v in df["@lat"].to_numpy(dtype=np.float64).tolist()]
+        self._conn.executemany(
+            "INSERT INTO houses (street_id, street, number, house_key, lon, lat) VALUES (?, ?, ?, ?, ?, ?)",
+            zip(street_ids, _text(df["street_original"]), _text(df["house_original"]), house_keys.tolist(), lon, lat),
+        )
+
+    def finish(self, version: str = "", source: str = "") -> dict:
+        conn = self._conn
+        conn.executescript(INDEXES)
+        houses, geo_houses, lat0 = conn.execute(
+            "SELECT COUNT(*), COUNT(lat), AVG(CASE WHEN lon IS NOT NULL THEN lat END) FROM houses"
+        ).fetchone()
+        meta = {
+            "format": DISK_INDEX_FORMAT,
+            "source": source,
+            "version": version,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "streets": len(self._street_ids),
+            "houses": houses,
+            "geo_houses": geo_houses,
+            "lat0": lat0 or 0.0,
+        }
+        conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                         [(key, json.dumps(value, ensure_ascii=False)) for key, value in meta.items()])
+        conn.commit()
+        conn.close()
+        os.replace(self._tmp, self.path)
+        return meta
+
+
+class DiskGeo:
+    """Пространственные запросы дискового индекса через R*-дерево houses_geo.
+
+    Расстояния считаются в той же проекции вокруг средней широты, что у GridIndex,
+    поэтому совпадают с индексом в памяти.
+    """
+
+    def __init__(self, index, lat0):
+        self.index = index
+        self.lat0 = lat0
+        self.kx = math.radians(1) * EARTH_RADIUS * math.cos(math.radians(lat0))
+        self.ky = math.radians(1) * EARTH_RADIUS
+
+    def _coords(self, idx):
+        """Координаты домов idx в их порядке"""
+        rows = dict(
+            (house_id, (lon, lat)) for house_id, lon, lat in self.index.query(
+                "SELECT id, lon, lat FROM houses WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(np.asarray(idx).tolist()),),
+            )
+        )
+        coords = np.array([rows[int(i)] for i in idx], dtype=np.float64).reshape(len(idx), 2)
+        return coords[:, 0], coords[:, 1]
+
+    def _box(self, min_lon, min_lat, max_lon, max_lat):
+        """(id, lon, lat) домов в прямоугольнике; R*-дерево хранит float32, поэтому границы проверяются заново"""
+        rows = self.index.query(
+            "SELECT h.id, h.lon, h.lat FROM houses_geo g JOIN houses h ON h.id = g.id "
+            "WHERE g.max_lon >= ? AND g.min_lon <= ? AND g.max_lat >= ? AND g.min_lat <= ?",
+            (min_lon, max_lon, min_lat, max_lat),
+        )
+        data = np.array(rows, dtype=np.float64).reshape(len(rows), 3)
+        ids, lon, lat = data[:, 0].astype(np.int64), data[:, 1], data[:, 2]
+        keep = (lon >= min_lon) & (lon <= max_lon) & (lat >= min_lat) & (lat <= max_lat)
+        return ids[keep], lon[keep], lat[keep]
+
+    def _around(self, lat, lon, radius):
+        ids, lons, lats = self._box(lon - radius / self.kx, lat - radius / self.ky,
+                                    lon + radius / self.kx, lat + radius / self.ky)
+        return ids, np.hypot(lons * self.kx - lon * self.kx, lats * self.ky - lat * self.ky)
+
+    def distances(self, idx, lat, lon):
+        """Расстояния в метрах от точки до домов idx"""
+        lons, lats = self._coords(idx)
+        return np.hypot(lons * self.kx - lon * self.kx, lats * self.ky - lat * self.ky)
+
+    def within(self, lat, lon, radius):
+        """Отсортированные id домов не дальше radius метров от точки"""
+        ids, dist = self._around(lat, lon, radius)
+        return np.sort(ids[dist <= radius])
+
+    def in_bbox(self, min_lon, min_lat, max_lon, max_lat):
+        """Отсортированные id домов внутри прямоугольника координат"""
+        ids, _, _ = self._box(min_lon, min_lat, max_lon, max_lat)
+        return np.sort(ids)
+
+    def nearest(self, lat, lon, k, max_distance=None):
+        """k ближайших домов: (id домов, расстояния в метрах) по возрастанию расстояния.
+
+        Радиус поиска удваивается, пока в круге не окажется k домов.
+        """
+        radius = NEAREST_START_RADIUS if max_distance is None else min(NEAREST_START_RADIUS, max_distance)
+        while True:
+            ids, dist = self._around(lat, lon, radius)
+            if len(ids) >= k and np.partition(dist, k - 1)[k - 1] <= radius:
+                break
+            if max_distance is not None and radius >= max_distance:
+                break
+            if len(ids) >= self.index.geo_houses:
+                break
+            radius *= 2
+
+        if max_distance is not None:
+            keep = dist <= max_distance
+            ids, dist = ids[keep], dist[keep]
+        best = np.lexsort((ids, dist))[:k]
+        return ids[best], dist[best]
+
+
+class DiskIndex:
+    """Поисковый индекс в файле SQLite для датасетов, которые не помещаются в память воркера.
+
+    Улицы-кандидаты отбирает полнотекстовый индекс FTS5 (токенизатор trigram) внутри
+    базы, дома улицы читаются по индексу (street_id, house_key), точки — через
+    R*-дерево. В Python приходят только кандидаты, а ранжирование — тот же rapidfuzz
+    и та же оценка номера, что у AddressIndex. Интерфейс поиска совпадает с
+    AddressIndex, поэтому search_address_single_levenshtein работает с обоими.
+    У каждого потока своё соединение только для чтения.
+    """
+
+    def __init__(self, path, candidate_limit=DEFAULT_CANDIDATE_LIMIT, locality=DEFAULT_LOCALITY,
+                 cache_mb=DEFAULT_CACHE_MB):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Disk index not found: {path} (build it with build_index.py --sqlite)")
+        self.path = path
+        self.candidate_limit = candidate_limit or DEFAULT_CANDIDATE_LIMIT
+        self.locality = locality
+        self.cache_mb = cache_mb
+        self._uri = pathlib.Path(path).resolve().as_uri() + "?mode=ro"
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._active = 0
+        self._closed = False
+
+        meta = {key: json.loads(value) for key, value in self.query("SELECT key, value FROM meta")}
+        if meta.get("format") != DISK_INDEX_FORMAT:
+            raise ValueError(f"Unsupported disk index format: {meta.get('format')}")
+        self.version = meta["version"]
+        self._n_streets = meta["streets"]
+        self._n_houses = meta["houses"]
+        self.geo_houses = meta["geo_houses"]
+        self.geo = DiskGeo(self, meta["lat0"])
+
+    def _connect(self):
+        conn = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        conn.execute(f"PRAGMA cache_size = {-self.cache_mb * 1024}")
+        return conn
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def query(self, sql, params=()):
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._active += 1
+        if closed:
+            # Запрос, начатый на старой версии после её закрытия: отдельное соединение на один запрос
+            conn = self._connect()
+            try:
+                return conn.execute(sql, params).fetchall()
+            finally:
+                conn.close()
+        try:
+            return self._connection().execute(sql, params).fetchall()
+        finally:
+            with self._lock:
+                self._active -= 1
+                if self._closed and not self._active:
+                    self._close_connections()
+
+    def close(self):
+        """Закрывает соединения потоков; выполняющиеся запросы дорабатывают, соединения закроет последний"""
+        with self._lock:
+            self._closed = True
+            if not self._active:
+                self._close_connections()
+
+    def _close_connections(self):
+        connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+
+    def __len__(self):
+        return self._n_houses
+
+    @property
+    def n_streets(self):
+        return self._n_streets
+
+    def memory_usage(self):
+        """Размер файла базы: в памяти процесса — только страничный кэш SQLite"""
+        return {"disk": os.path.getsize(self.path)}
+
+    @staticmethod
+    def _match_expression(street_query, type_names=STREET_TYPE_NAMES):
+        """Запрос FTS5: любая из триграмм названия (без типа улицы — он есть у половины улиц)"""
+        words = [w for w in street_query.split() if w not in type_names]
+        text = " ".join(words) if len(" ".join(words)) >= 3 else street_query
+        grams = sorted({text[i:i + 3] for i in range(len(text) - 2)})
+        return " OR ".join('"{}"'.format(gram.replace('"', '""')) for gram in grams)
+
+    def street_candidates(self, street_query, allowed=None, translit=False):
+        """[(id, название, ключ сравнения)] улиц-кандидатов — как у AddressIndex, по возрастанию названия.
+
+        allowed — отсортированные id улиц, которыми ограничен поиск; translit —
+        street_query уже ключ транслита, кандидаты и ключ сравнения — по столбцу translit.
+        """
+        column = "translit" if translit else "name"
+        if allowed is not None and len(allowed) <= self.candidate_limit:
+            rows = self.query(f"SELECT id, name, {column} FROM streets WHERE id IN (SELECT value FROM json_each(?))",
+                              (json.dumps(np.asarray(allowed).tolist()),))
+            return sorted(rows, key=lambda row: row[1])
+        if allowed is None and self.n_streets <= self.candidate_limit:
+            # Как AddressIndex: улиц не больше лимита — полный перебор, а не триграммы
+            return sorted(self.query(f"SELECT id, name, {column} FROM streets"), key=lambda row: row[1])
+
+        expression = self._match_expression(street_query, TRANSLIT_TYPE_NAMES if translit else STREET_TYPE_NAMES)
+        if not expression:
+            return []
+        fts = "streets_translit_fts" if translit else "streets_fts"
+        sql = f"SELECT s.id, s.name, s.{column} FROM {fts} f JOIN streets s ON s.id = f.rowid WHERE {fts} MATCH ?"
+        params = [expression]
+        if allowed is not None:
+            sql += " AND f.rowid IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(np.asarray(allowed).tolist()))
+        rows = self.query(sql + " ORDER BY f.rank LIMIT ?", (*params, self.candidate_limit))
+        return sorted(rows, key=lambda row: row[1])
+
+    def phonetic_candidates(self, street_query, score_cutoff, allowed=None):
+        """[(id, название, оценка)] улиц, звучащих как запрос, — по индексу streets_phonetic"""
+        name_key, key = phonetic_keys(street_query)
+        if not name_key:
+            return []
+        rows = self.query("SELECT id, name, phonetic FROM streets WHERE phonetic_name = ?", (name_key,))
+        if allowed is not None:
+            keep = np.isin([street_id for street_id, _, _ in rows], allowed)
+            rows = [row for row, kept in zip(rows, keep) if kept]
+        scored = [(street_id, name, phonetic_score(key, phonetic)) for street_id, name, phonetic in rows]
+        return [row for row in scored if row[2] >= score_cutoff]
+
+    def match_streets(self, street_query, limit, score_cutoff, allowed=None, profile=None):
+        """Fuzzy-поиск по улицам-кандидатам из базы: [(street, score, street_id)].
+
+        Запросы латиницей, фонетические совпадения и счётчики profile — как у AddressIndex.match_streets.
+        """
+        translit = has_latin(street_query)
+        query = translit_key(street_query) if translit else street_query
+        candidates = self.street_candidates(query, allowed, translit=translit)
+        phonetic = self.phonetic_candidates(street_query, score_cutoff, allowed)
+        count(profile, "street_candidates", len(candidates))
+        count(profile, "phonetic_matches", len(phonetic))
+        if translit:
+            count(profile, "translit")
+        matches = process.extract(
+            query,
+            [text for _, _, text in candidates],
+            scorer=fuzz.ratio,
+            limit=limit if not translit and not phonetic else None,
+            score_cutoff=score_cutoff,
+        )
+        if not translit and not phonetic:
+            return [(street, score, candidates[i][0]) for street, score, i in matches]
+
+        # При равной оценке порядок — по названию, как по street_id у AddressIndex
+        names = {street_id: name for street_id, name, _ in candidates}
+        scores = {candidates[i][0]: score for _, score, i in matches}
+        for street_id, name, score in phonetic:
+            names[street_id] = name
+            scores[street_id] = max(scores.get(street_id, 0), score)
+        best = sorted(scores.items(), key=lambda item: (-item[1], names[item[0]]))[:limit]
+        return [(names[street_id], score, street_id) for street_id, score in best]
+
+    def resolve_houses(self, street_id, house_query, limit, allowed=None, profile=None):
+        """Дома улицы с оценкой номера: [(id дома, оценка или None без номера в запросе)].
+
+        Порядок и оценки — как у AddressIndex.resolve_houses.
+        """
+        rows = self.query("SELECT id, house_key FROM houses WHERE street_id = ? ORDER BY house_key, id",
+                          (street_id,))
+        if allowed is not None:
+            keep = np.isin([house_id for house_id, _ in rows], allowed)
+            rows = [row for row, kept in zip(rows, keep) if kept]
+        if not house_query:
+            return [(house_id, None) for house_id, _ in rows[:limit]]
+
+        count(profile, "houses_compared", len(rows))
+        scores = [house_similarity(house_query, key) for _, key in rows]
+        best = sorted(range(len(rows)), key=lambda i: -scores[i])[:limit]
+        return [(rows[i][0], scores[i]) for i in best]
+
+    def area(self, bias):
+        """Отсортированные id домов в bbox смещения — жёсткое ограничение поиска; None без bbox"""
+        if bias.bbox is None:
+            return None
+        return self.geo.in_bbox(*bias.bbox)
+
+    def near(self, bias, area=None):
+        """Отсортированные id домов в радиусе вокруг точки смещения (внутри area); None без точки"""
+        if not bias.has_point or bias.radius is None:
+            return None
+        houses = self.geo.within(bias.lat, bias.lon, bias.radius)
+        return houses if area is None else np.intersect1d(houses, area, assume_unique=True)
+
+    def streets_of(self, houses):
+        """Отсортированные id улиц, которым принадлежат дома"""
+        rows = self.query("SELECT DISTINCT street_id FROM houses WHERE id IN (SELECT value FROM json_each(?))",
+                          (json.dumps(np.asarray(houses).tolist()),))
+        return np.sort(np.array([street_id for street_id, in rows], dtype=np.int64))
+
+    def _houses(self, house_ids):
+        """{id: (улица, номер, lon, lat)} для домов одним запросом"""
+        rows = self.query("SELECT id, street, number, lon, lat FROM houses WHERE id IN (SELECT value FROM json_each(?))",
+                          (json.dumps([int(house_id) for house_id in house_ids]),))
+        return {house_id: (street, number, float("nan") if lon is None else lon, float("nan") if lat is None else lat)
+                for house_id, street, number, lon, lat in rows}
+
+    def record(self, house_idx, score):
+        return self.records([house_idx], [score])[0]
+
+    def records(self, house_ids, scores):
+        """Результаты поиска для домов house_ids с оценками scores — одним запросом к базе"""
+        houses = self._houses(house_ids)
+        results = []
+        for house_id, score in zip(house_ids, scores):
+            street, number, lon, lat = houses[int(house_id)]
+            results.append({"locality": self.locality, "street": street, "number": number, "lon": lon, "lat": lat,
+                            "score": score})
+        return results
+
+    def nearest(self, lat, lon, k, max_distance=None):
+        """k ближайших к точке домов с расстоянием в метрах"""
+        idx, dist = self.geo.nearest(lat, lon, k, max_distance)
+        houses = self._houses(idx)
+        results = []
+        for house_id, d in zip(idx, dist):
+            street, number, house_lon, house_lat = houses[int(house_id)]
+            results.append({"locality": self.locality, "street": street, "number": number,
+                            "lon": house_lon, "lat": house_lat, "distance": round(float(d), 1)})
+        return results
+
+    def suggest(self, text, limit=10):
+        """Подсказки по началу ввода: улицы по началу названия, после полного названия — её дома.
+
+        В отличие от PrefixIndex, улица подсказывается только по первому слову названия.
+        """
+        tokens = suggest_tokens(text)
+        if not tokens:
+            return []
+
+        house = house_input(text)
+        for names in complete_street_keys(house[0]) if house is not None else []:
+            rows = self.query(
+                "SELECT n.key, h.street_id, h.id, h.house_key FROM json_each(?) n "
+                "JOIN streets s ON s.name = n.value JOIN houses h ON h.street_id = s.id "
+                "WHERE h.house_key >= ? AND h.house_key < ?",
+                (json.dumps(names, ensure_ascii=False), house[1], house[1] + "￿"),
+            )
+            if rows:
+                # Улицы — в порядке вариантов названия, как у PrefixIndex.complete_streets
+                rows.sort(key=lambda row: (row[0], row[1], _house_order(row[3])))
+                house_ids = [house_id for _, _, house_id, _ in rows[:limit]]
+                houses = self._houses(house_ids)
+                results = []
+                for house_id in house_ids:
+                    street, number, lon, lat = houses[house_id]
+                    results.append({"text": f"{street} {number}", "locality": self.locality, "street": street,
+                                    "number": number, "lon": lon, "lat": lat})
+                return results
+
+        prefix = " ".join(tokens)
+        rows = self.query(
+            "SELECT (SELECT street FROM houses WHERE street_id = s.id ORDER BY house_key, id LIMIT 1) "
+            "FROM streets s WHERE s.name >= ? AND s.name < ? AND s.house_count > 0 "
+            "ORDER BY s.house_count DESC, s.name LIMIT ?",
+            (prefix, prefix + "￿", limit),
+        )
+        return [{"text": street, "locality": self.locality, "street": street, "number": None, "lon": None,
+                 "lat": None} for street, in rows]
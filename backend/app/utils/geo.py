@@ -0,0 +1,208 @@
+import math
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS = 6371008.8  # м
+# Среднее число домов в ячейке сетки и ограничение размера сетки по оси
+POINTS_PER_CELL = 8
+MAX_CELLS_PER_AXIS = 2048
+# Координаты домов хранятся целыми микроградусами (int32 вместо float64), если
+# в исходных данных не больше 6 знаков после запятой
+COORD_SCALE = 1_000_000
+
+
+def pack_coords(lon, lat, scale=COORD_SCALE):
+    """(lon, lat, scale): int32-массивы в 1/scale градуса, если перевод без потерь, иначе float64 и scale 1"""
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        fixed_lon, fixed_lat = np.round(lon * scale), np.round(lat * scale)
+    lossless = (
+        np.isfinite(lon).all() and np.isfinite(lat).all()
+        and max(np.abs(fixed_lon).max(initial=0), np.abs(fixed_lat).max(initial=0)) <= np.iinfo(np.int32).max
+        and np.array_equal(fixed_lon / scale, lon) and np.array_equal(fixed_lat / scale, lat)
+    )
+    if not lossless:
+        return lon, lat, 1
+    return fixed_lon.astype(np.int32), fixed_lat.astype(np.int32), scale
+
+
+class GeoBias(NamedTuple):
+    """Географическое смещение поиска: точка с радиусом и/или bbox (min_lon, min_lat, max_lon, max_lat)"""
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    radius: Optional[float] = None
+    bbox: Optional[Tuple[float, float, float, float]] = None
+
+    @property
+    def has_point(self):
+        return self.lat is not None and self.lon is not None
+
+
+class GridIndex:
+    """Равномерная сетка над координатами домов для поиска ближайших.
+
+    Координаты проецируются в метры (равнопромежуточная проекция вокруг средней
+    широты индекса — в пределах города погрешность доли процента). Дома отсортированы
+    по ячейке, дома ячейки c лежат в order[starts[c]:starts[c + 1]]. Поиск обходит
+    кольца ячеек вокруг точки, пока k-й найденный дом не окажется ближе границы кольца.
+    """
+
+    def __init__(self, lon, lat, order, starts, lat0, x0, y0, cell, nx, ny, scale=1):
+        self.lon = lon          # те же массивы, что в AddressIndex: градусы * scale
+        self.lat = lat
+        self.scale = scale
+        self.order = order      # int64[n_valid], индексы домов по ячейкам
+        self.starts = starts    # int64[nx * ny + 1]
+        self.lat0 = lat0
+        self.x0 = x0
+        self.y0 = y0
+        self.cell = cell        # сторона ячейки, м
+        self.nx = nx
+        self.ny = ny
+        self.kx = math.radians(1) * EARTH_RADIUS * math.cos(math.radians(lat0))
+        self.ky = math.radians(1) * EARTH_RADIUS
+
+    @classmethod
+    def build(cls, lon, lat, points_per_cell=POINTS_PER_CELL, max_cells_per_axis=MAX_CELLS_PER_AXIS, scale=1):
+        stored_lon, stored_lat = lon, lat
+        lon = np.asarray(lon, dtype=np.float64) / scale
+        lat = np.asarray(lat, dtype=np.float64) / scale
+        valid = np.flatnonzero(np.isfinite(lon) & np.isfinite(lat))
+        if not len(valid):
+            return cls(stored_lon, stored_lat, valid.astype(np.int64), np.zeros(2, dtype=np.int64),
+                       0.0, 0.0, 0.0, 1.0, 1, 1, scale)
+
+        lat0 = float(lat[valid].mean())
+        kx = math.radians(1) * EARTH_RADIUS * math.cos(math.radians(lat0))
+        ky = math.radians(1) * EARTH_RADIUS
+        x = lon[valid] * kx
+        y = lat[valid] * ky
+        x0, y0 = float(x.min()), float(y.min())
+        width, height = float(x.max()) - x0, float(y.max()) - y0
+
+        cell = math.sqrt(max(width * height, 1.0) * points_per_cell / len(valid))
+        cell = max(cell, width / max_cells_per_axis, height / max_cells_per_axis, 1.0)
+        nx = int(width // cell) + 1
+        ny = int(height // cell) + 1
+
+        cell_ids = ((x - x0) // cell).astype(np.int64) * ny + ((y - y0) // cell).astype(np.int64)
+        by_cell = np.argsort(cell_ids, kind="stable")
+        starts = np.searchsorted(cell_ids[by_cell], np.arange(nx * ny + 1)).astype(np.int64)
+        return cls(stored_lon, stored_lat, valid[by_cell].astype(np.int64), starts, lat0, x0, y0, cell, nx, ny, scale)
+
+    def params(self) -> dict:
+        """Скаляры сетки для снапшота (массивы order/starts сохраняются отдельно)"""
+        return {
+            "lat0": self.lat0, "x0": self.x0, "y0": self.y0,
+            "cell": self.cell, "nx": self.nx, "ny": self.ny, "scale": self.scale,
+        }
+
+    def _project(self, lat, lon):
+        return lon * self.kx, lat * self.ky
+
+    def _cell_of(self, qx, qy):
+        return math.floor((qx - self.x0) / self.cell), math.floor((qy - self.y0) / self.cell)
+
+    def _distances(self, idx, qx, qy):
+        return np.hypot(self.lon[idx] / self.scale * self.kx - qx, self.lat[idx] / self.scale * self.ky - qy)
+
+    def _block(self, cx, cy_from, cy_to):
+        """Дома ячеек столбца cx со строками cy_from..cy_to (с обрезкой по сетке)"""
+        if not 0 <= cx < self.nx:
+            return None
+        cy_from, cy_to = max(cy_from, 0), min(cy_to, self.ny - 1)
+        if cy_from > cy_to:
+            return None
+        base = cx * self.ny
+        return self.order[self.starts[base + cy_from]:self.starts[base + cy_to + 1]]
+
+    def _rect(self, ix0, ix1, iy0, iy1):
+        """Дома ячеек прямоугольника сетки (границы включительно)"""
+        blocks = [self._block(cx, iy0, iy1) for cx in range(max(ix0, 0), min(ix1, self.nx - 1) + 1)]
+        blocks = [b for b in blocks if b is not None and len(b)]
+        return np.concatenate(blocks) if blocks else np.empty(0, dtype=np.int64)
+
+    def distances(self, idx, lat, lon):
+        """Расстояния в метрах от точки до домов idx"""
+        qx, qy = self._project(lat, lon)
+        return self._distances(idx, qx, qy)
+
+    def within(self, lat, lon, radius):
+        """Отсортированные индексы домов не дальше radius метров от точки"""
+        qx, qy = self._project(lat, lon)
+        ix0, iy0 = self._cell_of(qx - radius, qy - radius)
+        ix1, iy1 = self._cell_of(qx + radius, qy + radius)
+        idx = self._rect(ix0, ix1, iy0, iy1)
+        return np.sort(idx[self._distances(idx, qx, qy) <= radius])
+
+    def in_bbox(self, min_lon, min_lat, max_lon, max_lat):
+        """Отсортированные индексы домов внутри прямоугольника координат"""
+        ix0, iy0 = self._cell_of(*self._project(min_lat, min_lon))
+        ix1, iy1 = self._cell_of(*self._project(max_lat, max_lon))
+        idx = self._rect(ix0, ix1, iy0, iy1)
+        lon, lat = self.lon[idx] / self.scale, self.lat[idx] / self.scale
+        keep = (lon >= min_lon) & (lon <= max_lon) & (lat >= min_lat) & (lat <= max_lat)
+        return np.sort(idx[keep])
+
+    def _ring(self, ix, iy, r):
+        if r == 0:
+            blocks = [self._block(ix, iy, iy)]
+        else:
+            blocks = [self._block(ix - r, iy - r, iy + r), self._block(ix + r, iy - r, iy + r)]
+            # Верх и низ кольца — только столбцы внутри сетки: у далёкой точки кольцо в тысячи ячеек
+            columns = range(max(ix - r + 1, 0), min(ix + r, self.nx))
+            for cy in (iy - r, iy + r):
+                if 0 <= cy < self.ny:
+                    blocks.extend(self._block(cx, cy, cy) for cx in columns)
+        return [b for b in blocks if b is not None and len(b)]
+
+    def _outside_bound(self, qx, qy, ix, iy, r):
+        """Нижняя граница расстояния до домов вне колец 0..r — до ближайшей непросмотренной полосы сетки"""
+        x1, y1 = self.x0 + self.nx * self.cell, self.y0 + self.ny * self.cell
+        strips = []
+        if ix - r > 0:
+            strips.append((self.x0, self.x0 + (ix - r) * self.cell, self.y0, y1))
+        if ix + r < self.nx - 1:
+            strips.append((self.x0 + (ix + r + 1) * self.cell, x1, self.y0, y1))
+        if iy - r > 0:
+            strips.append((self.x0, x1, self.y0, self.y0 + (iy - r) * self.cell))
+        if iy + r < self.ny - 1:
+            strips.append((self.x0, x1, self.y0 + (iy + r + 1) * self.cell, y1))
+        return min((math.hypot(max(sx0 - qx, 0.0, qx - sx1), max(sy0 - qy, 0.0, qy - sy1))
+                    for sx0, sx1, sy0, sy1 in strips), default=math.inf)
+
+    def nearest(self, lat, lon, k, max_distance=None):
+        """k ближайших домов: (индексы домов, расстояния в метрах) по возрастанию расстояния"""
+        qx, qy = self._project(lat, lon)
+        ix, iy = self._cell_of(qx, qy)
+        # Кольца начинаются с ближайшего к точке края сетки, если точка вне её
+        r = max(0, -ix, ix - (self.nx - 1), -iy, iy - (self.ny - 1))
+        found_idx, found_dist = [], []
+        total = 0
+        while True:
+            for block in self._ring(ix, iy, r):
+                found_idx.append(block)
+                found_dist.append(self._distances(block, qx, qy))
+                total += len(block)
+
+            # Для точки внутри сетки граница не меньше r * cell, для внешней — честное расстояние до полос
+            bound = self._outside_bound(qx, qy, ix, iy, r)
+            if bound == math.inf:
+                break
+            if total >= k and np.partition(np.concatenate(found_dist), k - 1)[k - 1] <= bound:
+                break
+            if max_distance is not None and bound >= max_distance:
+                break
+            r += 1
+
+        if not total:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        idx = np.concatenate(found_idx)
+        dist = np.concatenate(found_dist)
+        if max_distance is not None:
+            keep = dist <= max_distance
+            idx, dist = idx[keep], dist[keep]
+        best = np.lexsort((idx, dist))[:k]
+        return idx[best], dist[best]
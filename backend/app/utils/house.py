@@ -0,0 +1,107 @@
+import functools
+import re
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+# Канонический номер дома из normalize_house: «10», «10а», «10/2», «10к2», «10ак2с1», «2к1а»
+_HOUSE_KEY = re.compile(
+    r"^(?P<number>\d+)(?P<letter>[а-я](?!\d))?(?:/(?P<fraction>\d+)[а-я]?)?"
+    r"(?:к(?P<korpus>\d+))?(?:с(?P<building>\d+))?(?P<suffix>[а-я])?$"
+)
+
+# Штраф за каждую несовпавшую часть (буква, дробь, корпус, строение) при совпавшем номере
+PART_PENALTY = 0.1
+# Оценка соседнего номера: NEIGHBOR_SCORE / (1 + |разница номеров|)
+NEIGHBOR_SCORE = 0.5
+
+HOUSE_FIELDS = ("house_number", "house_letter", "house_fraction", "house_korpus", "house_building")
+_DTYPES = (np.int32, np.int32, np.int32, np.int16, np.int16)
+
+
+class HouseNumber(NamedTuple):
+    number: int
+    letter: int = 0     # код буквы («а» -> ord("а")), 0 — без буквы
+    fraction: int = 0   # «10/2» -> 2
+    korpus: int = 0
+    building: int = 0   # строение
+
+
+@functools.lru_cache(maxsize=10000)
+def parse_house(key: str) -> Optional[HouseNumber]:
+    """Разбирает канонический номер дома на части; None, если номер не распознан"""
+    match = _HOUSE_KEY.match(key) if key else None
+    if match is None:
+        return None
+    letter = match.group("letter") or match.group("suffix")
+    return HouseNumber(
+        number=int(match.group("number")),
+        letter=ord(letter) if letter else 0,
+        fraction=int(match.group("fraction") or 0),
+        korpus=int(match.group("korpus") or 0),
+        building=int(match.group("building") or 0),
+    )
+
+
+def parse_house_column(keys):
+    """Части номеров для колонки канонических номеров: dict поле -> массив.
+
+    Нераспознанные номера получают house_number = -1.
+    """
+    codes, uniques = pd.factorize(pd.Series(keys, dtype=object))
+    parsed = [parse_house(key) or HouseNumber(-1) for key in uniques] + [HouseNumber(-1)]
+    table = np.array(parsed, dtype=np.int64).reshape(len(parsed), len(HOUSE_FIELDS))
+    rows = table[codes]  # код -1 (пусто) попадает на последнюю строку
+    return {name: rows[:, i].astype(dtype) for i, (name, dtype) in enumerate(zip(HOUSE_FIELDS, _DTYPES))}
+
+
+def house_similarity(query_key: str, candidate_key: str) -> float:
+    """Сходство номеров: по частям, если оба распознаны, иначе — по строке"""
+    query, candidate = parse_house(query_key), parse_house(candidate_key)
+    if query is None or candidate is None:
+        return fuzz.ratio(query_key, candidate_key, processor=None) / 100
+    if query.number != candidate.number:
+        return NEIGHBOR_SCORE / (1 + abs(query.number - candidate.number))
+    mismatches = sum(a != b for a, b in zip(query[1:], candidate[1:]))
+    return 1.0 - PART_PENALTY * mismatches
+
+
+def house_scores(index, houses, rows, query_keys):
+    """Векторная house_similarity для домов houses: дом i сравнивается с запросом query_keys[rows[i]].
+
+    Даёт те же числа, что house_similarity, но считает массивами частей номеров индекса.
+    """
+    houses = np.asarray(houses, dtype=np.int64)
+    rows = np.asarray(rows, dtype=np.int64)
+    scores = np.zeros(len(houses), dtype=np.float64)
+    if not len(houses):
+        return scores
+
+    parsed = [parse_house(key) for key in query_keys]
+    table = np.array([q if q is not None else HouseNumber(-1) for q in parsed], dtype=np.int64)
+    table = table.reshape(len(parsed), len(HOUSE_FIELDS))[rows]
+
+    # Части номеров в индексе хранятся по коду номера, а не по дому
+    codes = index.house_keys.codes[houses]
+    number = index.house_number[codes]
+    structured = (table[:, 0] >= 0) & (number >= 0)
+    same = structured & (number == table[:, 0])
+    mismatches = np.zeros(len(houses), dtype=np.int64)
+    for i, name in enumerate(HOUSE_FIELDS[1:], start=1):
+        mismatches += getattr(index, name)[codes] != table[:, i]
+    scores[same] = 1.0 - PART_PENALTY * mismatches[same]
+    other = structured & ~same
+    scores[other] = NEIGHBOR_SCORE / (1 + np.abs(number[other] - table[other, 0]))
+
+    fallback = np.flatnonzero(~structured)
+    if len(fallback):
+        scores[fallback] = process.cpdist(
+            [query_keys[row] for row in rows[fallback]],
+            index.house_keys[houses[fallback]],
+            scorer=fuzz.ratio,
+            dtype=np.float64,
+            workers=-1,
+        ) / 100
+    return scores
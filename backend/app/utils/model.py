@@ -1,58 +1,31 @@
 import pandas as pd
 import numpy as np
-import re
+import os
+import ctypes
+import ctypes.util
+import hashlib
 from rapidfuzz import fuzz, process
-import functools
-
-# Кэшируем нормализацию (только для поиска)
-@functools.lru_cache(maxsize=10000)
-def normalize_street_name_cached(street_name):
-    """Кэшированная версия нормализации названий улиц ТОЛЬКО для поиска"""
-    if not street_name or pd.isna(street_name):
-        return ""
-
-    name = str(street_name).lower().strip()
-
-    replacements = [
-        ('ул.', 'улица'), ('ул ', 'улица '), (' ул ', ' улица '),
-        ('пер.', 'переулок'), ('пер ', 'переулок '), (' пер ', ' переулок '),
-        ('пр-т', 'проспект'), ('пр т', 'проспект'), (' пр-т ', ' проспект '),
-        ('б-р', 'бульвар'), ('б р', 'бульвар'), (' б-р ', ' бульвар '),
-        (' ш ', ' шоссе ')
-    ]
-
-    for old, new in replacements:
-        name = name.replace(old, new)
-
-    tokens = name.split()
-    street_type = None
-
-    street_types_set = {'улица', 'переулок', 'проспект', 'бульвар', 'шоссе'}
-    for i, token in enumerate(tokens):
-        if token in street_types_set:
-            street_type = token
-            tokens.pop(i)
-            break
-
-    if street_type:
-        normalized = ' '.join(tokens).capitalize() + ' ' + street_type
-    else:
-        normalized = ' '.join(tokens).capitalize()
-
-    return normalized
 
+from app.core.metrics import count, stage
+from app.utils.address_index import DEFAULT_CANDIDATE_LIMIT, AddressIndex
+from app.utils.disk_index import DiskIndex, DiskIndexWriter, is_disk_index
+from app.utils.house import house_scores as score_houses, house_similarity
+from app.utils.normalize import find_house, normalize_house, normalize_street, normalize_street_column
+from app.utils.phonetic import has_latin
+from app.utils.snapshot import is_snapshot, load_snapshot
 
 def preprocess_dataframe(df):
     """Подготовка DataFrame специально под твою таблицу"""
 
-    df = df.copy()
+    # Колонки только добавляются, поэтому данные исходного DataFrame не копируем
+    df = df.copy(deep=False)
 
     # ⛔ ОРИГИНАЛ — addr:street и addr:housenumber
     df["street_original"] = df["addr:street"]
     df["house_original"] = df["addr:housenumber"]
 
     # Нормализуем колонку street (которая у тебя lowercase)
-    df["street_normalized"] = df["street"].apply(normalize_street_name_cached).str.lower().str.strip()
+    df["street_normalized"] = normalize_street_column(df["street"])
 
     # Поисковый индекс
     street_index = df["street_normalized"].tolist()
@@ -61,8 +34,8 @@ def preprocess_dataframe(df):
 
 
 def calculate_levenshtein_score(street_query, street_candidate, house_query, house_candidate):
-    house_candidate_str = str(house_candidate).lower().strip() if not pd.isna(house_candidate) else ""
-    house_query_str = house_query.lower().strip() if house_query else ""
+    house_candidate_str = normalize_house(house_candidate) if isinstance(house_candidate, str) else ""
+    house_query_str = normalize_house(house_query) if house_query else ""
 
     if street_query and street_candidate:
         street_similarity = fuzz.ratio(street_query, street_candidate, processor=None)
@@ -71,11 +44,8 @@ def calculate_levenshtein_score(street_query, street_candidate, house_query, hou
         street_score = 0.0
 
     if house_query_str and house_candidate_str:
-        if house_query_str == house_candidate_str:
-            house_score = 1.0
-        else:
-            house_similarity = fuzz.ratio(house_query_str, house_candidate_str, processor=None)
-            house_score = house_similarity / 100
+        # Номер сравнивается по частям (номер, буква, дробь, корпус, строение)
+        house_score = house_similarity(house_query_str, house_candidate_str)
     else:
         house_score = 0.5 if not house_query_str else 0.0
 
@@ -85,64 +55,359 @@ def calculate_levenshtein_score(street_query, street_candidate, house_query, hou
         return street_score
 
 
-def search_address_single_levenshtein(csv_path, query, top_n=3):
-    if not hasattr(search_address_single_levenshtein, "_df_cache"):
-        df = pd.read_csv(csv_path, sep=";")
-        search_address_single_levenshtein._df_cache, search_address_single_levenshtein._street_index = preprocess_dataframe(df)
-
-    df = search_address_single_levenshtein._df_cache
-    street_index = search_address_single_levenshtein._street_index
-
+STREET_SCORE_CUTOFF = 30
+# Доля близости к точке смещения в итоговой оценке (geo-biased поиск)
+GEO_BIAS_WEIGHT = 0.15
+# Сколько ячеек матрицы cdist (запросы × улицы) считаем за один проход
+BATCH_MATRIX_CELLS = 32_000_000
+
+
+def dataset_version(path):
+    """Короткий отпечаток файла датасета: меняется при любой перезаписи"""
+    stat = os.stat(path)
+    fingerprint = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:12]
+
+
+# Колонки датасета, нужные индексу. Строки читаются как category: повторяющиеся
+# улицы и номера не превращаются в отдельный объект str на каждую строку CSV
+DATASET_DTYPES = {"addr:street": "category", "addr:housenumber": "category", "street": "category",
+                  "@lon": np.float64, "@lat": np.float64}
+
+
+def read_dataset(csv_path):
+    return pd.read_csv(csv_path, sep=";", usecols=list(DATASET_DTYPES), dtype=DATASET_DTYPES)
+
+
+def addresses_frame(addresses):
+    """Адреса из таблицы address (схема Address) в колонках датасета — для preprocess_dataframe"""
+    streets = [address.street for address in addresses]
+    return pd.DataFrame({
+        "addr:street": streets,
+        "addr:housenumber": [address.number for address in addresses],
+        "street": [street.lower() for street in streets],
+        "@lon": np.array([address.lon for address in addresses], dtype=np.float64),
+        "@lat": np.array([address.lat for address in addresses], dtype=np.float64),
+    })
+
+
+def release_memory():
+    """Возвращает ОС память кучи, освобождённую после сборки индекса (glibc malloc_trim).
+
+    Временные строки и массивы сборки в несколько раз больше самого индекса;
+    без этого они остаются в RSS каждого воркера. На других libc — ничего не делает.
+    """
+    libc = ctypes.util.find_library("c")
+    try:
+        ctypes.CDLL(libc).malloc_trim(0)
+    except (OSError, AttributeError, TypeError):
+        pass
+
+
+def build_index(csv_path, candidate_limit=DEFAULT_CANDIDATE_LIMIT):
+    """Читает CSV и строит AddressIndex"""
+    df = preprocess_dataframe(read_dataset(csv_path))[0]
+    index = AddressIndex.from_dataframe(df, candidate_limit=candidate_limit)
+    index.version = dataset_version(csv_path)
+    del df
+    release_memory()
+    return index
+
+
+def build_disk_index(csv_path, path, chunk_size=200_000):
+    """Строит дисковый индекс (SQLite) из CSV частями по chunk_size строк: датасет целиком в память не читается"""
+    writer = DiskIndexWriter(path)
+    for chunk in pd.read_csv(csv_path, sep=";", usecols=list(DATASET_DTYPES), dtype=DATASET_DTYPES,
+                             chunksize=chunk_size):
+        writer.add(preprocess_dataframe(chunk)[0])
+    return writer.finish(version=dataset_version(csv_path), source=csv_path)
+
+
+def read_delta(path):
+    """Файл изменений: CSV датасета (sep=';') с колонкой op — add (по умолчанию) или remove"""
+    delta = pd.read_csv(path, sep=";", dtype={"addr:housenumber": str})
+    missing = {"addr:street", "addr:housenumber"} - set(delta.columns)
+    if missing:
+        raise ValueError(f"Delta file misses columns: {', '.join(sorted(missing))}")
+    ops = delta["op"].fillna("add").str.strip().str.lower() if "op" in delta else pd.Series("add", index=delta.index)
+    unknown = set(ops) - {"add", "remove"}
+    if unknown:
+        raise ValueError(f"Unknown delta op: {', '.join(sorted(unknown))}")
+    delta["op"] = ops
+
+    # Добавляемым домам нужны координаты; street без колонки берётся из addr:street
+    if (ops == "add").any():
+        missing = {"@lon", "@lat"} - set(delta.columns)
+        if missing:
+            raise ValueError(f"Delta file misses columns for op=add: {', '.join(sorted(missing))}")
+        for column in ("@lon", "@lat"):
+            coords = pd.to_numeric(delta[column], errors="coerce")
+            if (coords.isna() & delta[column].notna()).any():
+                raise ValueError(f"Delta column {column} must be numeric")
+            delta[column] = coords
+    return delta
+
+
+def apply_delta(index, delta):
+    """Новый индекс: дома index с удалёнными (op=remove, по addr:street + addr:housenumber)
+    и добавленными (op=add) из delta.
+
+    Существующие дома берутся из массивов индекса, а не из CSV, и заново не нормализуются.
+    """
+    base = index.to_dataframe()
+
+    removed = delta[delta["op"] == "remove"]
+    if len(removed):
+        keys = set(zip(removed["addr:street"].astype(str), removed["addr:housenumber"].astype(str)))
+        keep = [(street, house) not in keys for street, house in zip(base["street_original"], base["house_original"])]
+        base = base[np.array(keep, dtype=bool)]
+
+    added = delta[delta["op"] == "add"]
+    if len(added):
+        if "street" not in added:
+            added = added.assign(street=added["addr:street"])
+        added, _ = preprocess_dataframe(added)
+        base = pd.concat([base, added[base.columns]], ignore_index=True)
+
+    new_index = AddressIndex.from_dataframe(base, candidate_limit=index.candidate_limit)
+    new_index.locality = index.locality
+    delta_hash = pd.util.hash_pandas_object(delta, index=False).to_numpy().tobytes()
+    new_index.version = hashlib.sha1(index.version.encode("utf-8") + delta_hash).hexdigest()[:12]
+    del base, added
+    release_memory()
+    return new_index
+
+
+def open_index(dataset_path, snapshot_path="", candidate_limit=DEFAULT_CANDIDATE_LIMIT):
+    """Открывает дисковый индекс или снапшот, если он собран, иначе строит индекс из CSV. Возвращает (index, source)"""
+    if is_disk_index(snapshot_path):
+        return DiskIndex(snapshot_path, candidate_limit=candidate_limit), snapshot_path
+    if is_snapshot(snapshot_path):
+        return load_snapshot(snapshot_path, candidate_limit=candidate_limit), snapshot_path
+    return build_index(dataset_path, candidate_limit=candidate_limit), dataset_path
+
+
+def _top_k_stable(scores, k):
+    """Индексы k лучших значений в каждой строке, как у process.extract:
+    по убыванию оценки, при равенстве — по возрастанию индекса"""
+    n_rows, n_cols = scores.shape
+    if k >= n_cols:
+        return np.argsort(-scores, axis=1, kind="stable")
+
+    kth = np.partition(scores, n_cols - k, axis=1)[:, n_cols - k]
+    candidates = np.empty((n_rows, k), dtype=np.intp)
+    for row in range(n_rows):
+        greater = np.flatnonzero(scores[row] > kth[row])
+        equal = np.flatnonzero(scores[row] == kth[row])[:k - len(greater)]
+        selected = np.concatenate((greater, equal))
+        candidates[row] = selected[np.argsort(-scores[row, selected], kind="stable")]
+    return candidates
+
+
+def parse_query(query):
+    """Разбирает запрос на нормализованную улицу и номер дома"""
     query_norm = query.strip()
     if not query_norm.lower().startswith("москва"):
         query_norm = "Москва, " + query_norm
 
-    house_match = re.search(r'\d+[а-яА-ЯкК/\-]*', query_norm)
-    query_house = house_match.group(0) if house_match else ""
+    house_match = find_house(query_norm)
+    query_house = normalize_house(house_match.group(0)) if house_match else ""
+    if house_match:
+        query_norm = query_norm[:house_match.start()] + " " + query_norm[house_match.end():]
 
     street_query = (
-        re.sub(r'\d+[а-яА-ЯкК/\-]*', '', query_norm)
+        query_norm
         .replace("Москва,", "")
         .replace("москва,", "")
+        .replace(",", " ")
         .strip()
         .lower()
     )
 
-    street_query_norm = normalize_street_name_cached(street_query).lower()
-
-    matches = process.extract(
-        street_query_norm,
-        street_index,
-        scorer=fuzz.ratio,
-        limit=top_n * 5,
-        score_cutoff=30
-    )
-
-    results = []
-
-    for street_norm, street_similarity, idx in matches:
-        row = df.iloc[idx]
-
-        final_score = calculate_levenshtein_score(
-            street_query_norm,
-            street_norm,
-            query_house,
-            row["house_original"]
+    street_query_norm = normalize_street(street_query)
+    return street_query_norm, query_house
+
+
+def search_address_single_levenshtein(index, query, top_n=3, bias=None, profile=None):
+    """bias (GeoBias): bbox ограничивает поиск, точка с радиусом только поднимает близкие дома.
+
+    Улицы и дома из радиуса добавляются к кандидатам всего индекса, так что точное
+    совпадение вне радиуса не теряется. profile — словарь, в который пишутся время
+    этапов и число кандидатов (app/core/profiling.py).
+    """
+
+    with stage("normalize", profile=profile):
+        street_query_norm, query_house = parse_query(query)
+        house_query = query_house.lower().strip()
+    if profile is not None:
+        profile.update(street_query=street_query_norm, house_query=house_query)
+
+    with stage("candidates", profile=profile):
+        area = allowed_streets = near = near_streets = None
+        if bias is not None:
+            area = index.area(bias)
+            if area is not None:
+                allowed_streets = index.streets_of(area)
+                count(profile, "area_houses", len(area))
+                count(profile, "area_streets", len(allowed_streets))
+            near = index.near(bias, area)
+            if near is not None:
+                near_streets = index.streets_of(near)
+                count(profile, "near_houses", len(near))
+
+        # Fuzzy только по уникальным улицам, дома — поиском внутри выбранных улиц
+        matches = index.match_streets(
+            street_query_norm, limit=top_n * 5, score_cutoff=STREET_SCORE_CUTOFF, allowed=allowed_streets,
+            profile=profile,
         )
-
-        results.append({
-            "locality": "Москва",
-            "street": row["street_original"],   # ОРИГИНАЛ
-            "number": row["house_original"],     # ОРИГИНАЛ
-            "lon": float(row["@lon"]),
-            "lat": float(row["@lat"]),
-            "score": final_score,
-        })
-
-    results.sort(key=lambda x: x["score"], reverse=True)
-    results = results[:top_n]
+        if near_streets is not None and len(near_streets):
+            # Улицы рядом с точкой — вдобавок к лучшим по всей области, а не вместо них
+            seen = {street_id for _, _, street_id in matches}
+            matches += [match for match in index.match_streets(
+                street_query_norm, limit=top_n * 5, score_cutoff=STREET_SCORE_CUTOFF, allowed=near_streets,
+            ) if match[2] not in seen]
+        count(profile, "streets_matched", len(matches))
+
+    with stage("scoring", profile=profile):
+        scored = []
+        for street_norm, street_similarity, street_id in matches:
+            street_score = street_similarity / 100
+            resolved = index.resolve_houses(street_id, house_query, top_n, allowed=area, profile=profile)
+            if near_streets is not None and street_id in near_streets:
+                seen = {house_idx for house_idx, _ in resolved}
+                resolved += [house for house in index.resolve_houses(street_id, house_query, top_n, allowed=near)
+                             if house[0] not in seen]
+            if near is not None and resolved:
+                distances = index.geo.distances(np.array([h for h, _ in resolved]), bias.lat, bias.lon)
+                proximity = np.clip(1.0 - distances / bias.radius, 0.0, 1.0)
+            else:
+                proximity = None
+
+            for i, (house_idx, house_score) in enumerate(resolved):
+                # Та же формула, что в calculate_levenshtein_score
+                final_score = street_score if house_score is None else 0.7 * street_score + 0.3 * house_score
+                if proximity is not None:
+                    final_score = (1 - GEO_BIAS_WEIGHT) * final_score + GEO_BIAS_WEIGHT * float(proximity[i])
+                scored.append((house_idx, final_score))
+
+        scored.sort(key=lambda x: x[1], reverse=True)
+        count(profile, "houses_ranked", len(scored))
+
+    with stage("serialize", profile=profile):
+        results = index.records([house_idx for house_idx, _ in scored[:top_n]],
+                                [final_score for _, final_score in scored[:top_n]])
 
     return {
         "searched_address": query,
         "objects": results
     }
+
+
+def search_address_batch_levenshtein(index, queries, top_n=3):
+    """Пакетный поиск: все запросы сравниваются с уникальными улицами одной матрицей cdist.
+
+    Смешивание с оценкой номера дома повторяет calculate_levenshtein_score,
+    но считается массивами по всем домам улиц-кандидатов. Результаты
+    возвращаются в порядке запросов. Дисковый индекс матрицу не строит — запросы
+    ищутся по одному; запросы латиницей тоже (их сравнивают с ключами транслита).
+    """
+    if isinstance(index, DiskIndex):
+        return [search_address_single_levenshtein(index, query, top_n) for query in queries]
+
+    with stage("normalize", "batch"):
+        parsed = [parse_query(q) for q in queries]
+        latin = {i for i, (street, _) in enumerate(parsed) if has_latin(street)}
+    if latin:
+        single = {i: search_address_single_levenshtein(index, queries[i], top_n) for i in sorted(latin)}
+        rest = iter(search_address_batch_levenshtein(
+            index, [query for i, query in enumerate(queries) if i not in latin], top_n))
+        return [single[i] if i in latin else next(rest) for i in range(len(queries))]
+
+    with stage("normalize", "batch"):
+        street_queries = [street for street, _ in parsed]
+        house_queries = np.array([house.lower().strip() for _, house in parsed], dtype=object)
+
+    chunk_size = max(1, BATCH_MATRIX_CELLS // max(index.n_streets, 1))
+    responses = []
+
+    for start in range(0, len(queries), chunk_size):
+        chunk_queries = queries[start:start + chunk_size]
+        chunk_streets = street_queries[start:start + chunk_size]
+        chunk_houses = house_queries[start:start + chunk_size]
+
+        with stage("candidates", "batch"):
+            # Столбцы матрицы — объединение кандидатов из триграммного индекса (или все улицы)
+            chunk_candidates = [index.street_candidates(street) for street in chunk_streets]
+            # Улицы с тем же фонетическим ключом добавляются к кандидатам запроса
+            chunk_phonetic = [index.phonetic_candidates(street, STREET_SCORE_CUTOFF) for street in chunk_streets]
+            if chunk_candidates and chunk_candidates[0] is not None:
+                columns = np.unique(np.concatenate(
+                    chunk_candidates + [ids for ids, _ in chunk_phonetic] + [np.empty(0, dtype=np.int64)]))
+            else:
+                columns = np.arange(index.n_streets)
+            if len(columns) == 0:
+                responses.extend({"searched_address": query, "objects": []} for query in chunk_queries)
+                continue
+
+            scores = process.cdist(
+                chunk_streets,
+                [index.streets[i] for i in columns] if len(columns) < index.n_streets else index.streets,
+                scorer=fuzz.ratio,
+                dtype=np.float64,
+                workers=-1,
+                score_cutoff=STREET_SCORE_CUTOFF,
+            )
+            if chunk_candidates and chunk_candidates[0] is not None:
+                # Улица, не попавшая в кандидаты запроса, для него не оценивается — как в одиночном поиске
+                allowed = np.zeros(scores.shape, dtype=bool)
+                for row, ids in enumerate(chunk_candidates):
+                    allowed[row, np.searchsorted(columns, ids)] = True
+                    allowed[row, np.searchsorted(columns, chunk_phonetic[row][0])] = True
+                scores[~allowed] = 0
+            for row, (ids, phonetic_scores) in enumerate(chunk_phonetic):
+                if len(ids):
+                    boosted = np.searchsorted(columns, ids)
+                    scores[row, boosted] = np.maximum(scores[row, boosted], phonetic_scores)
+
+            limit = min(top_n * 5, len(columns))
+            candidates = _top_k_stable(scores, limit)
+            street_scores = np.take_along_axis(scores, candidates, axis=1) / 100
+            valid = street_scores >= STREET_SCORE_CUTOFF / 100
+            candidates = columns[candidates]
+
+        with stage("scoring", "batch"):
+            # Разворачиваем все дома всех улиц-кандидатов в плоские массивы
+            starts = index.offsets[candidates].ravel()
+            lengths = np.where(valid.ravel(), index.offsets[candidates + 1].ravel() - starts, 0)
+            total = int(lengths.sum())
+            group_starts = np.cumsum(lengths) - lengths
+            house_ids = np.repeat(starts - group_starts, lengths) + np.arange(total)
+            rows = np.repeat(np.repeat(np.arange(len(chunk_queries)), limit), lengths)
+            ranks = np.repeat(np.tile(np.arange(limit), len(chunk_queries)), lengths)
+            positions = np.arange(total) - np.repeat(group_starts, lengths)
+            house_street_scores = street_scores.ravel()[np.repeat(np.arange(lengths.size), lengths)]
+
+            has_house = chunk_houses[rows] != ""
+            house_scores = np.zeros(total, dtype=np.float64)
+            if has_house.any():
+                house_scores[has_house] = score_houses(index, house_ids[has_house], rows[has_house], chunk_houses)
+
+            final_scores = np.where(
+                has_house,
+                0.7 * house_street_scores + 0.3 * house_scores,
+                house_street_scores,
+            )
+
+            # Порядок как у одиночного поиска: оценка, ранг улицы, оценка дома, позиция в улице
+            order = np.lexsort((positions, -house_scores, ranks, -final_scores, rows))
+            row_bounds = np.searchsorted(rows[order], np.arange(len(chunk_queries) + 1))
+
+        with stage("serialize", "batch"):
+            for row, query in enumerate(chunk_queries):
+                best = order[row_bounds[row]:min(row_bounds[row + 1], row_bounds[row] + top_n)]
+                responses.append({
+                    "searched_address": query,
+                    "objects": [index.record(house_ids[i], float(final_scores[i])) for i in best]
+                })
+
+    return responses
@@ -0,0 +1,49 @@
+from collections import defaultdict
+
+import numpy as np
+
+
+def trigrams(text):
+    """Множество символьных триграмм строки с отступами по краям"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Инвертированный индекс триграмм: триграмма -> отсортированные id строк.
+
+    Используется как этап отбора кандидатов перед rapidfuzz: вместо сравнения
+    запроса со всеми улицами берутся limit улиц, ближайших по доле общих триграмм.
+    """
+
+    def __init__(self, strings):
+        postings = defaultdict(list)
+        sizes = np.zeros(len(strings), dtype=np.int32)
+        for i, text in enumerate(strings):
+            grams = trigrams(text)
+            sizes[i] = len(grams)
+            for gram in grams:
+                postings[gram].append(i)
+
+        self.size = len(strings)
+        self.sizes = sizes
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def candidates(self, query, limit, allowed=None):
+        """Отсортированные id не более чем limit строк с наибольшим коэффициентом Дайса по триграммам.
+
+        allowed — отсортированные id, которыми ограничен отбор (например, улицы в области карты).
+        """
+        query_grams = trigrams(query)
+        lists = [self.postings[gram] for gram in query_grams if gram in self.postings]
+        if not lists:
+            return np.empty(0, dtype=np.int64)
+
+        counts = np.bincount(np.concatenate(lists), minlength=self.size)
+        hits = np.flatnonzero(counts)
+        if allowed is not None:
+            hits = np.intersect1d(hits, allowed, assume_unique=True)
+        if len(hits) > limit:
+            dice = counts[hits] / (self.sizes[hits] + len(query_grams))
+            hits = hits[np.argpartition(-dice, limit - 1)[:limit]]
+        return np.sort(hits)
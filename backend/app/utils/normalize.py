@@ -0,0 +1,127 @@
+import functools
+import re
+
+import numpy as np
+import pandas as pd
+
+# Сокращение (в нижнем регистре, без точки) -> полный тип улицы
+STREET_TYPES = {
+    "улица": "улица", "ул": "улица",
+    "переулок": "переулок", "пер": "переулок",
+    "проспект": "проспект", "пр-т": "проспект", "пр т": "проспект", "просп": "проспект", "пр": "проспект",
+    "бульвар": "бульвар", "б-р": "бульвар", "б р": "бульвар", "бул": "бульвар", "бульв": "бульвар",
+    "шоссе": "шоссе", "ш": "шоссе",
+    "площадь": "площадь", "пл": "площадь",
+    "набережная": "набережная", "наб": "набережная",
+    "проезд": "проезд", "пр-д": "проезд",
+}
+STREET_TYPE_NAMES = frozenset(STREET_TYPES.values())
+
+# Часть номера дома -> её код в канонической записи («10 корп. 2 стр. 1» -> «10к2с1»)
+HOUSE_PARTS = {
+    "корпус": "к", "корп": "к", "кор": "к", "к": "к",
+    "строение": "с", "стр": "с", "с": "с",
+    "литера": "", "лит": "",
+    "дом": "", "д": "",
+}
+
+
+def _alternation(words):
+    # Длинные варианты раньше коротких, пробел в сокращении — любой пробельный разделитель
+    return "|".join(re.escape(w).replace(r"\ ", r"\s+") for w in sorted(words, key=len, reverse=True))
+
+
+# Сокращения из двух слов («пр т», «б р») склеиваются в одно слово «пр_т» до разбиения
+_TWO_WORD_PATTERN = re.compile(rf"(?<![\w-])({_alternation(a for a in STREET_TYPES if ' ' in a)})(?![\w-])")
+_TYPE_BY_TOKEN = {abbr.replace(" ", "_"): full for abbr, full in STREET_TYPES.items()}
+
+_HOUSE_PART = re.compile(rf"(?<![а-я])({_alternation(HOUSE_PARTS)})\.?\s*(?=[\dа-я])")
+_SPACES = re.compile(r"[\s.,]+")
+
+# Номер дома в запросе: «д.», число или диапазон «10-12», буква, дробь и необязательные
+# корпус/строение/литера. Границы слова не дают принять за номер «1» из «1-я» или цифры внутри слова
+HOUSE_PATTERN = re.compile(
+    rf"(?<![\w-])(?:(?:дом|д)\.?\s*)?\d+(?:-\d+)?(?:[а-яА-ЯёЁ](?!\d))?(?:/\d+(?:[а-яА-ЯёЁ](?!\d))?)?(?:\s*(?:{_alternation(HOUSE_PARTS)})\.?\s*(?:\d+|[а-яА-ЯёЁ]\b))*(?![\w-])",
+    re.IGNORECASE,
+)
+
+
+def find_house(text):
+    """Номер дома в тексте — последнее совпадение HOUSE_PATTERN: числа в названии улицы идут раньше номера"""
+    match = None
+    for match in HOUSE_PATTERN.finditer(text):
+        pass
+    return match
+
+
+def fold(text):
+    """Нижний регистр и ё -> е"""
+    return text.lower().replace("ё", "е")
+
+
+@functools.lru_cache(maxsize=10000)
+def normalize_street(street_name):
+    """Название улицы в каноническом виде: нижний регистр, ё -> е, полный тип улицы в конце.
+
+    «ул. Тверская», «Тверская улица» и «тверская ул» дают «тверская улица».
+    """
+    if not isinstance(street_name, str) or not street_name:
+        return ""
+
+    text = fold(street_name)
+    # Быстрая проверка подстрокой вместо regex: сокращений из двух слов всего два
+    if "пр т" in text or "б р" in text:
+        text = _TWO_WORD_PATTERN.sub(lambda m: _SPACES.sub("_", m.group(1)), text)
+
+    # Один проход по словам: тип улицы (первый найденный) уходит в конец
+    words, street_type = [], None
+    for token in text.replace(",", " ").replace(".", ". ").split():
+        token = token.rstrip(".")
+        full = _TYPE_BY_TOKEN.get(token)
+        if full is None:
+            words.append(token)
+        elif street_type is None:
+            street_type = full
+        else:
+            words.append(full)
+
+    if street_type:
+        words.append(street_type)
+    return " ".join(words)
+
+
+@functools.lru_cache(maxsize=10000)
+def normalize_house(house):
+    """Номер дома в каноническом виде: «д. 10 корп. 2 стр. 1» -> «10к2с1», «10 лит. А» -> «10а»"""
+    if not isinstance(house, str) or not house:
+        return ""
+    text = _HOUSE_PART.sub(lambda m: HOUSE_PARTS[m.group(1)], fold(house).strip())
+    return _SPACES.sub("", text)
+
+
+def _bulk(values, normalize):
+    """Нормализует только уникальные значения колонки и раскладывает результат по строкам"""
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    normalized = np.array([normalize(value) for value in uniques] + [""], dtype=object)
+    return normalized[codes]  # код -1 (NaN) попадает на последний элемент ""
+
+
+def normalize_street_column(values):
+    return _bulk(values, normalize_street.__wrapped__)
+
+
+def normalize_house_column(values):
+    return _bulk(values, normalize_house.__wrapped__)
+
+
+def normalize_address(raw_address, default_city="Москва"):
+    """Адрес целиком («город, улица, дом») для сравнения строк в оценке качества"""
+    house_match = find_house(raw_address)
+    house = normalize_house(house_match.group(0)) if house_match else ""
+    street = raw_address[:house_match.start()] + raw_address[house_match.end():] if house_match else raw_address
+    street = normalize_street(re.sub(rf"^\s*(?:г\.?\s*)?{re.escape(default_city)}\s*,?", "", street, flags=re.IGNORECASE))
+
+    normalized = f"{fold(default_city)}, {street}"
+    if house:
+        normalized += f", {house}"
+    return normalized
@@ -0,0 +1,197 @@
+import bisect
+import functools
+import re
+
+import numpy as np
+from rapidfuzz import fuzz
+
+from app.utils.ngram import TrigramIndex
+from app.utils.normalize import STREET_TYPES, fold
+
+# Предел оценки улицы, фонетический ключ которой совпал с ключом запроса: ниже
+# точного совпадения (100), выше опечаток — «маладежная» находит «молодежную»
+PHONETIC_MATCH_SCORE = 95
+
+CYRILLIC_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh", "з": "z", "и": "i",
+    "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t",
+    "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch", "ъ": "", "ы": "y", "ь": "",
+    "э": "e", "ю": "yu", "я": "ya",
+}
+_TRANSLIT_TABLE = str.maketrans(CYRILLIC_TO_LATIN)
+
+# Варианты латинской записи сводятся к одному: Tverskaja/Tverskaia -> tverskaya,
+# Leninskij/Leninskii/Leninsky -> leninsky, Himki -> khimki, Yermolova -> ermolova
+_LATIN_FOLDS = [(re.compile(pattern), repl) for pattern, repl in (
+    (r"['`’]", ""),
+    (r"w", "v"),
+    (r"x", "ks"),
+    (r"q", "k"),
+    (r"j", "y"),
+    (r"yo", "e"),
+    (r"i([au])", r"y\1"),
+    (r"tz", "ts"),
+    (r"sch", "shch"),
+    (r"c(?!h)", "ts"),
+    (r"(?<![zcskh])h", "kh"),
+    (r"\bye", "e"),
+    (r"(?:iy|yy|ii)\b", "y"),
+)]
+
+# Английские названия типов улиц в запросах латиницей
+ENGLISH_STREET_TYPES = {
+    "street": "улица", "st": "улица",
+    "lane": "переулок",
+    "avenue": "проспект", "ave": "проспект", "prospect": "проспект",
+    "boulevard": "бульвар", "blvd": "бульвар",
+    "highway": "шоссе",
+    "square": "площадь", "sq": "площадь",
+    "embankment": "набережная",
+    "passage": "проезд",
+}
+
+# Фонетическая свёртка ключа транслита: безударные о/а и е/и, ы, удвоенные буквы, щ/ш
+_PHONETIC_FOLDS = [(re.compile(pattern), repl) for pattern, repl in (
+    (r"-", " "),
+    (r"shch", "sh"),
+    (r"y([aue])", r"\1"),
+    (r"o", "a"),
+    (r"[eiy]", "i"),
+    (r"([a-z])\1+", r"\1"),
+)]
+
+_LATIN = re.compile(r"[a-z]")
+
+# Город в начале запроса латиницей («Moscow, Tverskaya 7»); «Москва,» убирает parse_query
+_CITY_WORDS = ("moskva", "moskau", "moscow")
+
+
+def transliterate(text):
+    """Кириллица -> латиница (нижний регистр); латиница и прочие символы не меняются"""
+    return fold(text).translate(_TRANSLIT_TABLE)
+
+
+def _latin_fold(text):
+    for pattern, repl in _LATIN_FOLDS:
+        text = pattern.sub(repl, text)
+    return text
+
+
+# Тип улицы в пространстве транслита: «ulitsa», «ul», «street» -> ключ «улица»
+_TYPE_KEYS = {
+    _latin_fold(transliterate(abbr)): _latin_fold(transliterate(full))
+    for abbr, full in list(STREET_TYPES.items()) + list(ENGLISH_STREET_TYPES.items()) if " " not in abbr
+}
+# Полные типы улиц в ключах транслита — аналог STREET_TYPE_NAMES
+TRANSLIT_TYPE_NAMES = frozenset(_TYPE_KEYS.values())
+
+
+_CITY_KEYS = {_latin_fold(word) for word in _CITY_WORDS}
+
+
+def has_latin(text):
+    return _LATIN.search(fold(text)) is not None
+
+
+def _translit_words(text):
+    """(слова названия, тип улицы или None) в пространстве транслита"""
+    words, street_type = [], None
+    for word in _latin_fold(transliterate(text)).replace(",", " ").replace(".", ". ").split():
+        word = word.rstrip(".")
+        full = _TYPE_KEYS.get(word)
+        if full is None:
+            words.append(word)
+        elif street_type is None:
+            street_type = full
+        else:
+            words.append(full)
+    if words and words[0] in _CITY_KEYS:
+        words = words[1:]
+    return words, street_type
+
+
+def translit_key(text):
+    """Ключ улицы в латинице: транслит, свёртка вариантов записи, тип улицы в конце.
+
+    «ул. Тверская», «ulitsa Tverskaya» и «Tverskaja street» дают «tverskaya ulitsa».
+    """
+    words, street_type = _translit_words(text)
+    return " ".join(words + [street_type] if street_type else words)
+
+
+def _phonetic(words):
+    key = " ".join(words)
+    for pattern, repl in _PHONETIC_FOLDS:
+        key = pattern.sub(repl, key)
+    return " ".join(key.split())
+
+
+_PHONETIC_TYPES = {street_type: _phonetic([street_type]) for street_type in TRANSLIT_TYPE_NAMES}
+
+
+@functools.lru_cache(maxsize=10000)
+def phonetic_keys(text):
+    """(ключ названия без типа улицы, полный ключ) по звучанию.
+
+    Одинаковы у «молодежная», «маладежная» и «molodyozhnaya».
+    """
+    words, street_type = _translit_words(text)
+    name = _phonetic(words)
+    if not street_type:
+        return name, name
+    # Свёртки не переходят через пробел, поэтому тип сворачивается отдельно
+    return name, f"{name} {_PHONETIC_TYPES[street_type]}" if name else _PHONETIC_TYPES[street_type]
+
+
+def street_keys(street):
+    """(ключ транслита, ключ названия по звучанию, полный ключ по звучанию) улицы — считаются при сборке индекса"""
+    return (translit_key(street),) + phonetic_keys(street)
+
+
+def phonetic_score(key, street_key):
+    """Оценка улицы, название которой звучит как в запросе: fuzz.ratio полных ключей, не выше PHONETIC_MATCH_SCORE.
+
+    «маладежная» без типа оценивается как «молодежная» без типа, а не как точное совпадение.
+    """
+    return min(fuzz.ratio(key, street_key), PHONETIC_MATCH_SCORE)
+
+
+class KeyTable:
+    """Отсортированная таблица ключ -> street_id для точного поиска бинарным поиском"""
+
+    def __init__(self, keys):
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys = [keys[i] for i in order]
+        self.ids = np.array(order, dtype=np.int64)
+
+    def matches(self, key):
+        """Отсортированные id улиц с ключом key"""
+        if not key:
+            return np.empty(0, dtype=np.int64)
+        left = bisect.bisect_left(self.keys, key)
+        right = bisect.bisect_right(self.keys, key, lo=left)
+        return np.sort(self.ids[left:right])
+
+
+class StreetKeys:
+    """Ключи уникальных улиц в других пространствах, посчитанные при сборке индекса.
+
+    translit — ключи транслита по street_id (с триграммным индексом, как у самих
+    улиц): запрос латиницей сравнивается с ними тем же rapidfuzz. phonetic —
+    полные ключи по звучанию по street_id, names — таблица ключей названий для
+    точного поиска.
+    """
+
+    def __init__(self, streets, trigrams=True):
+        keys = [street_keys(street) for street in streets]
+        self.translit = [translit for translit, _, _ in keys]
+        self.translit_trigrams = TrigramIndex(self.translit) if trigrams else None
+        self.phonetic = [phonetic for _, _, phonetic in keys]
+        self.names = KeyTable([name for _, name, _ in keys])
+
+    def phonetic_matches(self, street_query):
+        """(отсортированные id, оценки phonetic_score) улиц, название которых звучит как в street_query"""
+        name_key, key = phonetic_keys(street_query)
+        street_ids = self.names.matches(name_key)
+        scores = np.array([phonetic_score(key, self.phonetic[i]) for i in street_ids.tolist()], dtype=np.float64)
+        return street_ids, scores
@@ -0,0 +1,141 @@
+import hashlib
+import itertools
+import re
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.address_index import DEFAULT_CANDIDATE_LIMIT, AddressIndex
+from app.utils.disk_index import DiskIndex
+from app.utils.model import open_index, search_address_batch_levenshtein, search_address_single_levenshtein
+from app.utils.normalize import fold
+from app.utils.suggest import suggest
+
+
+class ShardedIndex:
+    """Набор AddressIndex (или DiskIndex) по населённым пунктам.
+
+    Запрос с явным населённым пунктом (параметр или префикс/суффикс вида
+    «Казань, ...», «..., г. Казань») идёт в один шард, остальные — во все.
+    """
+
+    def __init__(self, shards: Dict[str, AddressIndex]):
+        self.shards = shards
+        names = "|".join(re.escape(fold(name)) for name in sorted(shards, key=len, reverse=True))
+        self._prefix = re.compile(rf"^\s*(?:г\.?\s*)?({names})(?:\s*,\s*|\s+|$)")
+        self._suffix = re.compile(rf"(?:\s*,\s*|\s+)(?:г\.?\s*)?({names})\s*$")
+        self._by_folded = {fold(name): name for name in shards}
+        self.version = hashlib.sha1(
+            "|".join(f"{name}:{index.version}" for name, index in shards.items()).encode("utf-8")
+        ).hexdigest()[:12]
+
+    @property
+    def localities(self) -> List[str]:
+        return list(self.shards)
+
+    @property
+    def n_streets(self) -> int:
+        return sum(index.n_streets for index in self.shards.values())
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self.shards.values())
+
+    def detect_locality(self, query: str) -> Tuple[Optional[str], str]:
+        """(населённый пункт или None, запрос без его упоминания)"""
+        folded = fold(query)
+        if len(folded) != len(query):
+            query = folded  # позиции совпадений должны указывать в query
+        for pattern in (self._prefix, self._suffix):
+            match = pattern.search(folded)
+            if match:
+                rest = query[:match.start()] + query[match.end():]
+                return self._by_folded[match.group(1)], rest.strip()
+        return None, query
+
+    def select(self, locality: Optional[str] = None) -> List[str]:
+        """Шард населённого пункта или все шарды; KeyError для неизвестного"""
+        if locality is None:
+            return self.localities
+        name = self._by_folded.get(fold(locality.strip()))
+        if name is None:
+            raise KeyError(locality)
+        return [name]
+
+    def route(self, query: str, locality: Optional[str] = None) -> Tuple[List[str], str]:
+        """Шарды, в которых искать запрос, и запрос без населённого пункта"""
+        if locality is not None:
+            shards = self.select(locality)
+            _, query = self.detect_locality(query)
+            return shards, query
+
+        name, rest = self.detect_locality(query)
+        if name is not None:
+            return [name], rest
+        return self.localities, query
+
+
+def merge_objects(object_lists: List[List[dict]], top_n: int) -> List[dict]:
+    """Общий top-N по score из выдач нескольких шардов (при равенстве — в порядке шардов)"""
+    merged = [obj for objects in object_lists for obj in objects]
+    merged.sort(key=lambda x: x["score"], reverse=True)
+    return merged[:top_n]
+
+
+def merge_nearest(object_lists: List[List[dict]], k: int) -> List[dict]:
+    """Общие k ближайших из выдач нескольких шардов"""
+    merged = [obj for objects in object_lists for obj in objects]
+    merged.sort(key=lambda x: x["distance"])
+    return merged[:k]
+
+
+def search_in_shard(sharded: ShardedIndex, locality: str, query: str, top_n: int, bias=None,
+                    profile: bool = False) -> dict:
+    """profile — добавить в ответ "profile": этапы и счётчики кандидатов шарда"""
+    if not profile:
+        return search_address_single_levenshtein(sharded.shards[locality], query, top_n, bias)
+    shard_profile = {}
+    result = search_address_single_levenshtein(sharded.shards[locality], query, top_n, bias, profile=shard_profile)
+    result["profile"] = shard_profile
+    return result
+
+
+def search_batch_in_shard(sharded: ShardedIndex, locality: str, queries: List[str], top_n: int) -> List[dict]:
+    return search_address_batch_levenshtein(sharded.shards[locality], queries, top_n)
+
+
+def reverse_in_shard(sharded: ShardedIndex, locality: str, points: List[Tuple[float, float]], k: int,
+                     max_distance: Optional[float] = None) -> List[List[dict]]:
+    index = sharded.shards[locality]
+    return [index.nearest(lat, lon, k, max_distance) for lat, lon in points]
+
+
+def suggest_in_shards(sharded: ShardedIndex, shards: List[str], text: str, limit: int) -> List[dict]:
+    """Подсказки из нескольких шардов вперемешку: по одной из каждого по очереди"""
+    per_shard = []
+    for name in shards:
+        index = sharded.shards[name]
+        per_shard.append(index.suggest(text, limit) if isinstance(index, DiskIndex) else suggest(index, text, limit))
+    merged = [item for row in itertools.zip_longest(*per_shard) for item in row if item is not None]
+    return merged[:limit]
+
+
+def close_retired(previous: Optional[ShardedIndex], current: ShardedIndex):
+    """Закрывает шарды previous, которых нет в current (соединения дискового индекса)"""
+    if previous is None:
+        return
+    kept = {id(shard) for shard in current.shards.values()}
+    for shard in previous.shards.values():
+        if id(shard) not in kept and hasattr(shard, "close"):
+            shard.close()
+
+
+def open_shards(specs: List[Tuple[str, str, str]], candidate_limit: int = DEFAULT_CANDIDATE_LIMIT):
+    """Открывает шарды по спецификациям (locality, dataset_path, snapshot_path).
+
+    Возвращает (ShardedIndex, {locality: источник}).
+    """
+    shards, sources = {}, {}
+    for locality, dataset_path, snapshot_path in specs:
+        index, source = open_index(dataset_path, snapshot_path, candidate_limit)
+        index.locality = locality
+        shards[locality] = index
+        sources[locality] = source
+    return ShardedIndex(shards), sources
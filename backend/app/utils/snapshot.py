@@ -0,0 +1,146 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from app.utils.address_index import DEFAULT_CANDIDATE_LIMIT, AddressIndex, InternedStrings, PackedStrings
+from app.utils.geo import GridIndex
+from app.utils.house import HOUSE_FIELDS
+
+SNAPSHOT_FORMAT = 5
+META_FILE = "meta.json"
+
+# Строковые колонки индекса хранятся парой <name>.data.npy / <name>.offsets.npy;
+# у интернированных колонок домов это уникальные значения, а коды домов —
+# <codes>.codes.npy (house_original и house_keys делят одни коды)
+STRING_FIELDS = ("streets", "street_original", "house_original", "house_keys")
+INTERNED_FIELDS = {"street_original": "street", "house_original": "house", "house_keys": "house"}
+ARRAY_FIELDS = ("offsets", "lon", "lat")
+# Пространственная сетка: массивы geo.<name>.npy, скаляры — в meta.json
+GEO_FIELDS = ("order", "starts")
+
+
+def _save_array(path, name, array):
+    np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(array))
+
+
+def _load_array(path, name, mmap_mode):
+    return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+
+
+def save_snapshot(index: AddressIndex, path: str, source: str = "") -> dict:
+    """Записывает индекс в каталог path набором .npy-файлов и meta.json.
+
+    Снапшот собирается в соседнем каталоге path.tmp и подменяет прежний
+    переименованием: meta.json старой сборки никогда не лежит рядом с .npy новой.
+    Индекс, открытый через mmap из прежнего каталога, читает старые файлы, пока
+    его не заменит перезагрузка.
+    """
+    path = os.path.normpath(path)
+    if os.path.isdir(path) and os.listdir(path) and not is_snapshot(path):
+        raise ValueError(f"{path} exists and is not a snapshot directory")
+    final_path, path = path, path + ".tmp"
+    # Остаток прерванной сборки
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+    strings = {"streets": PackedStrings.from_list(index.streets)}
+    for name, codes in INTERNED_FIELDS.items():
+        _save_array(path, f"{codes}.codes", getattr(index, name).codes)
+        strings[name] = getattr(index, name).values
+    for name, packed in strings.items():
+        _save_array(path, f"{name}.data", packed.data)
+        _save_array(path, f"{name}.offsets", packed.offsets)
+    for name in ARRAY_FIELDS + HOUSE_FIELDS:
+        _save_array(path, name, getattr(index, name))
+    for name in GEO_FIELDS:
+        _save_array(path, f"geo.{name}", getattr(index.geo, name))
+
+    meta = {
+        "format": SNAPSHOT_FORMAT,
+        "source": source,
+        "version": index.version,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "streets": index.n_streets,
+        "houses": len(index),
+        "coord_scale": index.coord_scale,
+        "geo": index.geo.params(),
+    }
+    # meta.json пишется последним: его наличие означает, что снапшот целиком на диске
+    with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    if os.path.isdir(final_path):
+        retired = final_path + ".old"
+        shutil.rmtree(retired, ignore_errors=True)
+        os.rename(final_path, retired)
+        os.rename(path, final_path)
+        shutil.rmtree(retired, ignore_errors=True)
+    else:
+        os.rename(path, final_path)
+    return meta
+
+
+def _meta_stat(path: str) -> tuple:
+    stat = os.stat(os.path.join(path, META_FILE))
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def load_snapshot(path: str, mmap_mode: str = "r", candidate_limit: int = DEFAULT_CANDIDATE_LIMIT) -> AddressIndex:
+    """Открывает снапшот через mmap: страницы общие для всех воркеров на хосте.
+
+    Если снапшот подменили во время чтения, файлы разных сборок не смешиваются —
+    снапшот читается заново.
+    """
+    while True:
+        meta_stat = _meta_stat(path)
+        index = _load_snapshot(path, mmap_mode, candidate_limit)
+        if _meta_stat(path) == meta_stat:
+            return index
+
+
+def _load_snapshot(path: str, mmap_mode: str, candidate_limit: int) -> AddressIndex:
+    with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format: {meta.get('format')}")
+
+    strings = {
+        name: PackedStrings(
+            _load_array(path, f"{name}.data", mmap_mode),
+            _load_array(path, f"{name}.offsets", mmap_mode),
+        )
+        for name in STRING_FIELDS
+    }
+    codes = {name: _load_array(path, f"{name}.codes", mmap_mode) for name in set(INTERNED_FIELDS.values())}
+    for name, codes_name in INTERNED_FIELDS.items():
+        strings[name] = InternedStrings(codes[codes_name], strings[name])
+    arrays = {name: _load_array(path, name, mmap_mode) for name in ARRAY_FIELDS}
+    geo = GridIndex(
+        arrays["lon"], arrays["lat"],
+        **{name: _load_array(path, f"geo.{name}", mmap_mode) for name in GEO_FIELDS},
+        **meta["geo"],
+    )
+
+    return AddressIndex(
+        # rapidfuzz нужен список str; уникальных улиц немного, их декодируем сразу
+        streets=strings.pop("streets").tolist(),
+        **strings,
+        **arrays,
+        version=meta.get("version", ""),
+        candidate_limit=candidate_limit,
+        geo=geo,
+        coord_scale=meta["coord_scale"],
+        house_parts={name: _load_array(path, name, mmap_mode) for name in HOUSE_FIELDS},
+    )
+
+
+def snapshot_mtime(path: str) -> int:
+    """Время записи meta.json (нс) — меняется при каждой пересборке снапшота"""
+    return os.stat(os.path.join(path, META_FILE)).st_mtime_ns
+
+
+def is_snapshot(path: str) -> bool:
+    return bool(path) and os.path.isfile(os.path.join(path, META_FILE))
@@ -0,0 +1,137 @@
+import bisect
+import re
+
+import numpy as np
+
+from app.utils.normalize import STREET_TYPE_NAMES, STREET_TYPES, fold, normalize_street
+
+# Сколько подходящих по префиксу ключей просматривается для ранжирования
+SCAN_LIMIT = 256
+_SEPARATORS = re.compile(r"[\s,]+")
+
+
+def suggest_tokens(text):
+    """Токены ввода без типов улиц; последний токен не трогаем — он может быть недописан"""
+    tokens = [t for t in _SEPARATORS.split(fold(text)) if t]
+    if not tokens:
+        return []
+    return [t for t in tokens[:-1] if t.rstrip(".") not in STREET_TYPES] + tokens[-1:]
+
+
+def house_input(text):
+    """(улица, начало номера) для ввода вида «тверская проспект 1»; None, если номер не начат"""
+    tokens = [t for t in _SEPARATORS.split(fold(text)) if t]
+    if len(tokens) < 2 or not tokens[-1][:1].isdigit():
+        return None
+    return " ".join(tokens[:-1]), tokens[-1]
+
+
+def complete_street_keys(street):
+    """Варианты полного названия улицы группами по очереди: с введённым типом, затем без него и с другими типами"""
+    words = normalize_street(street).split()
+    typed = words.pop() if len(words) > 1 and words[-1] in STREET_TYPE_NAMES else None
+    name = " ".join(words)
+    others = [name] + [f"{name} {street_type}" for street_type in sorted(STREET_TYPE_NAMES) if street_type != typed]
+    return [[f"{name} {typed}"], others] if typed else [others]
+
+
+def _house_order(key):
+    """Естественный порядок номеров: 2 < 10 < 10к1"""
+    digits = re.match(r"\d*", key).group(0)
+    return (int(digits) if digits else 0, key)
+
+
+class PrefixIndex:
+    """Отсортированный массив ключей для подсказок: каждый суффикс названия улицы по словам.
+
+    Поиск — bisect по префиксу: «тверск» находит и «тверская улица», и
+    «1-я тверская-ямская улица» (через ключ «тверская-ямская улица»).
+    Номера домов подсказываются бинарным поиском по отсортированным номерам улицы.
+    """
+
+    def __init__(self, streets, house_counts):
+        entries = []
+        for street_id, street in enumerate(streets):
+            words = fold(street).split()
+            for pos in range(len(words)):
+                if pos and words[pos] in STREET_TYPE_NAMES:
+                    continue
+                entries.append((" ".join(words[pos:]), pos, street_id))
+        entries.sort()
+        self.keys = [key for key, _, _ in entries]
+        self.positions = np.array([pos for _, pos, _ in entries], dtype=np.int32)
+        self.street_ids = np.array([street_id for _, _, street_id in entries], dtype=np.int64)
+        self.house_counts = house_counts
+
+    def _range(self, prefix):
+        left = bisect.bisect_left(self.keys, prefix)
+        right = bisect.bisect_left(self.keys, prefix + "￿")
+        return left, min(right, left + SCAN_LIMIT)
+
+    def streets(self, prefix, limit):
+        """id улиц с префиксом: сначала совпадения с начала названия, затем по числу домов"""
+        left, right = self._range(prefix)
+        street_ids = self.street_ids[left:right]
+        # Ключи в диапазоне уже по алфавиту, lexsort устойчив: при равенстве — алфавитный порядок
+        order = np.lexsort((-self.house_counts[street_ids], self.positions[left:right] > 0))
+        ranked = street_ids[order]
+        _, first = np.unique(ranked, return_index=True)
+        return ranked[np.sort(first)][:limit].tolist()
+
+    def complete_streets(self, keys):
+        """id улиц, полное название которых — один из keys (complete_street_keys)"""
+        found = []
+        for key in keys:
+            i = bisect.bisect_left(self.keys, key)
+            while i < len(self.keys) and self.keys[i] == key:
+                if self.positions[i] == 0:
+                    found.append(int(self.street_ids[i]))
+                i += 1
+        return found
+
+
+def suggest(index, text, limit=10):
+    """Подсказки по началу ввода: улицы, а после полного названия улицы — её дома"""
+    tokens = suggest_tokens(text)
+    if not tokens:
+        return []
+
+    prefix_index = index.prefix
+    # «тверская улица 1» — улица введена целиком, подсказываем номера домов
+    # Сначала улица с введённым типом, другие типы — только если у неё нет таких домов
+    house = house_input(text)
+    for keys in complete_street_keys(house[0]) if house is not None else []:
+        street_ids = prefix_index.complete_streets(keys)
+        results = _house_suggestions(index, street_ids, house[1], limit) if street_ids else []
+        if results:
+            return results
+
+    return [_street_suggestion(index, street_id) for street_id in prefix_index.streets(" ".join(tokens), limit)]
+
+
+def _street_suggestion(index, street_id):
+    first = index.street_houses(street_id).start
+    street = index.street_original[first]
+    return {"text": street, "locality": index.locality, "street": street, "number": None, "lon": None, "lat": None}
+
+
+def _house_suggestions(index, street_ids, house_prefix, limit):
+    results = []
+    for street_id in street_ids:
+        block = index.street_houses(street_id)
+        keys = index.house_keys[block]
+        left = bisect.bisect_left(keys, house_prefix)
+        right = bisect.bisect_left(keys, house_prefix + "￿")
+        for i in sorted(range(left, right), key=lambda i: _house_order(keys[i]))[:limit]:
+            house_idx = block.start + i
+            street, number = index.street_original[house_idx], index.house_original[house_idx]
+            lon, lat = index.point(house_idx)
+            results.append({
+                "text": f"{street} {number}",
+                "locality": index.locality,
+                "street": street,
+                "number": number,
+                "lon": lon,
+                "lat": lat,
+            })
+    return results[:limit]
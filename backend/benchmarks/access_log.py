@@ -0,0 +1,129 @@
+"""Пропускная способность приложения с журналом доступа и без него.
+
+    python -m benchmarks.access_log -n 5000 --concurrency 32
+
+Запросы идут в процессе через httpx.ASGITransport к пустым endpoint'ам, так что
+разница между вариантами — стоимость самого middleware. Журнал пишется в os.devnull
+через ту же очередь, что и в приложении. Вариант legacy — прежний LoggingMiddleware
+на BaseHTTPMiddleware. Печатает JSON: запросов в секунду и p50/p99 по вариантам.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import httpx
+import numpy as np
+import structlog
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.logging import configure_logging, flush_logs
+from app.core.middleware import AccessLogMiddleware, parse_body
+
+logger = structlog.get_logger()
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    """Прежний LoggingMiddleware из app/core/middleware.py"""
+
+    async def dispatch(self, request: Request, call_next):
+        raw = await request.body()
+        body_bytes = bytes(raw)
+        request_body = parse_body(body_bytes)
+        request.state._body = body_bytes
+        query_params = dict(request.query_params)
+        path_params = dict(request.path_params)
+
+        response = await call_next(request)
+
+        response_body = None
+        if isinstance(response, JSONResponse):
+            response_body = parse_body(bytes(response.body))
+
+        logger.info(
+            "request_completed",
+            method=request.method,
+            path=request.url.path,
+            status=response.status_code,
+            path_params=path_params or None,
+            query_params=query_params or None,
+            request_body=request_body,
+            response_body=response_body,
+        )
+        return response
+
+
+def make_app(middleware=None, **options):
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping(q: str = ""):
+        return {"q": q}
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    if middleware is not None:
+        app.add_middleware(middleware, **options)
+    return app
+
+
+async def run(app, n, concurrency):
+    transport = httpx.ASGITransport(app=app)
+    body = json.dumps(["Тверская улица 7"] * 50, ensure_ascii=False).encode("utf-8")
+    latencies = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(count):
+            for i in range(count):
+                started = time.perf_counter()
+                if i % 4:
+                    await client.get("/ping", params={"q": "тверская 7"})
+                else:
+                    await client.post("/echo", content=body)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker(n // concurrency) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    ms = np.array(latencies) * 1000
+    return {
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", type=int, default=5000, help="Число запросов на вариант")
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    variants = {
+        "off": make_app(),
+        "sampled_0.1": make_app(AccessLogMiddleware, sample_rate=0.1),
+        "all": make_app(AccessLogMiddleware),
+        "all_with_bodies": make_app(AccessLogMiddleware, capture_bodies=True),
+        "legacy": make_app(LegacyLoggingMiddleware),
+    }
+
+    with open(os.devnull, "w") as devnull:
+        writer = configure_logging(stream=devnull, queue_size=100000)
+        results = {}
+        for name, app in variants.items():
+            asyncio.run(run(app, min(args.n, 500), args.concurrency))  # прогрев
+            results[name] = asyncio.run(run(app, args.n, args.concurrency))
+            flush_logs()
+        results["dropped_log_lines"] = writer.dropped
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
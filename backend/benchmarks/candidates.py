@@ -0,0 +1,70 @@
+"""Сравнение отбора кандидатов по триграммам с полным перебором улиц.
+
+    python -m benchmarks.candidates buildings_cleaned.csv -n 2000
+
+Печатает JSON: совпадение top-1 и всей выдачи с полным перебором (recall)
+и перцентили задержки одиночного поиска для обоих режимов.
+"""
+import argparse
+import copy
+import json
+import time
+
+import numpy as np
+
+from app.core.config import configs
+from app.utils.model import open_index, search_address_single_levenshtein
+from benchmarks.queries import make_queries
+
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return {f"p{p}": round(float(np.percentile(ms, p)), 3) for p in (50, 95, 99)}
+
+
+def run(index, queries, top_n):
+    latencies, results = [], []
+    for item in queries:
+        started = time.perf_counter()
+        res = search_address_single_levenshtein(index, item["query"], top_n)
+        latencies.append(time.perf_counter() - started)
+        results.append([(o["street"], o["number"]) for o in res["objects"]])
+    return results, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", nargs="?", default=configs.DATASET_PATH)
+    parser.add_argument("--snapshot", default="")
+    parser.add_argument("-n", type=int, default=1000, help="Число запросов")
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--candidate-limit", type=int, default=configs.CANDIDATE_LIMIT)
+    args = parser.parse_args()
+
+    index, source = open_index(args.csv, args.snapshot, args.candidate_limit)
+    brute = copy.copy(index)
+    brute.trigrams = None
+
+    queries = make_queries(index, args.n)
+    brute_results, brute_latencies = run(brute, queries, args.top_n)
+    ngram_results, ngram_latencies = run(index, queries, args.top_n)
+
+    top1 = sum(a[:1] == b[:1] for a, b in zip(brute_results, ngram_results)) / len(queries)
+    full = sum(a == b for a, b in zip(brute_results, ngram_results)) / len(queries)
+
+    print(json.dumps({
+        "source": source,
+        "streets": index.n_streets,
+        "queries": len(queries),
+        "candidate_limit": args.candidate_limit,
+        "top1_agreement": round(top1, 4),
+        "topn_agreement": round(full, 4),
+        "latency_ms": {
+            "brute_force": percentiles(brute_latencies),
+            "trigram": percentiles(ngram_latencies),
+        },
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
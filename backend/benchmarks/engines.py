@@ -0,0 +1,136 @@
+"""Дисковый индекс (SEARCH_ENGINE=sqlite) против индекса в памяти.
+
+    python -m benchmarks.engines buildings_cleaned.csv -n 1000
+
+Каждый движок замеряется в отдельном процессе на одном наборе запросов:
+время открытия, прирост RSS и RssAnon после открытия и прогона запросов,
+перцентили одиночного поиска, точность (как в benchmarks.suite) и доля
+запросов с тем же первым результатом, что у индекса в памяти. Движки:
+
+    memory    — AddressIndex из CSV
+    snapshot  — AddressIndex из снапшота через mmap
+    sqlite    — DiskIndex: кандидаты из FTS5 в базе, в памяти только кэш страниц SQLite
+
+Прогрев — те же запросы на индексе из первых строк датасета, поэтому кэш
+страниц SQLite в замере начинается пустым (первые запросы читают файл).
+"""
+import argparse
+import gc
+import json
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from app.core.config import configs
+from app.utils.model import build_disk_index, build_index, open_index, release_memory, \
+    search_address_single_levenshtein
+from app.utils.snapshot import save_snapshot
+from benchmarks.candidates import percentiles
+from benchmarks.memory import memory
+from benchmarks.queries import make_queries
+from benchmarks.suite import accuracy, load_queries, save_queries
+
+ENGINES = ("memory", "snapshot", "sqlite")
+
+
+def index_paths(engine, csv_path, workdir, prefix=""):
+    """(dataset_path, snapshot_path) для open_index"""
+    if engine == "snapshot":
+        return csv_path, f"{workdir}/{prefix}snapshot"
+    if engine == "sqlite":
+        return csv_path, f"{workdir}/{prefix}index.sqlite"
+    return csv_path, ""
+
+
+def measure(engine, args):
+    """Замер одного движка (в дочернем процессе); выдача пишется в results_<engine>.json"""
+    queries = load_queries(f"{args.workdir}/queries.jsonl")
+    warmup, _ = open_index(*index_paths(engine, f"{args.workdir}/head.csv", args.workdir, "head_"))
+    for item in queries[:50]:
+        search_address_single_levenshtein(warmup, item["query"], args.top_n)
+    del warmup
+    gc.collect()
+    release_memory()
+
+    rss_before, anon_before = memory()
+    started = time.perf_counter()
+    index, _ = open_index(*index_paths(engine, args.csv, args.workdir), args.candidate_limit)
+    open_seconds = time.perf_counter() - started
+    rss_open, _ = memory()
+
+    results, latencies = [], []
+    for item in queries:
+        started = time.perf_counter()
+        results.append(search_address_single_levenshtein(index, item["query"], args.top_n)["objects"])
+        latencies.append(time.perf_counter() - started)
+    with open(f"{args.workdir}/results_{engine}.json", "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False)
+    del results
+    gc.collect()
+    rss, anon = memory()
+
+    return {
+        "open_seconds": round(open_seconds, 3),
+        "index_bytes": sum(index.memory_usage().values()),
+        "rss_open_delta_bytes": rss_open - rss_before,
+        "rss_delta_bytes": rss - rss_before,
+        "rss_anon_delta_bytes": anon - anon_before,
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", nargs="?", default=configs.DATASET_PATH)
+    parser.add_argument("-n", type=int, default=1000, help="Число запросов")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--candidate-limit", type=int, default=configs.CANDIDATE_LIMIT)
+    parser.add_argument("--engine", choices=ENGINES, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.engine:
+        print(json.dumps(measure(args.engine, args)))
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        index = build_index(args.csv)
+        save_snapshot(index, f"{workdir}/snapshot", source=args.csv)
+        queries = make_queries(index, args.n, seed=args.seed)
+        save_queries(queries, f"{workdir}/queries.jsonl")
+        locality = index.locality
+        del index
+        started = time.perf_counter()
+        build_disk_index(args.csv, f"{workdir}/index.sqlite")
+        sqlite_build_seconds = time.perf_counter() - started
+
+        pd.read_csv(args.csv, sep=";", nrows=1000).to_csv(f"{workdir}/head.csv", sep=";", index=False)
+        save_snapshot(build_index(f"{workdir}/head.csv"), f"{workdir}/head_snapshot")
+        build_disk_index(f"{workdir}/head.csv", f"{workdir}/head_index.sqlite")
+
+        objects = {}
+        for engine in ENGINES:
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.engines", args.csv, "--top-n", str(args.top_n),
+                 "--candidate-limit", str(args.candidate_limit), "--engine", engine, "--workdir", workdir],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            results[engine] = json.loads(out.splitlines()[-1])
+            with open(f"{workdir}/results_{engine}.json", encoding="utf-8") as f:
+                objects[engine] = json.load(f)
+
+    results["sqlite"]["build_seconds"] = round(sqlite_build_seconds, 3)
+    for engine, report in results.items():
+        report["accuracy"] = accuracy(queries, objects[engine], locality)["all"]
+        same = sum(a[:1] == b[:1] for a, b in zip(objects[engine], objects["memory"]))
+        report["top1_agreement"] = round(same / len(queries), 4)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
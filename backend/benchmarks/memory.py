@@ -0,0 +1,138 @@
+"""Память процесса с поисковыми данными: прежний DataFrame против AddressIndex.
+
+    python -m benchmarks.memory buildings_cleaned.csv -n 1000
+
+Каждый вариант замеряется в отдельном процессе: RSS после прогрева (тот же
+вариант на первых строках датасета — ленивые импорты и кэши не попадают в
+замер), затем после загрузки данных и прогона запросов. Кроме полного RSS печатается его
+анонимная часть (RssAnon) — память, которую нельзя разделить между воркерами;
+страницы снапшота, отображённые через mmap, в неё не входят. Варианты:
+
+    dataframe  — DataFrame из read_csv + preprocess_dataframe, как его держал
+                 каждый воркер раньше (со списком нормализованных улиц)
+    index      — AddressIndex из CSV: интернированные строки, int32-координаты
+    snapshot   — тот же индекс из снапшота через mmap
+
+Для вариантов с индексом печатается отпечаток выдачи на одном наборе запросов:
+он должен совпадать, иначе снапшот отличается от индекса из CSV.
+Кратность уменьшения считается по RssAnon относительно варианта dataframe.
+data_bytes — memory_usage() индекса или memory_usage(deep=True) DataFrame
+(у DataFrame повторяющиеся строки считаются при каждом вхождении, поэтому
+сравнивать варианты лучше по RSS).
+"""
+import argparse
+import gc
+import hashlib
+import json
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+from app.core.config import configs
+from app.utils.model import build_index, preprocess_dataframe, release_memory, search_address_single_levenshtein
+from app.utils.snapshot import load_snapshot, save_snapshot
+from benchmarks.queries import make_queries
+from benchmarks.suite import load_queries, rss_bytes, save_queries
+
+VARIANTS = ("dataframe", "index", "snapshot")
+
+
+def memory():
+    """(RSS, RssAnon) процесса в байтах; RssAnon есть только в Linux, иначе равен RSS"""
+    rss = rss_bytes()
+    try:
+        with open("/proc/self/status") as f:
+            anon = next(int(line.split()[1]) * 1024 for line in f if line.startswith("RssAnon:"))
+    except (OSError, StopIteration):
+        anon = rss
+    return rss, anon
+
+
+def load(variant, csv_path, snapshot_path):
+    if variant == "dataframe":
+        df = pd.read_csv(csv_path, sep=";")
+        df, street_index = preprocess_dataframe(df.copy())
+        return (df, street_index), int(df.memory_usage(deep=True).sum()) + sys.getsizeof(street_index)
+    if variant == "snapshot":
+        index = load_snapshot(snapshot_path)
+    else:
+        index = build_index(csv_path)
+    return index, sum(index.memory_usage().values())
+
+
+def search(variant, data, queries, top_n):
+    """Отпечаток выдачи по всем запросам; результаты не накапливаются, чтобы не попасть в замер"""
+    if variant == "dataframe":
+        return None
+    digest = hashlib.sha1()
+    for query in queries:
+        objects = search_address_single_levenshtein(data, query, top_n)["objects"]
+        digest.update(json.dumps(objects, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def measure(variant, args):
+    """Замер одного варианта (в дочернем процессе): прирост RSS и RssAnon после загрузки и запросов"""
+    queries = [item["query"] for item in load_queries(f"{args.workdir}/queries.jsonl")]
+    warmup, _ = load(variant, f"{args.workdir}/head.csv", f"{args.workdir}/head_snapshot")
+    search(variant, warmup, queries[:50], args.top_n)
+    del warmup
+    gc.collect()
+    release_memory()
+
+    rss_before, anon_before = memory()
+    data, data_bytes = load(variant, args.csv, f"{args.workdir}/snapshot")
+    report = {"data_bytes": int(data_bytes)}
+    digest = search(variant, data, queries, args.top_n)
+    if digest is not None:
+        report["results_sha1"] = digest
+    gc.collect()
+    rss, anon = memory()
+    report["rss_delta_bytes"] = rss - rss_before
+    report["rss_anon_delta_bytes"] = anon - anon_before
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", nargs="?", default=configs.DATASET_PATH)
+    parser.add_argument("-n", type=int, default=1000, help="Число запросов для проверки выдачи")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(measure(args.variant, args)))
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        # Снапшоты, набор запросов и начало датасета для прогрева общие для всех вариантов
+        index = build_index(args.csv)
+        save_snapshot(index, f"{workdir}/snapshot", source=args.csv)
+        save_queries(make_queries(index, args.n, seed=args.seed), f"{workdir}/queries.jsonl")
+        pd.read_csv(args.csv, sep=";", nrows=1000).to_csv(f"{workdir}/head.csv", sep=";", index=False)
+        save_snapshot(build_index(f"{workdir}/head.csv"), f"{workdir}/head_snapshot")
+        del index
+        for variant in VARIANTS:
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.memory", args.csv, "--top-n", str(args.top_n),
+                 "--variant", variant, "--workdir", workdir],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            results[variant] = json.loads(out.splitlines()[-1])
+
+    base = results["dataframe"]["rss_anon_delta_bytes"]
+    for report in results.values():
+        report["rss_anon_reduction"] = round(base / max(report["rss_anon_delta_bytes"], 1), 1)
+    digests = {r["results_sha1"] for r in results.values() if "results_sha1" in r}
+    results["equal_results"] = len(digests) == 1
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Микробенчмарк нормализатора: прежние реализации против app.utils.normalize.
+
+    python -m benchmarks.normalize buildings_cleaned.csv
+
+Печатает JSON: время нормализации колонки улиц целиком (построчно старой
+функцией, построчно новой и пакетно) и одиночных запросов без кэша.
+"""
+import argparse
+import json
+import re
+import time
+
+import pandas as pd
+
+from app.core.config import configs
+from app.utils.normalize import normalize_address, normalize_house, normalize_street, normalize_street_column
+
+
+def legacy_normalize_street(street_name):
+    """Прежний normalize_street_name_cached из app/utils/model.py (без lru_cache)"""
+    if not street_name or pd.isna(street_name):
+        return ""
+    name = str(street_name).lower().strip()
+    replacements = [
+        ('ул.', 'улица'), ('ул ', 'улица '), (' ул ', ' улица '),
+        ('пер.', 'переулок'), ('пер ', 'переулок '), (' пер ', ' переулок '),
+        ('пр-т', 'проспект'), ('пр т', 'проспект'), (' пр-т ', ' проспект '),
+        ('б-р', 'бульвар'), ('б р', 'бульвар'), (' б-р ', ' бульвар '),
+        (' ш ', ' шоссе ')
+    ]
+    for old, new in replacements:
+        name = name.replace(old, new)
+    tokens = name.split()
+    street_type = None
+    for i, token in enumerate(tokens):
+        if token in {'улица', 'переулок', 'проспект', 'бульвар', 'шоссе'}:
+            street_type = token
+            tokens.pop(i)
+            break
+    if street_type:
+        return (' '.join(tokens).capitalize() + ' ' + street_type).lower().strip()
+    return ' '.join(tokens).capitalize().lower().strip()
+
+
+LEGACY_STREET_TYPES = {
+    "ул": "улица", "ул.": "улица", "пер": "переулок", "пер.": "переулок", "пр-т": "проспект",
+    "пр.": "проспект", "ш": "шоссе", "бул": "бульвар", "пл": "площадь",
+}
+
+
+def legacy_normalize_address(raw_address, default_city="Москва"):
+    """Прежний normalize_address из app/services/address_service.py"""
+    addr = raw_address.lower()
+    addr = re.sub(r"[.,]", "", addr)
+    addr = re.sub(r"\s+", " ", addr).strip()
+    house_match = re.search(r"(\d+\s*[кс]?\d*)$", addr)
+    house_part = house_match.group(1).strip() if house_match else ""
+    street_part = addr[:house_match.start()].strip() if house_match else addr
+    for abbr, full in LEGACY_STREET_TYPES.items():
+        street_part = re.sub(r"\b" + re.escape(abbr) + r"\b", full, street_part)
+    street_words = street_part.split()
+    if street_words and street_words[0] in LEGACY_STREET_TYPES.values():
+        street_words = street_words[1:] + [street_words[0]]
+    normalized = f"{default_city}, {' '.join(w.capitalize() for w in street_words)}"
+    return normalized + f", {house_part}" if house_part else normalized
+
+
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        # Без прогретого lru_cache, чтобы сравнение было честным
+        normalize_street.cache_clear()
+        normalize_house.cache_clear()
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return round(best * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", nargs="?", default=configs.DATASET_PATH)
+    args = parser.parse_args()
+
+    column = pd.read_csv(args.csv, sep=";", usecols=["street", "addr:street", "addr:housenumber"])
+    streets = column["street"]
+    addresses = (column["addr:street"] + ", " + column["addr:housenumber"].astype(str)).tolist()[:20000]
+
+    print(json.dumps({
+        "rows": len(streets),
+        "unique_streets": int(streets.nunique()),
+        "street_column_ms": {
+            "legacy_apply": timed(lambda: streets.apply(legacy_normalize_street)),
+            "rowwise": timed(lambda: streets.apply(normalize_street.__wrapped__)),
+            "bulk": timed(normalize_street_column, streets),
+        },
+        "address_ms_per_20k": {
+            "legacy": timed(lambda: [legacy_normalize_address(a) for a in addresses]),
+            "single_pass": timed(lambda: [normalize_address(a) for a in addresses]),
+        },
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import random
+
+from app.utils.address_index import AddressIndex
+from app.utils.phonetic import CYRILLIC_TO_LATIN
+
+RUSSIAN_LETTERS = "абвгдеёжзийклмнопрстуфхцчшщыэюя"
+
+ABBREVIATIONS = {
+    "улица": "ул.",
+    "переулок": "пер.",
+    "проспект": "пр-т",
+    "бульвар": "б-р",
+    "шоссе": "ш",
+}
+
+# Другие распространённые схемы транслита для отдельных букв (к CYRILLIC_TO_LATIN)
+LATIN_VARIANTS = {
+    "й": ("i", "j"), "ж": ("j",), "х": ("h",), "ц": ("c", "tz"), "щ": ("sch",),
+    "ю": ("ju", "iu"), "я": ("ja", "ia"), "ё": ("yo",), "ы": ("i",),
+}
+
+# Написание «на слух»: безударные о/а и е/и, ё и е, мягкий знак
+PHONETIC_SWAPS = (("о", "а"), ("а", "о"), ("е", "и"), ("и", "е"), ("ё", "е"), ("ь", ""))
+
+
+def add_typo(text: str, rng: random.Random) -> str:
+    """Одна случайная опечатка: замена, пропуск, вставка или перестановка букв"""
+    if len(text) < 4:
+        return text
+    i = rng.randrange(1, len(text) - 1)
+    kind = rng.choice(("replace", "delete", "insert", "swap"))
+    if kind == "replace":
+        return text[:i] + rng.choice(RUSSIAN_LETTERS) + text[i + 1:]
+    if kind == "delete":
+        return text[:i] + text[i + 1:]
+    if kind == "insert":
+        return text[:i] + rng.choice(RUSSIAN_LETTERS) + text[i:]
+    return text[:i - 1] + text[i] + text[i - 1] + text[i + 1:]
+
+
+def abbreviate(text: str) -> str:
+    for full, short in ABBREVIATIONS.items():
+        text = text.replace(full, short).replace(full.capitalize(), short)
+    return text
+
+
+def latinize(text: str, rng: random.Random) -> str:
+    """Улица латиницей: транслит, где у части букв — другая схема записи"""
+    letters = []
+    for char in text:
+        lower = char.lower()
+        latin = CYRILLIC_TO_LATIN.get(lower)
+        if latin is None:
+            letters.append(char)
+            continue
+        if lower in LATIN_VARIANTS and rng.random() < 0.5:
+            latin = rng.choice(LATIN_VARIANTS[lower])
+        letters.append(latin.capitalize() if char != lower else latin)
+    return "".join(letters)
+
+
+def misspell(text: str, rng: random.Random) -> str:
+    """Ошибка «на слух»: одна замена из PHONETIC_SWAPS, если она возможна"""
+    swaps = [(a, b) for a, b in PHONETIC_SWAPS if a in text]
+    if not swaps:
+        return add_typo(text, rng)
+    a, b = rng.choice(swaps)
+    positions = [i for i in range(len(text)) if text.startswith(a, i)]
+    i = rng.choice(positions)
+    return text[:i] + b + text[i + len(a):]
+
+
+def reorder(text: str, rng: random.Random) -> str:
+    tokens = text.split()
+    rng.shuffle(tokens)
+    return " ".join(tokens)
+
+
+def make_queries(index: AddressIndex, n: int, seed: int = 42,
+                 kinds=("exact", "typo", "abbreviation", "reordered")) -> list:
+    """Размеченный набор запросов по адресам индекса.
+
+    Каждый элемент: {"query", "street", "number", "kind"}, где kind —
+    exact / typo / abbreviation / reordered, а также latin / phonetic, если
+    они есть в kinds.
+    """
+    rng = random.Random(seed)
+    queries = []
+    for i in range(n):
+        house_idx = rng.randrange(len(index))
+        street = index.street_original[house_idx]
+        number = index.house_original[house_idx]
+        kind = kinds[i % len(kinds)]
+
+        text = street
+        if kind == "typo":
+            text = add_typo(street, rng)
+        elif kind == "abbreviation":
+            text = abbreviate(street)
+        elif kind == "reordered":
+            text = reorder(street, rng)
+        elif kind == "latin":
+            text = latinize(street, rng)
+        elif kind == "phonetic":
+            text = misspell(street, rng)
+
+        queries.append({"query": f"{text} {number}".strip(), "street": street, "number": number, "kind": kind})
+    return queries
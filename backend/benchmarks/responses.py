@@ -0,0 +1,94 @@
+"""Стоимость сериализации ответов поиска: response_model + стандартный JSON против FastJSONResponse.
+
+    python -m benchmarks.responses buildings_cleaned.csv --batch 500 -n 200
+
+Ответы — настоящие результаты пакетного поиска (top_n=10), посчитанные заранее,
+так что endpoint'ы ничего не ищут и разница между вариантами — валидация и
+кодирование. Запросы идут в процессе через httpx.ASGITransport. Варианты:
+
+    legacy       — dict через response_model=BatchSearchResponse и JSONResponse, как раньше
+    fast         — FastJSONResponse (orjson, если установлен) без повторной валидации
+    fast_gzip    — то же с GZipMiddleware (размер ответа — сжатый)
+
+Печатает JSON: запросов в секунду, p50/p99 и размер ответа по вариантам.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+
+from app.core.config import configs
+from app.core.responses import FastJSONResponse
+from app.schema.address import BatchSearchResponse
+from app.utils.model import open_index, search_address_batch_levenshtein
+from benchmarks.queries import make_queries
+
+
+def make_app(payload, variant):
+    app = FastAPI()
+
+    if variant == "legacy":
+        @app.get("/batch", response_model=BatchSearchResponse)
+        async def batch():
+            return payload
+    else:
+        @app.get("/batch", response_model=BatchSearchResponse)
+        async def batch():
+            return FastJSONResponse(payload)
+
+    if variant == "fast_gzip":
+        app.add_middleware(GZipMiddleware, minimum_size=configs.GZIP_MIN_SIZE or 1024,
+                           compresslevel=configs.GZIP_LEVEL)
+    return app
+
+
+async def run(app, n):
+    transport = httpx.ASGITransport(app=app)
+    latencies, size = [], 0
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        for _ in range(n):
+            request_started = time.perf_counter()
+            response = await client.get("/batch", headers={"Accept-Encoding": "gzip"})
+            latencies.append(time.perf_counter() - request_started)
+            size = int(response.headers.get("content-length", 0))
+        elapsed = time.perf_counter() - started
+
+    ms = np.array(latencies) * 1000
+    return {
+        "rps": round(n / elapsed, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "response_bytes": size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", nargs="?", default=configs.DATASET_PATH)
+    parser.add_argument("--snapshot", default="")
+    parser.add_argument("--batch", type=int, default=500, help="Адресов в одном ответе")
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("-n", type=int, default=200, help="Запросов на вариант")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    index, _ = open_index(args.csv, args.snapshot)
+    texts = [item["query"] for item in make_queries(index, args.batch, seed=args.seed)]
+    payload = {"results": search_address_batch_levenshtein(index, texts, args.top_n)}
+
+    results = {}
+    for variant in ("legacy", "fast", "fast_gzip"):
+        app = make_app(payload, variant)
+        asyncio.run(run(app, min(args.n, 20)))  # прогрев
+        results[variant] = asyncio.run(run(app, args.n))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
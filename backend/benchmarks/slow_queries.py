@@ -0,0 +1,94 @@
+"""Проигрывание журнала медленных запросов (SLOW_QUERY_LOG_PATH) на локальном индексе.
+
+    python -m benchmarks.slow_queries slow_queries.log buildings_cleaned.csv --repeat 5
+
+Журнал читается вместе с ротированными файлами (slow_queries.log.N, ..., .1).
+Каждый уникальный запрос (адрес, top_n, область карты) ищется --repeat раз
+с профилем; в отчёте — время из журнала и медиана повтора, этапы и счётчики
+кандидатов последнего прогона, перцентили по всем запросам и средняя доля
+этапов. Так видно, воспроизводится ли медленный запрос вне нагрузки и какой
+этап его тормозит, и можно сравнить версии на одних и тех же запросах.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.core.config import configs
+from app.core.profiling import log_files
+from app.utils.geo import GeoBias
+from app.utils.model import open_index, search_address_single_levenshtein
+from benchmarks.candidates import percentiles
+
+
+def load_slow_queries(path):
+    """Уникальные записи журнала (последняя по каждому запросу) и сколько раз каждая встретилась"""
+    entries, seen = {}, {}
+    for name in log_files(path):
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                key = (item["query"], item.get("top_n", 3), json.dumps(item.get("bias"), sort_keys=True))
+                entries[key] = item
+                seen[key] = seen.get(key, 0) + 1
+    return [dict(item, occurrences=seen[key]) for key, item in entries.items()]
+
+
+def replay(index, item, repeat):
+    bias = item.get("bias")
+    if bias is not None:
+        bias = GeoBias(**{**bias, "bbox": tuple(bias["bbox"]) if bias.get("bbox") else None})
+    latencies, profile = [], None
+    for _ in range(repeat):
+        profile = {}
+        started = time.perf_counter()
+        search_address_single_levenshtein(index, item["query"], item.get("top_n", 3), bias, profile=profile)
+        latencies.append(time.perf_counter() - started)
+    return latencies, profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", nargs="?", default=configs.SLOW_QUERY_LOG_PATH, help="Журнал медленных запросов")
+    parser.add_argument("csv", nargs="?", default=configs.DATASET_PATH)
+    parser.add_argument("--snapshot", default="")
+    parser.add_argument("--candidate-limit", type=int, default=configs.CANDIDATE_LIMIT)
+    parser.add_argument("--repeat", type=int, default=5, help="Повторов каждого запроса")
+    parser.add_argument("--top", type=int, default=20, help="Сколько самых медленных запросов показать")
+    args = parser.parse_args()
+
+    items = load_slow_queries(args.log)
+    if not items:
+        parser.error(f"no slow queries in {args.log}")
+    index, _ = open_index(args.csv, args.snapshot, args.candidate_limit)
+
+    report, medians, stages = [], [], {}
+    for item in items:
+        latencies, profile = replay(index, item, args.repeat)
+        median = float(np.median(latencies))
+        medians.append(median)
+        for name, ms in profile.get("stages_ms", {}).items():
+            stages[name] = stages.get(name, 0.0) + ms
+        report.append({
+            "query": item["query"],
+            "occurrences": item["occurrences"],
+            "recorded_ms": item.get("profile", {}).get("duration_ms"),
+            "replay_ms": round(median * 1000, 3),
+            "profile": profile,
+        })
+
+    report.sort(key=lambda row: -row["replay_ms"])
+    total = sum(stages.values()) or 1.0
+    print(json.dumps({
+        "queries": len(items),
+        "replay_ms": percentiles(medians),
+        "stage_share": {name: round(ms / total, 3) for name, ms in stages.items()},
+        "slowest": report[:args.top],
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
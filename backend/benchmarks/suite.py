@@ -0,0 +1,221 @@
+"""Воспроизводимый замер точности и производительности поиска.
+
+    python -m benchmarks.suite buildings_cleaned.csv -n 2000 -o results.json
+    python -m benchmarks.suite --queries queries.jsonl --url http://localhost:8000
+
+Набор запросов генерируется по индексу (make_queries: точные, с опечаткой,
+с сокращённым типом улицы, с переставленными словами; seed фиксирован) или
+читается из JSONL с полями query, street, number. --save-queries сохраняет
+сгенерированный набор, чтобы сравнивать версии на одних и тех же запросах.
+
+Без --url замеряется движок в процессе: время открытия индекса, память,
+перцентили одиночного поиска и пропускная способность пакетного. С --url —
+запущенное приложение по HTTP (/api/search и /api/search/batch); пакетный прогон
+идёт после одиночного по тем же запросам, поэтому для замера без кэша результатов
+сервис запускают с CACHE_MAX_SIZE=0 (попадания в кэш видны в отчёте). Точность в
+обоих режимах: доля запросов с верным домом на первом месте и в top-3 и средний
+compute_score первого результата. Результат — JSON в stdout или в --output.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import time
+
+from app.core.config import configs
+from app.services.address_service import compute_score
+from app.utils.model import open_index, search_address_batch_levenshtein, search_address_single_levenshtein
+from benchmarks.candidates import percentiles
+from benchmarks.queries import make_queries
+
+
+def rss_bytes() -> int:
+    """Текущий RSS процесса (Linux), иначе пиковый"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def load_queries(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_queries(queries, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for item in queries:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+
+def accuracy(queries, results, locality):
+    """top-1/top-3 по совпадению улицы и номера, средний compute_score первого результата; по видам запросов"""
+    groups = {}
+    for item, objects in zip(queries, results):
+        found = [(o["street"], o["number"]) for o in objects]
+        truth = (item["street"], str(item["number"]))
+        if objects:
+            best = objects[0]
+            score = compute_score(f"{locality}, {best['street']}, {best['number']}",
+                                  f"{locality}, {item['street']}, {item['number']}")
+        else:
+            score = 0.0
+        for name in ("all", item.get("kind", "custom")):
+            group = groups.setdefault(name, {"queries": 0, "top1": 0, "top3": 0, "score": 0.0})
+            group["queries"] += 1
+            group["top1"] += found[:1] == [truth]
+            group["top3"] += truth in found[:3]
+            group["score"] += score
+
+    return {
+        name: {
+            "queries": g["queries"],
+            "top1": round(g["top1"] / g["queries"], 4),
+            "top3": round(g["top3"] / g["queries"], 4),
+            "compute_score": round(g["score"] / g["queries"], 4),
+        }
+        for name, g in groups.items()
+    }
+
+
+def run_in_process(args, queries):
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    index, source = open_index(args.csv, args.snapshot, args.candidate_limit)
+    cold_start = time.perf_counter() - started
+    rss_after = rss_bytes()
+
+    if queries is None:
+        queries = make_queries(index, args.n, seed=args.seed)
+
+    results, latencies = [], []
+    for item in queries:
+        started = time.perf_counter()
+        res = search_address_single_levenshtein(index, item["query"], args.top_n)
+        latencies.append(time.perf_counter() - started)
+        results.append(res["objects"])
+
+    texts = [item["query"] for item in queries]
+    started = time.perf_counter()
+    search_address_batch_levenshtein(index, texts, args.top_n)
+    batch_seconds = time.perf_counter() - started
+
+    report = {
+        "target": "in-process",
+        "source": source,
+        "index_version": index.version,
+        "streets": index.n_streets,
+        "houses": len(index),
+        "cold_start_seconds": round(cold_start, 3),
+        "memory": {
+            "index_bytes": sum(index.memory_usage().values()),
+            "rss_index_delta_bytes": rss_after - rss_before,
+            "rss_bytes": rss_bytes(),
+        },
+        "latency_ms": percentiles(latencies),
+        "batch": {"queries": len(texts), "seconds": round(batch_seconds, 3),
+                  "qps": round(len(texts) / batch_seconds, 1)},
+    }
+    return report, queries, results, index.locality
+
+
+def run_http(args, queries):
+    import httpx
+
+    if queries is None:
+        # Набор строится по локальной копии того же датасета
+        index, _ = open_index(args.csv, args.snapshot, args.candidate_limit)
+        queries = make_queries(index, args.n, seed=args.seed)
+        del index
+
+    with httpx.Client(base_url=args.url, timeout=args.timeout) as client:
+        ready = client.get("/health/ready").json()
+
+        results, latencies = [], []
+        for item in queries:
+            started = time.perf_counter()
+            response = client.get("/api/search", params={"address": item["query"]})
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+            results.append(response.json()["objects"])
+
+        texts = [item["query"] for item in queries]
+        started = time.perf_counter()
+        for i in range(0, len(texts), args.batch_size):
+            client.post("/api/search/batch", json=texts[i:i + args.batch_size],
+                        params={"top_n": args.top_n}).raise_for_status()
+        batch_seconds = time.perf_counter() - started
+        cache_after = client.get("/health/ready").json().get("cache", {})
+
+    cache_before = ready.get("cache", {})
+    report = {
+        "target": args.url,
+        "index_version": ready.get("version"),
+        "streets": ready.get("streets"),
+        "houses": ready.get("houses"),
+        "cold_start_seconds": ready.get("load_seconds"),
+        "cache": {
+            "backend": cache_after.get("backend"),
+            "hits": cache_after.get("hits", 0) - cache_before.get("hits", 0),
+            "misses": cache_after.get("misses", 0) - cache_before.get("misses", 0),
+        },
+        "latency_ms": percentiles(latencies),
+        "batch": {"queries": len(texts), "batch_size": args.batch_size, "seconds": round(batch_seconds, 3),
+                  "qps": round(len(texts) / batch_seconds, 1)},
+    }
+    locality = next(iter(ready.get("shards") or {configs.DEFAULT_LOCALITY: None}))
+    return report, queries, results, locality
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", nargs="?", default=configs.DATASET_PATH)
+    parser.add_argument("--snapshot", default="")
+    parser.add_argument("--queries", help="JSONL с полями query, street, number (и необязательным kind)")
+    parser.add_argument("--save-queries", help="Сохранить сгенерированный набор в JSONL")
+    parser.add_argument("-n", type=int, default=1000, help="Число генерируемых запросов")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--candidate-limit", type=int, default=configs.CANDIDATE_LIMIT)
+    parser.add_argument("--url", help="Замерять запущенное приложение по HTTP вместо движка в процессе")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("-o", "--output", help="Файл для JSON-результата")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries) if args.queries else None
+    if args.url:
+        report, queries, results, locality = run_http(args, queries)
+    else:
+        report, queries, results, locality = run_in_process(args, queries)
+    if args.save_queries:
+        save_queries(queries, args.save_queries)
+
+    report = {
+        "revision": git_revision(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "queries": len(queries),
+        "seed": None if args.queries else args.seed,
+        "top_n": args.top_n,
+        **report,
+        "accuracy": accuracy(queries, results, locality),
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
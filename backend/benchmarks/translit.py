@@ -0,0 +1,76 @@
+"""Запросы латиницей и с ошибками «на слух»: поиск с ключами транслита и фонетики против поиска по названиям.
+
+    python -m benchmarks.translit buildings_cleaned.csv -n 2000
+
+Смешанный набор: точные запросы кириллицей, латиницей (с разными схемами
+транслита: Tverskaja, Tverskaia, Tverskaya), с ошибкой «на слух» (о/а, е/и, ё, ь)
+и с обычной опечаткой. Варианты на одном индексе и одних запросах:
+
+    keys    — match_streets: ключи транслита и фонетическая таблица
+    names   — match_names: сравнение только с названиями улиц, как без ключей
+
+Печатает JSON: точность по видам запросов (как в benchmarks.suite), перцентили
+одиночного поиска и время пакетного, а также время сборки ключей и их размер.
+"""
+import argparse
+import copy
+import json
+import time
+
+from app.core.config import configs
+from app.utils.model import open_index, search_address_batch_levenshtein, search_address_single_levenshtein
+from app.utils.phonetic import StreetKeys
+from benchmarks.candidates import percentiles
+from benchmarks.queries import make_queries
+from benchmarks.suite import accuracy
+
+KINDS = ("exact", "latin", "phonetic", "typo")
+
+
+def measure(index, queries, top_n, batch=True):
+    results, latencies = [], []
+    for item in queries:
+        started = time.perf_counter()
+        results.append(search_address_single_levenshtein(index, item["query"], top_n)["objects"])
+        latencies.append(time.perf_counter() - started)
+    report = {"accuracy": accuracy(queries, results, index.locality), "latency_ms": percentiles(latencies)}
+    if batch:
+        started = time.perf_counter()
+        search_address_batch_levenshtein(index, [item["query"] for item in queries], top_n)
+        report["batch_seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", nargs="?", default=configs.DATASET_PATH)
+    parser.add_argument("--snapshot", default="")
+    parser.add_argument("-n", type=int, default=2000, help="Число запросов")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--candidate-limit", type=int, default=configs.CANDIDATE_LIMIT)
+    args = parser.parse_args()
+
+    index, _ = open_index(args.csv, args.snapshot, args.candidate_limit)
+    queries = make_queries(index, args.n, seed=args.seed, kinds=KINDS)
+
+    started = time.perf_counter()
+    StreetKeys(index.streets, trigrams=bool(args.candidate_limit))
+    keys_seconds = time.perf_counter() - started
+
+    # Без ключей: тот же индекс, но улицы сравниваются только с названиями.
+    # Пакетный поиск ключи использует всегда, поэтому для names он не замеряется
+    names = copy.copy(index)
+    names.match_streets = index.match_names
+
+    results = {
+        "keys": measure(index, queries, args.top_n),
+        "names": measure(names, queries, args.top_n, batch=False),
+    }
+    results["keys"]["build_seconds"] = round(keys_seconds, 3)
+    results["keys"]["bytes"] = index.memory_usage().get("keys", 0)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
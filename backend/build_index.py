@@ -0,0 +1,49 @@
+import argparse
+import asyncio
+import time
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import configs
+from app.core.database import create_engine
+from app.utils.model import build_disk_index, build_index
+from app.services.ingest_service import build_disk_index_from_db
+from app.utils.snapshot import save_snapshot
+
+
+async def build_from_db(database_url, output):
+    engine = create_engine(database_url)
+    try:
+        return await build_disk_index_from_db(async_sessionmaker(engine, expire_on_commit=False), output)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Собирает бинарный снапшот поискового индекса из CSV")
+    parser.add_argument("csv", nargs="?", default=configs.DATASET_PATH, help="CSV с адресами (sep=';')")
+    parser.add_argument("-o", "--output", help="Каталог снапшота или файл дискового индекса")
+    parser.add_argument("--sqlite", action="store_true",
+                        help="Дисковый индекс SQLite для SEARCH_ENGINE=sqlite вместо снапшота")
+    parser.add_argument("--from-db", action="store_true",
+                        help="Дисковый индекс по таблице адресов (как при SQLITE_INDEX_SOURCE=db), а не из CSV")
+    parser.add_argument("--database-url", default=configs.DATABASE_URI,
+                        help="БД для --from-db, например sqlite+aiosqlite:///addresses.db")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.from_db:
+        output = args.output or configs.SQLITE_INDEX_PATH
+        meta = asyncio.run(build_from_db(args.database_url, output))
+    elif args.sqlite:
+        output = args.output or configs.SQLITE_INDEX_PATH
+        meta = build_disk_index(args.csv, output)
+    else:
+        output = args.output or configs.INDEX_SNAPSHOT_PATH or "index_snapshot"
+        index = build_index(args.csv)
+        meta = save_snapshot(index, output, source=args.csv)
+    print(f"✅ {output}: {meta['streets']} улиц, {meta['houses']} домов за {time.perf_counter() - started:.2f} с")
+
+
+if __name__ == "__main__":
+    main()
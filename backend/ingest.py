@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import configs
+from app.core.database import create_engine
+from app.model.base_model import Base
+from app.repository.address_repository import AddressRepository
+from app.services.ingest_service import INGEST_FORMATS, IngestService
+
+
+async def run(args):
+    engine = create_engine(args.database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    chroma_repo = None
+    if args.vectors or args.reindex:
+        from app.core.database import get_collection
+        from app.repository.chromadb_repository import ChromaRepository
+        chroma_repo = ChromaRepository(get_collection())
+
+    def progress(rows, inserted):
+        print(f"… {rows} строк прочитано, {inserted} вставлено")
+
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        service = IngestService(AddressRepository(session), chroma_repo)
+        if args.reindex:
+            summary = await service.reindex_vectors(args.chunk_size, progress=lambda n: print(f"… {n} адресов"))
+            await engine.dispose()
+            print(f"✅ {summary['indexed']} векторов за {summary['seconds']} с")
+            return
+        summary = await service.ingest(
+            args.path,
+            fmt=args.format,
+            locality=args.locality,
+            chunk_size=args.chunk_size,
+            checkpoint_path=args.checkpoint,
+            progress=progress,
+        )
+        if configs.disk_index_from_db and summary["inserted"]:
+            # Запущенный сервис подхватит новый файл через INDEX_WATCH_INTERVAL или /api/admin/reload
+            meta = await service.build_disk_index()
+            print(f"✅ {configs.SQLITE_INDEX_PATH}: {meta['streets']} улиц, {meta['houses']} домов")
+    await engine.dispose()
+    print(f"✅ {summary['inserted']} адресов за {summary['seconds']} с (продолжено со строки {summary['resumed_from']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Массовая загрузка адресов в БД (и векторный индекс)")
+    parser.add_argument("path", nargs="?", help="CSV (sep=';', колонки как в buildings_cleaned.csv) или NDJSON")
+    parser.add_argument("--format", choices=INGEST_FORMATS, default=None,
+                        help="По умолчанию — по расширению файла")
+    parser.add_argument("--locality", default=configs.DEFAULT_LOCALITY)
+    parser.add_argument("--chunk-size", type=int, default=configs.INGEST_CHUNK_SIZE)
+    parser.add_argument("--checkpoint", default=None,
+                        help="Файл checkpoint: повторный запуск продолжит с последнего загруженного куска")
+    parser.add_argument("--database-url", default=configs.DATABASE_URI,
+                        help="Например sqlite+aiosqlite:///addresses.db для локальной проверки")
+    parser.add_argument("--vectors", action="store_true", help="Также записать эмбеддинги в Chroma")
+    parser.add_argument("--reindex", action="store_true",
+                        help="Ничего не загружать, переписать эмбеддинги в Chroma по всей таблице адресов")
+    args = parser.parse_args()
+    if not args.path and not args.reindex:
+        parser.error("path is required unless --reindex is given")
+    if args.format is None and args.path:
+        args.format = "ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv"
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,76 @@
+import asyncio
+import os
 import structlog
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.requests import Request
 from fastapi.exceptions import RequestValidationError, HTTPException
 
 from app.api.routers import main_router
+from app.api.endpoints.health import router as health_router
+from app.api.endpoints.metrics import router as metrics_router
+from app.core.cache import search_cache
 from app.core.config import configs
+from app.core.executor import search_executor
+from app.core.logging import configure_logging, flush_logs
+from app.core.metrics import MetricsMiddleware, register_state
+from app.core.middleware import AccessLogMiddleware
+from app.core.profiling import slow_query_log
+from app.services.index_service import index_service
+from app.services.ingest_service import build_disk_index_from_db
 
 
-
+configure_logging(configs.LOG_LEVEL, configs.LOG_QUEUE_SIZE)
 logger = structlog.get_logger()
+
+
+async def load_index():
+    try:
+        if configs.disk_index_from_db and not os.path.exists(configs.SQLITE_INDEX_PATH):
+            await build_disk_index_from_db()
+        await index_service.load_async()
+    except Exception:
+        pass  # ошибка уже залогирована, /health/ready отвечает "failed"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Индекс строится в фоне: /health/live отвечает сразу, /health/ready — после загрузки
+    load_task = asyncio.create_task(load_index())
+    search_executor.start()
+    watch_task = None
+    if configs.INDEX_WATCH_INTERVAL > 0:
+        watch_task = asyncio.create_task(
+            index_service.watch(configs.INDEX_WATCH_INTERVAL, on_reload=search_executor.restart)
+        )
+    yield
+    if not load_task.done():
+        load_task.cancel()
+    if watch_task is not None:
+        watch_task.cancel()
+    search_executor.shutdown()
+    flush_logs()
+    slow_query_log.flush()
+
+
 app = FastAPI(
     title=configs.PROJECT_NAME,
     openapi_url=f"{configs.API}/openapi.json",
     version="0.0.1",
+    lifespan=lifespan,
 )
 
-# app.add_middleware(LoggingMiddleware)
+app.add_middleware(MetricsMiddleware)
+if configs.ACCESS_LOG_ENABLED:
+    app.add_middleware(
+        AccessLogMiddleware,
+        sample_rate=configs.ACCESS_LOG_SAMPLE_RATE,
+        capture_bodies=configs.ACCESS_LOG_BODIES,
+        body_limit=configs.ACCESS_LOG_BODY_LIMIT,
+    )
 if configs.BACKEND_CORS_ORIGINS:
     app.add_middleware(
         CORSMiddleware,
@@ -28,8 +80,14 @@ if configs.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+if configs.GZIP_MIN_SIZE > 0:
+    # Снаружи журнала доступа: в журнал попадает несжатое тело
+    app.add_middleware(GZipMiddleware, minimum_size=configs.GZIP_MIN_SIZE, compresslevel=configs.GZIP_LEVEL)
 
 app.include_router(main_router)
+app.include_router(health_router)
+app.include_router(metrics_router)
+register_state(index_service, search_cache, search_executor)
 #
 # @app.exception_handler(HTTPException)
 # async def http_exception_handler(request: Request, exc: HTTPException):
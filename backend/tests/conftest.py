@@ -0,0 +1,65 @@
+import random
+
+import pandas as pd
+import pytest
+
+from app.utils.disk_index import DiskIndex
+from app.utils.model import build_disk_index, build_index
+from app.utils.phonetic import transliterate
+
+# Небольшой датасет в формате buildings_cleaned.csv: похожие названия улиц, числа
+# в названиях и номера домов с буквами, дробями, корпусами и строениями
+NAMES = ["Тверская", "Тверской", "Арбат", "Лесная", "Садовая", "Профсоюзная", "Молодёжная",
+         "Заречная", "Советская", "Пушкина", "1-я Тверская-Ямская", "8 Марта"]
+TYPES = ["улица", "переулок", "проспект", "бульвар", "шоссе", "площадь"]
+HOUSES = ["1", "2", "3", "5", "7", "7с1", "10", "10а", "10к2", "10к3", "12/1", "3к1с2", "21", "100", "103"]
+
+
+@pytest.fixture(scope="session")
+def dataset_path(tmp_path_factory):
+    rng = random.Random(7)
+    rows = []
+    for name in NAMES:
+        for street_type in rng.sample(TYPES, 3):
+            street = f"{street_type} {name}" if rng.random() < 0.5 else f"{name} {street_type}"
+            lon, lat = 37.3 + rng.random() * 0.6, 55.5 + rng.random() * 0.4
+            for house in rng.sample(HOUSES, 10):
+                rows.append({"addr:street": street, "addr:housenumber": house, "street": street.lower(),
+                             "@lon": round(lon + rng.random() * 0.01, 6), "@lat": round(lat + rng.random() * 0.01, 6)})
+    path = tmp_path_factory.mktemp("data") / "buildings.csv"
+    pd.DataFrame(rows).to_csv(path, sep=";", index=False)
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def memory_index(dataset_path):
+    return build_index(dataset_path)
+
+
+@pytest.fixture(scope="session")
+def disk_index(dataset_path, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("disk") / "index.sqlite")
+    build_disk_index(dataset_path, path)
+    return DiskIndex(path)
+
+
+@pytest.fixture(scope="session")
+def queries(dataset_path):
+    """Запросы по домам датасета: как есть, с сокращениями, опечаткой, латиницей и без номера"""
+    df = pd.read_csv(dataset_path, sep=";", dtype=str)
+    rng = random.Random(3)
+    result = ["маладежная 3", "ул. малодежная 3", "Tverskaja ul. 7", "Тверская 10-12", "Москва, Арбат 10 корп. 2"]
+    for _ in range(150):
+        row = df.iloc[rng.randrange(len(df))]
+        street, house = row["addr:street"], row["addr:housenumber"]
+        kind = rng.random()
+        if kind < 0.2:
+            street = street.replace("улица", "ул.").replace("проспект", "пр-т").replace("переулок", "пер")
+        elif kind < 0.4:
+            street = street.replace("о", "а", 1)
+        elif kind < 0.5:
+            street = transliterate(street).title()
+        elif kind < 0.6:
+            house = ""
+        result.append(f"{street} {house}".strip())
+    return result
@@ -0,0 +1,140 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.cache import LocalCache, get_search_cache
+from app.core.config import configs
+from app.core.executor import SearchExecutor, get_search_executor
+from app.services.index_service import IndexService, get_index_service
+from main import app
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+@pytest.fixture(scope="module")
+def loaded_index_service(dataset_path):
+    service = IndexService([(configs.DEFAULT_LOCALITY, dataset_path, "")])
+    service.load()
+    return service
+
+
+@pytest.fixture
+def client(loaded_index_service, monkeypatch):
+    """Приложение без lifespan: индекс, пул и кэш подменены тестовыми"""
+    monkeypatch.setattr(configs, "ADMIN_TOKEN", "secret")
+    executor = SearchExecutor("thread", workers=2, max_pending=8, retry_after=1)
+    cache = LocalCache(max_size=100, ttl=60)
+    app.dependency_overrides.update({
+        get_index_service: lambda: loaded_index_service,
+        get_search_executor: lambda: executor,
+        get_search_cache: lambda: cache,
+    })
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    executor.shutdown()
+
+
+def test_search(client, memory_index, loaded_index_service):
+    record = memory_index.record(0, 1.0)
+    response = client.get("/api/search", params={"address": f"{record['street']} {record['number']}"})
+    assert response.status_code == 200
+    top = response.json()["objects"][0]
+    assert (top["street"], top["number"], top["score"]) == (record["street"], record["number"], 1.0)
+    assert response.headers["X-Index-Version"] == loaded_index_service.index.version
+
+
+def test_search_etag_not_modified(client):
+    params = {"address": "тверская 7"}
+    response = client.get("/api/search", params=params)
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"].startswith("public")
+
+    unchanged = client.get("/api/search", params=params, headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+    assert unchanged.headers["ETag"] == etag
+    # ETag другой версии индекса — полный ответ
+    assert client.get("/api/search", params=params, headers={"If-None-Match": 'W/"other"'}).status_code == 200
+
+
+def test_search_cache_key_is_normalized(client):
+    # «ул. Тверская, 7» и «тверская улица 7» — один ключ кэша результатов
+    first = client.get("/api/search", params={"address": "ул. Тверская, 7"}).json()["objects"]
+    second = client.get("/api/search", params={"address": "тверская улица 7"}).json()["objects"]
+    assert first == second
+    cache = client.get("/health/ready").json()["cache"]
+    assert (cache["hits"], cache["misses"], cache["size"]) == (1, 1, 1)
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"address": "тверская 7", "lat": 55.7},
+    {"address": "тверская 7", "lat": 95, "lon": 37.6},
+    {"address": "тверская 7", "bbox": "37.7,55.5,37.3,55.9"},
+    {"address": "тверская 7", "bbox": "37.3,55.5"},
+    {"address": "тверская 7", "locality": "Казань"},
+])
+def test_search_rejects_bad_params(client, params):
+    assert client.get("/api/search", params=params).status_code == 422
+
+
+def test_search_with_bbox(client):
+    bbox = (37.3, 55.5, 37.6, 55.7)
+    response = client.get("/api/search", params={"address": "тверская 7", "bbox": ",".join(map(str, bbox))})
+    assert response.status_code == 200
+    objects = response.json()["objects"]
+    assert objects
+    assert all(bbox[0] <= o["lon"] <= bbox[2] and bbox[1] <= o["lat"] <= bbox[3] for o in objects)
+
+
+def test_batch(client):
+    response = client.post("/api/search/batch", json=["тверская 7", {"address": "арбат 10"}], params={"top_n": 2})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["searched_address"] for r in results] == ["тверская 7", "арбат 10"]
+    assert all(len(r["objects"]) <= 2 for r in results)
+
+    assert client.post("/api/search/batch", content=b"[1, 2]").status_code == 422
+    assert client.post("/api/search/batch", content=b"{").status_code == 422
+
+
+def test_suggest(client):
+    response = client.get("/api/suggest", params={"q": "тверск"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["suggestions"] and body["debounce_ms"] == configs.SUGGEST_DEBOUNCE_MS
+    unchanged = client.get("/api/suggest", params={"q": "тверск"}, headers={"If-None-Match": response.headers["ETag"]})
+    assert unchanged.status_code == 304
+
+    short = client.get("/api/suggest", params={"q": "т"})
+    assert short.status_code == 200 and short.json()["suggestions"] == []
+
+
+def test_index_not_loaded(client, dataset_path):
+    app.dependency_overrides[get_index_service] = lambda: IndexService([(configs.DEFAULT_LOCALITY, dataset_path, "")])
+    response = client.get("/api/search", params={"address": "тверская 7"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+    ready = client.get("/health/ready")
+    assert ready.status_code == 503 and ready.json()["status"] == "loading"
+
+
+def test_search_queue_full(client):
+    app.dependency_overrides[get_search_executor] = lambda: SearchExecutor("thread", workers=1, max_pending=0,
+                                                                           retry_after=2)
+    response = client.get("/api/search", params={"address": "тверская 7"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+
+
+def test_admin_requires_token(client):
+    assert client.get("/api/admin/index").status_code == 403
+    assert client.get("/api/admin/index", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    response = client.get("/api/admin/index", headers=ADMIN)
+    assert response.status_code == 200 and response.json()["ready"]
+
+
+def test_health(client, memory_index):
+    assert client.get("/health/live").json() == {"status": "alive"}
+    ready = client.get("/health/ready")
+    assert ready.status_code == 200
+    assert ready.json()["houses"] == len(memory_index)
@@ -0,0 +1,35 @@
+import asyncio
+
+from app.core.cache import LocalCache
+
+
+def test_version_change_keeps_entries_of_both_versions():
+    cache = LocalCache(max_size=10, ttl=60)
+
+    async def run():
+        # Во время перезагрузки запросы на старом и новом индексе чередуются
+        await cache.set_version("old")
+        await cache.set(("old", "арбат"), ["old result"])
+        await cache.set_version("new")
+        await cache.set(("new", "арбат"), ["new result"])
+        await cache.set_version("old")
+        await cache.set_version("new")
+        return await cache.get(("old", "арбат")), await cache.get(("new", "арбат"))
+
+    assert asyncio.run(run()) == (["old result"], ["new result"])
+    assert cache.stats()["version"] == "new"
+
+
+def test_lru_and_ttl_evict_entries():
+    cache = LocalCache(max_size=2, ttl=60)
+
+    async def run():
+        for key in ("a", "b", "c"):
+            await cache.set(key, key)
+        evicted = await cache.get("a")
+        cache.ttl = -1
+        await cache.set("d", "d")
+        return evicted, await cache.get("c"), await cache.get("d")
+
+    assert asyncio.run(run()) == (None, "c", None)
+    assert cache.stats()["size"] == 1
@@ -0,0 +1,69 @@
+from collections import defaultdict
+
+import pytest
+
+from app.utils.geo import GeoBias
+from app.utils.model import search_address_single_levenshtein
+from app.utils.normalize import normalize_street
+
+
+@pytest.fixture(params=["memory", "disk"])
+def engine(request, memory_index, disk_index):
+    return memory_index if request.param == "memory" else disk_index
+
+
+@pytest.fixture(scope="module")
+def records(memory_index):
+    return [memory_index.record(i, 1.0) for i in range(len(memory_index))]
+
+
+def _name(street):
+    """Название улицы без типа (normalize_street ставит тип в конец)"""
+    return " ".join(normalize_street(street).split()[:-1])
+
+
+def _search(index, query, bias=None, top_n=3):
+    return search_address_single_levenshtein(index, query, top_n, bias=bias)["objects"]
+
+
+def test_point_lifts_nearby_street(engine, records):
+    # Один номер дома на улицах с одним названием и разными типами: запрос без типа
+    # выбирает ту из них, что рядом с точкой смещения
+    streets = defaultdict(list)
+    for record in records:
+        streets[(_name(record["street"]), record["number"])].append(record)
+    pairs = [found for found in streets.values() if len(found) > 1]
+    assert pairs
+    for found in pairs:
+        for record in found:
+            bias = GeoBias(lat=record["lat"], lon=record["lon"], radius=1000)
+            top = _search(engine, f"{_name(record['street'])} {record['number']}", bias)[0]
+            assert (top["street"], top["number"]) == (record["street"], record["number"])
+
+
+def test_exact_match_outside_radius_is_kept(engine, records):
+    target = records[0]
+    far = next(r for r in records if _name(r["street"]) != _name(target["street"]))
+    bias = GeoBias(lat=far["lat"], lon=far["lon"], radius=100)
+    top = _search(engine, f"{target['street']} {target['number']}", bias)[0]
+    assert (top["street"], top["number"]) == (target["street"], target["number"])
+
+
+def test_bbox_restricts_results(engine, records):
+    record = records[len(records) // 2]
+    bbox = (record["lon"] - 0.02, record["lat"] - 0.02, record["lon"] + 0.02, record["lat"] + 0.02)
+    objects = _search(engine, "тверская 1", GeoBias(bbox=bbox), top_n=10)
+    assert objects
+    assert all(bbox[0] <= o["lon"] <= bbox[2] and bbox[1] <= o["lat"] <= bbox[3] for o in objects)
+    # Без bbox тот же запрос находит дома и за его пределами
+    assert any(not (bbox[0] <= o["lon"] <= bbox[2] and bbox[1] <= o["lat"] <= bbox[3])
+               for o in _search(engine, "тверская 1", top_n=10))
+
+
+def test_biased_search_agrees_between_engines(memory_index, disk_index, queries, records):
+    bias = GeoBias(lat=records[0]["lat"], lon=records[0]["lon"], radius=5000,
+                   bbox=(37.3, 55.5, 37.7, 55.8))
+    for query in queries[:50]:
+        memory = [(o["street"], o["number"], pytest.approx(o["score"])) for o in _search(memory_index, query, bias)]
+        disk = [(o["street"], o["number"], o["score"]) for o in _search(disk_index, query, bias)]
+        assert disk == memory, query
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from app.utils.house import NEIGHBOR_SCORE, HouseNumber, house_scores, house_similarity, parse_house
+from app.utils.model import parse_query
+from app.utils.normalize import normalize_address, normalize_house
+
+
+@pytest.mark.parametrize("key, expected", [
+    ("10", HouseNumber(10)),
+    ("10а", HouseNumber(10, letter=ord("а"))),
+    ("12/1", HouseNumber(12, fraction=1)),
+    ("10к2", HouseNumber(10, korpus=2)),
+    ("3к1с2", HouseNumber(3, korpus=1, building=2)),
+    ("2к1а", HouseNumber(2, letter=ord("а"), korpus=1)),
+    ("10ак2с1", HouseNumber(10, letter=ord("а"), korpus=2, building=1)),
+    ("", None),
+    ("10-12", None),
+    ("abc", None),
+])
+def test_parse_house(key, expected):
+    assert parse_house(key) == expected
+
+
+@pytest.mark.parametrize("house, expected", [
+    ("д. 10 корп. 2 стр. 1", "10к2с1"),
+    ("10 лит. А", "10а"),
+    ("12/1", "12/1"),
+    ("10-12", "10-12"),
+])
+def test_normalize_house(house, expected):
+    assert normalize_house(house) == expected
+
+
+def test_house_similarity():
+    assert house_similarity("10к2", "10к2") == 1.0
+    # Тот же номер с другим корпусом ближе соседнего номера и номера с теми же цифрами
+    assert house_similarity("10к3", "10к2") == pytest.approx(0.9)
+    assert house_similarity("10к3", "10к2") > house_similarity("10к3", "103")
+    assert house_similarity("10", "12") == pytest.approx(NEIGHBOR_SCORE / 3)
+    # Нераспознанный номер сравнивается как строка
+    assert house_similarity("10-12", "10-12") == 1.0
+    assert house_similarity("10-12", "10") < 1.0
+
+
+def test_house_scores_match_house_similarity(memory_index):
+    houses = np.arange(len(memory_index))
+    queries = ["10", "10к3", "7с1", "12/2", "3к1", "10-12", "103"]
+    for query in queries:
+        scores = house_scores(memory_index, houses, np.zeros(len(houses), dtype=np.int64), [query])
+        expected = [house_similarity(query, key) for key in memory_index.house_keys[houses]]
+        assert scores == pytest.approx(expected), query
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Тверская 7", ("тверская", "7")),
+    ("ул. Тверская, д. 10 корп. 2", ("тверская улица", "10к2")),
+    ("Профсоюзная 100 пер, 1 стр 1", ("профсоюзная 100 переулок", "1с1")),
+    ("1-я Тверская-Ямская улица 5", ("1-я тверская-ямская улица", "5")),
+    ("Тверская 10-12", ("тверская", "10-12")),
+])
+def test_parse_query(query, expected):
+    assert parse_query(query) == expected
+
+
+def test_normalize_address_takes_last_number():
+    assert normalize_address("Профсоюзная 100 пер, 1 стр 1") == "москва, профсоюзная 100 переулок, 1с1"
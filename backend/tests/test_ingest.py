@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.database import create_engine
+from app.model.base_model import Base
+from app.repository.address_repository import AddressRepository
+from app.services.ingest_service import IngestService, build_disk_index_from_db, read_chunks
+from app.utils.disk_index import DiskIndex
+from app.utils.model import search_address_single_levenshtein
+
+pytest.importorskip("aiosqlite")
+
+
+def _objects(response):
+    return [(o["street"], o["number"], o["score"]) for o in response["objects"]]
+
+
+async def _load_and_build(dataset_path, database_url, index_path):
+    engine = create_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_maker() as session:
+        await IngestService(AddressRepository(session)).ingest(dataset_path, chunk_size=50)
+    meta = await build_disk_index_from_db(session_maker, index_path)
+    await engine.dispose()
+    return meta
+
+
+def test_disk_index_from_table_matches_csv(dataset_path, disk_index, queries, tmp_path):
+    index_path = str(tmp_path / "index.sqlite")
+    meta = asyncio.run(_load_and_build(dataset_path, f"sqlite+aiosqlite:///{tmp_path / 'addresses.db'}", index_path))
+    assert meta["source"] == "db"
+    from_table = DiskIndex(index_path)
+    assert (from_table.n_streets, len(from_table)) == (disk_index.n_streets, len(disk_index))
+    for query in queries:
+        expected = _objects(search_address_single_levenshtein(disk_index, query, 3))
+        assert _objects(search_address_single_levenshtein(from_table, query, 3)) == expected, query
+    from_table.close()
+
+
+@pytest.mark.parametrize("fmt, body, line", [
+    ("ndjson", '{"node_id": 1, "street": "Арбат", "number": "1", "lat": 55.7, "lon": 37.6}\n{"street": "Арбат",\n', 2),
+    ("ndjson", '{"node_id": 1, "street": "Арбат", "number": "1", "lat": 55.7, "lon": 37.6}\n\n'
+               '{"node_id": 2, "street": "Арбат", "number": "2", "lat": "север", "lon": 37.6}\n', 3),
+    ("ndjson", '[1, 2]\n', 1),
+    ("csv", "addr:street;addr:housenumber;@lon;@lat\nАрбат;1;37.6;55.7\nАрбат;2;37.6;север\n", 3),
+])
+def test_read_chunks_reports_bad_line(tmp_path, fmt, body, line):
+    path = tmp_path / f"body.{fmt}"
+    path.write_text(body, encoding="utf-8")
+    with pytest.raises(HTTPException) as error:
+        list(read_chunks(str(path), fmt, chunk_size=10, locality="Москва"))
+    assert error.value.status_code == 422
+    assert error.value.detail.startswith(f"Line {line}: ")
@@ -0,0 +1,28 @@
+import pytest
+
+from app.utils.model import search_address_batch_levenshtein, search_address_single_levenshtein
+
+
+def _objects(response):
+    return [(o["street"], o["number"], pytest.approx(o["score"])) for o in response["objects"]]
+
+
+def test_exact_address_first(memory_index):
+    record = memory_index.record(0, 1.0)
+    response = search_address_single_levenshtein(memory_index, f"{record['street']} {record['number']}")
+    top = response["objects"][0]
+    assert (top["street"], top["number"], top["score"]) == (record["street"], record["number"], 1.0)
+
+
+def test_batch_matches_single(memory_index, queries):
+    batch = search_address_batch_levenshtein(memory_index, queries, top_n=3)
+    assert len(batch) == len(queries)
+    for query, response in zip(queries, batch):
+        assert response["searched_address"] == query
+        assert _objects(response) == _objects(search_address_single_levenshtein(memory_index, query, 3)), query
+
+
+def test_disk_matches_memory(memory_index, disk_index, queries):
+    for query in queries:
+        expected = _objects(search_address_single_levenshtein(memory_index, query, 3))
+        assert _objects(search_address_single_levenshtein(disk_index, query, 3)) == expected, query
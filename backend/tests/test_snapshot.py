@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from app.utils import snapshot as snapshot_module
+from app.utils.model import build_index, search_address_single_levenshtein
+from app.utils.snapshot import load_snapshot, save_snapshot
+
+
+def _objects(response):
+    return [(o["street"], o["number"], o["score"]) for o in response["objects"]]
+
+
+def test_snapshot_matches_memory(memory_index, queries, tmp_path):
+    path = str(tmp_path / "snapshot")
+    save_snapshot(memory_index, path)
+    snapshot = load_snapshot(path)
+    assert snapshot.version == memory_index.version
+    for query in queries:
+        expected = _objects(search_address_single_levenshtein(memory_index, query, 3))
+        assert _objects(search_address_single_levenshtein(snapshot, query, 3)) == expected, query
+
+
+def _head_index(dataset_path, tmp_path, rows):
+    head = tmp_path / "head.csv"
+    with open(dataset_path, encoding="utf-8") as src:
+        head.write_text("".join(src.readlines()[:rows + 1]), encoding="utf-8")
+    return build_index(str(head))
+
+
+def test_rebuild_in_place_swaps_whole_snapshot(memory_index, dataset_path, tmp_path):
+    path = str(tmp_path / "snapshot")
+    save_snapshot(memory_index, path)
+    previous = load_snapshot(path)
+    previous_record = previous.record(0, 1.0)
+
+    smaller = _head_index(dataset_path, tmp_path, 30)
+    meta = save_snapshot(smaller, path)
+
+    assert sorted(os.listdir(tmp_path)) == ["head.csv", "snapshot"]
+    rebuilt = load_snapshot(path)
+    assert (meta["houses"], len(rebuilt), rebuilt.version) == (30, 30, smaller.version)
+    # Открытый до пересборки снапшот читает прежние файлы
+    assert len(previous) == len(memory_index)
+    assert previous.record(0, 1.0) == previous_record
+
+
+def test_failed_rebuild_keeps_previous_snapshot(memory_index, dataset_path, tmp_path, monkeypatch):
+    path = str(tmp_path / "snapshot")
+    save_snapshot(memory_index, path)
+    save_array = snapshot_module._save_array
+    written = []
+
+    def failing_save_array(*args):
+        written.append(args[1])
+        if len(written) > 3:
+            raise OSError("disk full")
+        save_array(*args)
+
+    monkeypatch.setattr(snapshot_module, "_save_array", failing_save_array)
+    with pytest.raises(OSError):
+        save_snapshot(_head_index(dataset_path, tmp_path, 30), path)
+    # Прерванная сборка не тронула ни одного файла прежнего снапшота
+    snapshot = load_snapshot(path)
+    assert snapshot.version == memory_index.version
+    assert [snapshot.record(i, 1.0) for i in range(len(snapshot))] == \
+        [memory_index.record(i, 1.0) for i in range(len(memory_index))]
+
+
+def test_refuses_to_replace_other_directory(memory_index, tmp_path):
+    (tmp_path / "notes.txt").write_text("keep", encoding="utf-8")
+    with pytest.raises(ValueError):
+        save_snapshot(memory_index, str(tmp_path))
+    assert os.listdir(tmp_path) == ["notes.txt"]
@@ -0,0 +1,46 @@
+import pytest
+
+from app.utils.normalize import normalize_street
+from app.utils.suggest import suggest
+
+
+@pytest.fixture(params=["memory", "disk"])
+def suggest_in(request, memory_index, disk_index):
+    if request.param == "memory":
+        return lambda text, limit=10: suggest(memory_index, text, limit)
+    return disk_index.suggest
+
+
+def _streets_of(memory_index, name):
+    return sorted({street for street in memory_index.streets if street.split()[0] == name})
+
+
+def test_streets_by_prefix(suggest_in):
+    suggestions = suggest_in("тверск")
+    assert suggestions
+    assert all(s["number"] is None and "тверск" in s["street"].lower() for s in suggestions)
+
+
+def test_houses_keep_typed_street_type(suggest_in, memory_index):
+    # «Тверская» есть в датасете с несколькими типами улиц
+    streets = _streets_of(memory_index, "тверская")
+    assert len(streets) > 1
+    for street in streets:
+        street_type = street.split()[-1]
+        for text in (f"тверская {street_type} 1", f"{street_type} тверская 1"):
+            suggestions = suggest_in(text)
+            assert suggestions, text
+            assert {normalize_street(s["street"]) for s in suggestions} == {street}, text
+            assert all(s["number"].startswith("1") for s in suggestions)
+
+
+def test_houses_without_type_use_any_street_type(suggest_in, memory_index):
+    streets = set(_streets_of(memory_index, "тверская"))
+    suggestions = suggest_in("тверская 1")
+    assert suggestions
+    assert {normalize_street(s["street"]) for s in suggestions} <= streets
+
+
+def test_memory_and_disk_suggestions_agree(memory_index, disk_index):
+    for text in ("тверск", "арбат", "тверская 1", "садовая ул 1", "ул. Садовая 10", "8 марта 2"):
+        assert suggest(memory_index, text, 5) == disk_index.suggest(text, 5), text
@@ -1,3 +1,5 @@
+const baseUrl = 'http://81.200.145.134:8000';
+
 // Глобальные переменные для карты
 let map;
 let markers = [];
@@ -51,6 +53,108 @@ document.addEventListener('DOMContentLoaded', function () {
 
     initMap();
 
+    // Подсказки: запрос уходит через debounceMs после последнего нажатия,
+    // предыдущий незавершённый запрос отменяется
+    const suggestList = document.getElementById('suggestList');
+    let debounceMs = 150;
+    let debounceTimer = null;
+    let suggestController = null;
+    let activeIndex = -1;
+
+    function hideSuggestions() {
+        suggestList.hidden = true;
+        suggestList.innerHTML = '';
+        activeIndex = -1;
+    }
+
+    function renderSuggestions(suggestions) {
+        suggestList.innerHTML = '';
+        activeIndex = -1;
+        suggestions.forEach(item => {
+            const li = document.createElement('li');
+            li.className = 'suggest-item';
+            li.textContent = item.text;
+            // mousedown срабатывает раньше blur у поля ввода
+            li.addEventListener('mousedown', event => {
+                event.preventDefault();
+                selectSuggestion(item);
+            });
+            suggestList.appendChild(li);
+        });
+        suggestList.hidden = suggestions.length === 0;
+    }
+
+    function selectSuggestion(item) {
+        hideSuggestions();
+        if (item.number) {
+            addressInput.value = item.text;
+            searchBtn.click();
+        } else {
+            // Улица выбрана — остаётся ввести номер дома
+            addressInput.value = item.text + ' ';
+            addressInput.focus();
+        }
+    }
+
+    async function fetchSuggestions(text) {
+        if (suggestController) {
+            suggestController.abort();
+        }
+        suggestController = new AbortController();
+
+        const url = `${baseUrl}/api/suggest?q=${encodeURIComponent(text)}&limit=8`;
+        try {
+            const response = await fetch(url, { signal: suggestController.signal });
+            if (!response.ok) {
+                return;
+            }
+            const data = await response.json();
+            debounceMs = data.debounce_ms ?? debounceMs;
+            // Ответ на устаревший ввод не показываем
+            if (addressInput.value === text) {
+                renderSuggestions(data.suggestions);
+            }
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                console.error('Ошибка подсказок:', error);
+            }
+        }
+    }
+
+    addressInput.addEventListener('input', function () {
+        clearTimeout(debounceTimer);
+        const text = addressInput.value;
+        if (text.trim().length < 2) {
+            if (suggestController) {
+                suggestController.abort();
+            }
+            hideSuggestions();
+            return;
+        }
+        debounceTimer = setTimeout(() => fetchSuggestions(text), debounceMs);
+    });
+
+    addressInput.addEventListener('keydown', function (event) {
+        const items = suggestList.querySelectorAll('.suggest-item');
+        if (event.key === 'ArrowDown' || event.key === 'ArrowUp') {
+            if (items.length === 0) return;
+            event.preventDefault();
+            activeIndex = (activeIndex + (event.key === 'ArrowDown' ? 1 : -1) + items.length) % items.length;
+            items.forEach((li, i) => li.classList.toggle('active', i === activeIndex));
+        } else if (event.key === 'Enter') {
+            if (activeIndex >= 0 && items[activeIndex]) {
+                items[activeIndex].dispatchEvent(new MouseEvent('mousedown'));
+            } else {
+                hideSuggestions();
+                searchBtn.click();
+            }
+        } else if (event.key === 'Escape') {
+            hideSuggestions();
+        }
+    });
+
+    addressInput.addEventListener('blur', hideSuggestions);
+
     searchBtn.addEventListener('click', function () {
         const address = addressInput.value.trim();
 
@@ -77,7 +181,6 @@ document.addEventListener('DOMContentLoaded', function () {
     });
 
     async function searchAddress(address) {
-        const baseUrl = 'http://81.200.145.134:8000';
         const url = `${baseUrl}/api/search?address=${encodeURIComponent(address)}`;
 
         const response = await fetch(url, {